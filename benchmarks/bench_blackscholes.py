@@ -0,0 +1,72 @@
+# using usr/bin/python3
+""" Benchmarks of closed-form pricing and hedging."""
+import numpy as np
+from derivatives import BlackScholes
+from derivatives import BlackScholesChain
+from derivatives import HedgingSimulation
+
+
+class BlackScholesPricing:
+    params = [100, 10 ** 4]
+    param_names = ['options']
+    unit = 'options'
+
+    def setup(self, options):
+        self.strikes = np.linspace(20., 60., options)
+
+    def units(self, options):
+        return options
+
+    def time_price_and_greeks(self, options):
+        for strike in self.strikes:
+            option = BlackScholes(36., strike, 1., 0.06, 0.2, 'eurocall')
+            option.price, option.delta, option.gamma, option.vega
+
+    def time_chain(self, options):
+        BlackScholesChain(36., self.strikes, 1., 0.06, 0.2).greeks()
+
+
+def simulated_paths(paths, steps):
+    """ Return times and GBM paths of shape (paths, steps + 1) over one year."""
+    random_state = np.random.default_rng(1)
+    times = np.linspace(0., 1., steps + 1)
+    increments = 0.04 / steps + 0.2 * np.sqrt(1. / steps) * random_state.standard_normal((paths, steps))
+    return times, 36. * np.exp(np.concatenate((np.zeros((paths, 1)), np.cumsum(increments, axis=1)), axis=1))
+
+
+class DeltaHedging:
+    params = ([1, 10], [52, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.times, self.paths = simulated_paths(paths, steps)
+        # loads pandas before timing
+        self.time_delta_hedging(1, steps)
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_delta_hedging(self, paths, steps):
+        # path by path through BlackScholes.delta_hedging
+        for path in self.paths[:paths]:
+            BlackScholes(36., 40., 1., 0.06, 0.2, 'eurocall').delta_hedging(steps + 1, 1, 2, path, self.times)
+
+
+class BatchHedging:
+    params = ([10 ** 3, 10 ** 4], [52, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.simulation = HedgingSimulation(simulated_paths(paths, steps)[1], np.linspace(0., 1., steps + 1),
+                                            40., 1., 0.06, 0.2)
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_delta_hedge(self, paths, steps):
+        self.simulation.delta_hedge()
+
+    def time_stop_loss(self, paths, steps):
+        self.simulation.stop_loss(margin=1.)
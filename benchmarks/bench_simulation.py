@@ -0,0 +1,53 @@
+# using usr/bin/python3
+""" Benchmarks of random numbers and path simulation."""
+import numpy as np
+from derivatives import sn_random_numbers
+
+from environment import gbm
+
+
+class RandomNumbers:
+    params = ([10 ** 4, 10 ** 5], [12, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.random_state = np.random.default_rng(1)
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_sn_random_numbers(self, paths, steps):
+        sn_random_numbers((1, steps, paths), random_state=self.random_state)
+
+
+class GeneratePaths:
+    params = ([10 ** 4, 10 ** 5], [12, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.underlying = gbm(paths, steps)
+        self.underlying.generate_paths()
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_generate_paths(self, paths, steps):
+        self.underlying.generate_paths()
+
+
+class GenerateStatistics:
+    params = ([10 ** 4, 10 ** 5], [12, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.underlying = gbm(paths, steps)
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_generate_statistics(self, paths, steps):
+        # functionals of an Asian barrier option, without storing the paths
+        self.underlying.generate_statistics(('maturity_value', 'mean_value', 'max_value'))
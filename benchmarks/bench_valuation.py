@@ -0,0 +1,104 @@
+# using usr/bin/python3
+""" Benchmarks of Monte Carlo valuation and greeks."""
+import datetime as dt
+
+import numpy as np
+from derivatives import DerivativesPortfolio
+from derivatives import DerivativesPosition
+from derivatives import ScenarioEngine
+from derivatives import ValuationEuropeanMonteCarlo
+
+from environment import gbm
+from environment import option_environment
+
+# payoff and barrier per option type
+OPTION_TYPES = {'European': ('call', None), 'Binary': ('', None),
+                'KnockoutBarrier': ('call', 50.), 'KnockinBarrier': ('call', 50.)}
+
+
+class PresentValue:
+    params = (list(OPTION_TYPES), [10 ** 4, 10 ** 5], [12, 252])
+    param_names = ['option_type', 'paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, option_type, paths, steps):
+        payoff_func, self.barrier = OPTION_TYPES[option_type]
+        self.valuation = ValuationEuropeanMonteCarlo('option', gbm(paths, steps), option_environment(),
+                                                     payoff_func=payoff_func, option_type=option_type)
+        self.valuation.present_value(fixed_seed=True, barrier=self.barrier)
+
+    def units(self, option_type, paths, steps):
+        return paths
+
+    def time_present_value(self, option_type, paths, steps):
+        # resimulates the paths
+        self.valuation.present_value(barrier=self.barrier)
+
+    def time_present_value_fixed_seed(self, option_type, paths, steps):
+        # reuses the paths
+        self.valuation.present_value(fixed_seed=True, barrier=self.barrier)
+
+
+class Greeks:
+    params = ([10 ** 4, 10 ** 5], [12, 252])
+    param_names = ['paths', 'steps']
+    unit = 'paths'
+
+    def setup(self, paths, steps):
+        self.valuation = ValuationEuropeanMonteCarlo('option', gbm(paths, steps), option_environment(),
+                                                     payoff_func='call')
+
+    def units(self, paths, steps):
+        return paths
+
+    def time_delta(self, paths, steps):
+        self.valuation.delta()
+
+    def time_vega(self, paths, steps):
+        self.valuation.vega()
+
+    def time_greeks(self, paths, steps):
+        self.valuation.greeks()
+
+
+class Portfolio:
+    params = ([100, 1000], [10 ** 4, 10 ** 5])
+    param_names = ['options', 'paths']
+    unit = 'options'
+
+    def setup(self, options, paths):
+        random_state = np.random.default_rng(1)
+        underlying = gbm(paths, 52)
+        maturities = underlying.time_grid[4::4].tolist()
+        positions = [DerivativesPosition(f"option_{number}", 1., option_environment(
+            strike=random_state.uniform(30., 45.), maturity=maturities[number % len(maturities)]),
+            payoff_func=('call', 'put')[number % 2]) for number in range(options)]
+        self.portfolio = DerivativesPortfolio('book', underlying, positions)
+        self.portfolio.get_values()
+
+    def units(self, options, paths):
+        return options
+
+    def time_get_values(self, options, paths):
+        self.portfolio.get_values()
+
+
+class Scenarios:
+    params = (['call', 'asian_call'], [10 ** 4, 10 ** 5])
+    param_names = ['payoff_func', 'paths']
+    unit = 'scenarios'
+    # 9 spot x 5 vol x 3 rate x 2 time shocks
+    shocks = {'spot': np.linspace(-0.2, 0.2, 9), 'vol': np.linspace(-0.1, 0.1, 5), 'rate': [-0.01, 0., 0.01],
+              'time': [0, 10]}
+
+    def setup(self, payoff_func, paths):
+        valuation = ValuationEuropeanMonteCarlo('option', gbm(paths, 12), option_environment(),
+                                                payoff_func=payoff_func)
+        self.engine = ScenarioEngine(valuation)
+        self.engine.run(**self.shocks)
+
+    def units(self, payoff_func, paths):
+        return 9 * 5 * 3 * 2
+
+    def time_scenario_grid(self, payoff_func, paths):
+        self.engine.run(**self.shocks)
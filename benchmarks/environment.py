@@ -0,0 +1,43 @@
+# using usr/bin/python3
+""" Market environments shared by the benchmarks."""
+import datetime as dt
+
+import numpy as np
+from derivatives import ConstantShortRate
+from derivatives import GeometricBrownianMotion
+from derivatives import MarketEnvironment
+
+PRICING_DATE = dt.datetime(2020, 1, 1)
+MATURITY = dt.datetime(2020, 12, 31)
+
+
+def gbm_environment(paths, steps, seed=1):
+    """ Return the market environment of a one-year GeometricBrownianMotion with steps equidistant steps."""
+    me_gbm = MarketEnvironment('me_gbm', PRICING_DATE)
+    me_gbm.add_constant('initial_value', 36.)
+    me_gbm.add_constant('volatility', 0.2)
+    me_gbm.add_constant('final_date', MATURITY)
+    me_gbm.add_constant('currency', 'EUR')
+    me_gbm.add_constant('frequency', 'M')
+    me_gbm.add_constant('paths', paths)
+    me_gbm.add_constant('seed', seed)
+    me_gbm.add_curve('discount_curve', ConstantShortRate('csr', 0.06))
+    offsets = np.linspace(0., (MATURITY - PRICING_DATE).total_seconds(), steps + 1)
+    me_gbm.add_list('time_grid', [PRICING_DATE + dt.timedelta(seconds=offset) for offset in offsets])
+    return me_gbm
+
+
+def gbm(paths, steps, seed=1):
+    return GeometricBrownianMotion('gbm', gbm_environment(paths, steps, seed))
+
+
+def option_environment(strike=40., maturity=MATURITY, barrier=None):
+    """ Return the market environment of an option, without result cache so every call is timed."""
+    me_option = MarketEnvironment('me_option', PRICING_DATE)
+    me_option.add_constant('strike', strike)
+    me_option.add_constant('maturity', maturity)
+    me_option.add_constant('currency', 'EUR')
+    me_option.add_constant('valuation_cache', None)
+    if barrier is not None:
+        me_option.add_constant('barrier', barrier)
+    return me_option
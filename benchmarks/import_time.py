@@ -0,0 +1,68 @@
+# using usr/bin/python3
+"""
+Import-time benchmark of the derivatives package
+
+Imports the package in fresh interpreters and compares the median time spent
+on top of importing NumPy against a budget. Fails (exit code 1) if the budget
+is exceeded or if an optional dependency (matplotlib, pandas, scipy) is
+loaded by the import.
+
+    python benchmarks/import_time.py --budget 0.1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dx')
+OPTIONAL_MODULES = ('matplotlib', 'pandas', 'scipy')
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_time = time.perf_counter() - start
+start = time.perf_counter()
+import derivatives
+package_time = time.perf_counter() - start
+print(json.dumps({'numpy': numpy_time, 'package': package_time,
+                  'optional': [name for name in %r if name in sys.modules]}))
+""" % (OPTIONAL_MODULES,)
+
+
+def measure(repeat=7):
+    """
+    Return import times of fresh interpreters
+    :param repeat: (int) number of interpreters started
+    :return: (dict) median seconds for numpy and for the package on top of it, optional modules loaded
+    """
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (PACKAGE_PATH,
+                                                                            os.environ.get('PYTHONPATH')))))
+    runs = [json.loads(subprocess.run([sys.executable, '-c', _SCRIPT], env=environment, check=True,
+                                      capture_output=True, text=True).stdout) for _ in range(repeat)]
+    return {'numpy': statistics.median(run['numpy'] for run in runs),
+            'package': statistics.median(run['package'] for run in runs),
+            'optional': sorted({name for run in runs for name in run['optional']})}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget', type=float, default=0.1, help='seconds allowed on top of numpy')
+    parser.add_argument('--repeat', type=int, default=7, help='number of fresh interpreters')
+    args = parser.parse_args(argv)
+    result = measure(args.repeat)
+    print(f"numpy {result['numpy']:.3f}s, derivatives {result['package']:.3f}s (budget {args.budget:.3f}s)")
+    failed = False
+    if result['optional']:
+        print(f"optional modules imported: {', '.join(result['optional'])}")
+        failed = True
+    if result['package'] > args.budget:
+        print('import time over budget')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# using usr/bin/python3
+"""
+Runner of the benchmark suite
+
+Benchmarks are asv-style classes in benchmarks/bench_*.py: params and
+param_names give the parameter grid, setup(*params) prepares a case, every
+time_* method is timed with the same parameters and units(*params) returns the work done per call
+(e.g. paths or options) with the class attribute unit naming it. Each case
+reports the best time of repeat runs, the throughput in units per second and
+the peak memory traced by tracemalloc during one extra run.
+
+    python benchmarks/run.py                          # run everything
+    python benchmarks/run.py -b valuation --quick     # first parameter only
+    python benchmarks/run.py -o results.json          # save results
+    python benchmarks/run.py --compare benchmarks/baseline.json  # exit 1 on regressions
+
+benchmarks/baseline.json holds the results of the full suite (default repeat)
+with the machine and commit they were measured on. Timings only compare on
+the same machine: to compare a change against another revision there, run
+the suite on a checkout of that revision first,
+
+    git worktree add /tmp/baseline <revision>
+    python /tmp/baseline/benchmarks/run.py -o baseline.json
+    python benchmarks/run.py --compare baseline.json
+
+and refresh benchmarks/baseline.json with -o when a release changes the
+expected figures.
+"""
+import argparse
+import gc
+import glob
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+# the package and the shared market environments of the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_PATH), 'dx'))
+sys.path.insert(0, BENCHMARK_PATH)
+
+
+def load_benchmarks(pattern=None):
+    """ Return (name, class) of all benchmark classes whose name contains pattern."""
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(BENCHMARK_PATH, 'bench_*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, obj in vars(module).items():
+            if isinstance(obj, type) and obj.__module__ == module_name and \
+                    any(attribute.startswith('time_') for attribute in dir(obj)):
+                full_name = f"{module_name[len('bench_'):]}.{name}"
+                if pattern is None or pattern in full_name:
+                    benchmarks.append((full_name, obj))
+    return benchmarks
+
+
+def parameter_grid(benchmark, quick=False):
+    """ Return all parameter combinations of a benchmark class, only the first one of each if quick."""
+    params = getattr(benchmark, 'params', [])
+    if params and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    if quick:
+        params = [values[:1] for values in params]
+    return list(itertools.product(*params))
+
+
+def time_case(method, repeat):
+    """ Return the best wall time of repeat calls and the peak traced memory of one more call."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        method()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        method()
+        __, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run(benchmarks, repeat=3, quick=False, stream=sys.stdout):
+    """
+    Run benchmark classes
+    :param benchmarks: (list) (name, class) pairs
+    :param repeat: (int) timed calls per case
+    :param quick: (bool) only the first value of each parameter
+    :return: (dict) results keyed by 'benchmark.method[params]'
+    """
+    results = {}
+    for name, benchmark in benchmarks:
+        methods = sorted(attribute for attribute in dir(benchmark) if attribute.startswith('time_'))
+        for params in parameter_grid(benchmark, quick):
+            instance = benchmark()
+            if hasattr(instance, 'setup'):
+                instance.setup(*params)
+            units = instance.units(*params) if hasattr(instance, 'units') else 1
+            for method in methods:
+                key = f"{name}.{method}[{', '.join(map(str, params))}]"
+                # time_* methods take the parameters, as in asv
+                function = getattr(instance, method)
+                seconds, peak = time_case(lambda: function(*params), repeat)
+                results[key] = {'time': seconds, 'peak_memory': peak, 'throughput': units / seconds,
+                                'unit': getattr(benchmark, 'unit', 'calls'), 'params': list(params)}
+                print(f"{key:<70} {seconds * 1e3:10.3f} ms {units / seconds:14.1f} "
+                      f"{results[key]['unit']}/s {peak / 2 ** 20:9.2f} MiB", file=stream)
+            if hasattr(instance, 'teardown'):
+                instance.teardown(*params)
+    return results
+
+
+def compare(results, baseline, threshold=1.2, stream=sys.stdout):
+    """
+    Print the cases slower (or using more memory) than baseline by more than threshold
+    :param results: (dict) current results
+    :param baseline: (dict) stored results
+    :param threshold: (float) allowed ratio of current to baseline
+    :return: (list) keys of the regressed cases
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        time_ratio = result['time'] / baseline[key]['time']
+        memory_ratio = (result['peak_memory'] + 1) / (baseline[key]['peak_memory'] + 1)
+        if time_ratio > threshold or memory_ratio > threshold:
+            regressions.append(key)
+            print(f"REGRESSION {key}: time x{time_ratio:.2f}, peak memory x{memory_ratio:.2f}", file=stream)
+    return regressions
+
+
+def _revision():
+    """ Return the git commit of the benchmarked tree, None outside a git checkout."""
+    import subprocess
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_PATH, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the derivatives benchmark suite.')
+    parser.add_argument('-b', '--bench', help='only benchmarks whose name contains this string')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed calls per case')
+    parser.add_argument('--quick', action='store_true', help='only the first value of each parameter')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+    results = run(load_benchmarks(args.bench), repeat=args.repeat, quick=args.quick)
+    if args.output:
+        import numpy as np
+        with open(args.output, 'w') as file:
+            json.dump({'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                                   'platform': platform.platform(), 'processor': platform.processor(),
+                                   'commit': _revision()},
+                       'results': results}, file, indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,64 @@
 # # frame
 from .get_year_deltas import get_year_deltas
+from .time_grid import TimeGrid
+from .normal_distribution import norm_cdf, norm_pdf
 from .constant_short_rate import ConstantShortRate
+from .interpolated_curve import InterpolatedCurve, FlatForwardCurve, LogLinearCurve
 from .market_environment import MarketEnvironment
+# plotting loads matplotlib on first call
 from .plot_option_stats import plot_option_stats
+from .fingerprint import fingerprint
+# per-stage timings and counters, off unless a collector is active
+from .instrumentation import Instrumentation, instrument
+#
+# # analytic pricing
+from .black_scholes_chain import BlackScholesChain
+from .implied_volatility import implied_volatility
 #
 # # simulation
+from .random_streams import make_generator, spawn_generators, jumped_generators, block_generator
 from .sn_random_numbers import sn_random_numbers
+from .quasi_random_numbers import BrownianBridge, sobol_random_numbers
 from .simulation_class import SimulationClass
 from .geometric_brownian_motion import GeometricBrownianMotion
+from .correlated_gbm import CorrelatedGeometricBrownianMotion
 #
 # # valuation
+from .valuation_cache import ValuationCache, valuation_cache
+from .running_statistics import RunningMoments, MonteCarloEstimate
+from .payoff_kernels import PathStatistics, MultiAssetStatistics, Payoff, register_payoff
 from .valuation_class import ValuationClass
 from .valuation_mcs_european import ValuationEuropeanMonteCarlo
+from .valuation_mcs_american import ValuationAmericanMonteCarlo
+from .valuation_mcs_multi_asset import ValuationMultiAssetMonteCarlo
+#
+# # loaded on first access (PEP 562), see __getattr__
+_LAZY_ATTRIBUTES = {'PathStore': 'path_store',
+                    'DerivativesPosition': 'derivatives_portfolio',
+                    'DerivativesPortfolio': 'derivatives_portfolio',
+                    'HedgingSimulation': 'hedging_simulation',
+                    'HedgingResult': 'hedging_simulation',
+                    'ScenarioEngine': 'scenario_engine',
+                    'ScenarioResult': 'scenario_engine',
+                    'PricingService': 'pricing_service',
+                    'PricingClient': 'pricing_service',
+                    # #  pricing methods
+                    'Pricing': 'pricing',
+                    'BlackScholes': 'blackscholes'}
+
+# modules named like the function they define (sn_random_numbers, get_year_deltas, ...) stay
+# eager above, importing such a submodule later would shadow the function by the module
+__all__ = [name for name in globals() if not name.startswith('_')] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-# #  pricing methods
-from .pricing import Pricing
-from .blackscholes import BlackScholes
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
\ No newline at end of file
@@ -0,0 +1,82 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import norm_cdf
+from derivatives import norm_pdf
+
+
+def option_sign(option_type):
+    """
+    Return +1 for calls and -1 for puts
+    :param option_type: (array_like) 'eurocall'/'europut' labels or booleans (True for calls)
+    :return: (np.array) array of +1. / -1.
+    """
+    option_type = np.asarray(option_type)
+    if option_type.dtype.kind == 'b':
+        is_call = option_type
+    else:
+        is_call = option_type == 'eurocall'
+        if not np.all(is_call | (option_type == 'europut')):
+            raise ValueError("Invalid option type, use 'eurocall' or 'europut'.")
+    return np.where(is_call, 1., -1.)
+
+
+class BlackScholesChain:
+    """ Class to price whole arrays of European options with the
+    Black-Scholes-Merton formula, together with their greeks.
+
+    All inputs are broadcast against each other, d1 and d2 and the normal
+    distribution terms are computed once at construction. Greeks are
+    per unit of the underlying (delta, gamma), per unit of volatility (vega),
+    per year (theta) and per unit of rate (rho)."""
+
+    def __init__(self, asset_price, strike, maturity_time, risk_free_factor, sigma, option_type='eurocall',
+                 time=0.):
+        # the option types are broadcast like the other inputs
+        self.asset_price, self.strike, self.maturity_time, self.risk_free_factor, self.sigma, self.time, \
+            self.sign = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in
+                                              (asset_price, strike, maturity_time, risk_free_factor, sigma, time,
+                                               option_sign(option_type))])
+        self.tau = self.maturity_time - self.time
+        sqrt_tau = np.sqrt(self.tau)
+        self.sigma_sqrt_tau = self.sigma * sqrt_tau
+        self.d1 = (np.log(self.asset_price / self.strike) + (self.risk_free_factor + 0.5 * self.sigma ** 2)
+                   * self.tau) / self.sigma_sqrt_tau
+        self.d2 = self.d1 - self.sigma_sqrt_tau
+        # discounted strike and the normal terms shared by price and greeks
+        self.discounted_strike = self.strike * np.exp(-self.risk_free_factor * self.tau)
+        self.n_d1 = norm_pdf(self.d1)
+        self.cdf_d1 = norm_cdf(self.sign * self.d1)
+        self.cdf_d2 = norm_cdf(self.sign * self.d2)
+
+    @property
+    def price(self):
+        return self.sign * (self.asset_price * self.cdf_d1 - self.discounted_strike * self.cdf_d2)
+
+    @property
+    def delta(self):
+        return self.sign * self.cdf_d1
+
+    @property
+    def gamma(self):
+        return self.n_d1 / (self.asset_price * self.sigma_sqrt_tau)
+
+    @property
+    def vega(self):
+        return self.asset_price * self.n_d1 * np.sqrt(self.tau)
+
+    @property
+    def theta(self):
+        return (-self.asset_price * self.n_d1 * self.sigma / (2. * np.sqrt(self.tau))
+                - self.sign * self.risk_free_factor * self.discounted_strike * self.cdf_d2)
+
+    @property
+    def rho(self):
+        return self.sign * self.tau * self.discounted_strike * self.cdf_d2
+
+    def greeks(self):
+        """
+        Return price and all greeks of the chain
+        :return: (dict) arrays keyed by 'price', 'delta', 'gamma', 'vega', 'theta' and 'rho'
+        """
+        return {'price': self.price, 'delta': self.delta, 'gamma': self.gamma,
+                'vega': self.vega, 'theta': self.theta, 'rho': self.rho}
@@ -1,7 +1,7 @@
 import numpy as np
-import scipy.stats
-import matplotlib.pyplot as plt
-import pandas as pd
+from derivatives import implied_volatility
+from derivatives import norm_cdf
+from derivatives import norm_pdf
 
 
 class BlackScholes:
@@ -54,12 +54,12 @@ class BlackScholes:
         Retorna o preço da opção, calculado a partir da solução da equação e Black-Scholes
         """
         if self.opt == "eurocall":
-            return self.asset_price * scipy.stats.norm.cdf(self.d1, 0.0, 1.0) - self.strike * np.exp(
-                -self.risk_free_factor * self.maturity_time) * scipy.stats.norm.cdf(self.d2, 0.0, 1.0)
+            return self.asset_price * norm_cdf(self.d1) - self.strike * np.exp(
+                -self.risk_free_factor * self.maturity_time) * norm_cdf(self.d2)
         elif self.opt == "europut":
             return (self.strike * np.exp(-self.risk_free_factor * (self.maturity_time - self.time)) *
-                    scipy.stats.norm.cdf(-self.d2, 0.0, 1.0) - self.asset_price * scipy.stats.norm.cdf(
-                        -self.d1, 0.0, 1.0))
+                    norm_cdf(-self.d2) - self.asset_price * norm_cdf(
+                        -self.d1))
         else:
             print("Tipo de opção inválido, defina o tipo igual 1 para uma call e igual a 0 para um put")
 
@@ -69,9 +69,9 @@ class BlackScholes:
         Retorna o delta da opção, a derivada do preço da opção em respeito ao preço da ação
         """
         if self.opt == "eurocall":
-            return scipy.stats.norm.cdf(self.d1, 0.0, 1.0)
+            return norm_cdf(self.d1)
         elif self.opt == "europut":
-            return scipy.stats.norm.cdf(self.d1, 0.0, 1.0) - 1
+            return norm_cdf(self.d1) - 1
         else:
             print("Tipo de opção inválido, defina o tipo igual 1 para uma call e igual a 0 para um put")
 
@@ -80,7 +80,7 @@ class BlackScholes:
         """
         Retorna o gamma da opção, a segunda derivada do preço da opção em respeito ao preço da ação
         """
-        return (scipy.stats.norm.pdf(self.d1) * np.exp(self.maturity_time - self.time)) / (
+        return (norm_pdf(self.d1) * np.exp(self.maturity_time - self.time)) / (
                 self.asset_price * self.sigma * np.sqrt(self.maturity_time - self.time))
 
     @property
@@ -88,20 +88,18 @@ class BlackScholes:
         """
         Retorna o vega da opção, a derivada do preço da opção em respeito a volatilidade
         """
-        return (scipy.stats.norm.pdf(self.d1) * np.exp(self.maturity_time - self.time)) * \
+        return (norm_pdf(self.d1) * np.exp(self.maturity_time - self.time)) * \
                (self.asset_price * np.sqrt(self.maturity_time - self.time))
 
-    @staticmethod
     def imp_vol(self, sigma0, actual_price, iter=100):
-        # Todo: remove from here
         """
-        Obtém a raiz da função BS_price(sigma) - actual_price utilizando o método de newton, onde a a derivada em relação a volatilidade é o vega da opção
+        Obtém a raiz da função BS_price(sigma) - actual_price utilizando o método de Halley com bisseção de
+        segurança, partindo de sigma0
         """
-        option = BlackScholes(self.asset_price, self.strike, self.maturity_time, self.risk_free_factor, sigma0,
-                              self.tipo, self.time)
-        for i in range(iter):
-            option.sigma = option.sigma - (option.price() - actual_price) / option.vega()
-        return option.sigma
+        sigma, converged = implied_volatility(actual_price, self.asset_price, self.strike, self.maturity_time,
+                                              self.risk_free_factor, self.opt, self.time, initial_guess=sigma0,
+                                              max_iter=iter)
+        return float(sigma)
 
     def gmb_path(self, number_steps=100, seed=2, plot=False):
         np.random.seed(seed)
@@ -115,6 +113,7 @@ class BlackScholes:
             asset_price_vector[i] = self.asset_price * np.exp((self.risk_free_factor - 0.5 * self.sigma * self.sigma) *
                                                               ts[i - 1] + self.sigma * cumulative_step_vector[i])
         if plot:
+            import matplotlib.pyplot as plt
             plt.plot(ts, cumulative_step_vector)
             plt.show()
         return asset_price_vector, ts
@@ -160,6 +159,8 @@ class BlackScholes:
                 "total_shares": stocks,
                 "stock_price": path,
                 "delta_position": delta_position}
+        # pandas is optional and only loaded for the report
+        import pandas as pd
         df = pd.DataFrame(data=data)
         results = np.array(ds_list) @ path
         return results, df
@@ -209,6 +210,7 @@ class BlackScholes:
         buy_list = np.array(buy_list)
         sell_list = np.array(sell_list)
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(15, 6))
             plt.plot(ts, path)
             plt.plot(buy_list[:, 0], buy_list[:, 1], linestyle="None", marker="o", color="green", label="Buy")
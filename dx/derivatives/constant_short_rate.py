@@ -11,6 +11,18 @@ class ConstantShortRate:
         if short_rate < 0:
             raise ValueError('Short rate negative.')
 
+    def integrated_rates(self, times):
+        """ Return the short rate integrated over year fractions times from the pricing date."""
+        return self.short_rate * np.asarray(times, dtype=float)
+
+    def discount_factors(self, times):
+        """
+        Return discount factors for whole arrays of cash-flow times in one call
+        :param times: (array_like) year fractions from the pricing date
+        :return: (np.array) float discount factors of the shape of times
+        """
+        return np.exp(-self.integrated_rates(times))
+
     def get_discount_factors(self, date_list, datetime_objects=True):
         if datetime_objects is True:
             datetime_list = get_year_deltas(date_list)
@@ -0,0 +1,124 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import fingerprint
+from derivatives import sn_random_numbers
+from derivatives import SimulationClass
+from derivatives.instrumentation import timed, increment
+
+
+class CorrelatedGeometricBrownianMotion(SimulationClass):
+    """ Class to generate simulated paths of several correlated assets,
+    each following a Black-Scholes-Merton geometric Brownian motion.
+
+    mar_env provides initial_value and volatility per asset and the constant
+    'correlation_matrix' of the Brownian motions. All assets share one time
+    grid and one draw of standard normals, correlated by the Cholesky factor
+    of the correlation matrix, which is computed once per matrix. Paths are
+    returned as a single (assets, M, paths) array."""
+
+    def __init__(self, name, mar_env):
+        super(CorrelatedGeometricBrownianMotion, self).__init__(name, mar_env)
+        self.dtype = np.dtype(mar_env.get_constant('dtype', 'float64'))
+        self.asset_names = mar_env.get_list('asset_names')
+        self.initial_value = np.asarray(self.initial_value, dtype=float)
+        self.volatility = np.asarray(self.volatility, dtype=float)
+        self.cholesky = None
+        self.set_correlation_matrix(mar_env.get_constant('correlation_matrix'))
+
+    @property
+    def assets(self):
+        return self.initial_value.size
+
+    def set_correlation_matrix(self, correlation_matrix):
+        """ Validate the correlation matrix and cache its Cholesky factor."""
+        correlation_matrix = np.asarray(correlation_matrix, dtype=float)
+        if correlation_matrix.shape != (self.assets, self.assets) or self.volatility.shape != (self.assets,):
+            raise ValueError('Need one initial value, volatility and correlation matrix row per asset.')
+        if not np.allclose(correlation_matrix, correlation_matrix.T) or \
+                not np.allclose(np.diag(correlation_matrix), 1.):
+            raise ValueError('Correlation matrix must be symmetric with unit diagonal.')
+        try:
+            self.cholesky = np.linalg.cholesky(correlation_matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError('Correlation matrix must be positive definite.')
+        self.correlation_matrix = correlation_matrix
+
+    def update(self, initial_value=None, volatility=None, correlation_matrix=None, final_date=None):
+        if initial_value is not None:
+            self.initial_value = np.asarray(initial_value, dtype=float)
+        if volatility is not None:
+            self.volatility = np.asarray(volatility, dtype=float)
+        if correlation_matrix is not None:
+            self.set_correlation_matrix(correlation_matrix)
+        if final_date is not None:
+            self.final_date = final_date
+            self.grid = None
+            self.time_grid = None
+        if self.instrument_values is not None:
+            increment('invalidations')
+        self.instrument_values = None
+        self._fingerprint = None
+
+    def get_fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(super(CorrelatedGeometricBrownianMotion, self).get_fingerprint(),
+                                            self.correlation_matrix)
+        return self._fingerprint
+
+    def get_step_coefficients(self, day_count=None):
+        """
+        Return the per-step drift and diffusion of the log processes
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :return: (tuple) arrays of shape (assets, M - 1) with drift and diffusion per step
+        """
+        if self.time_grid is None:
+            self.generate_time_grid()
+        times = self.grid.get_year_fractions(day_count)
+        dt = np.diff(times)
+        rates = np.diff(self.discount_curve.integrated_rates(times))
+        drift = rates - 0.5 * self.volatility[:, np.newaxis] ** 2 * dt
+        diffusion = self.volatility[:, np.newaxis] * np.sqrt(dt)
+        return drift, diffusion
+
+    def simulate_paths(self, path_number, random_state, day_count=None, random_numbers=None):
+        """
+        Return simulated paths of all assets without storing them on the object
+        :param path_number: (int) number of paths
+        :param random_state: (np.random.Generator) generator to draw from
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :param random_numbers: (np.array) independent standard normals of shape (assets, M - 1, path_number)
+            used instead of drawing
+        :return: (np.array) array of shape (assets, M, path_number)
+        """
+        if self.time_grid is None:
+            self.generate_time_grid()
+        M = len(self.time_grid)
+        drift, diffusion = self.get_step_coefficients(day_count=day_count)
+        paths = np.empty((self.assets, M, path_number), dtype=self.dtype)
+        increment('simulations')
+        increment('path_bytes', paths.nbytes)
+        paths[:, 0] = 0.
+        with timed('rng'):
+            if random_numbers is None:
+                # one draw for all assets, steps and paths
+                random_numbers = np.empty((self.assets, M - 1, path_number), dtype=self.dtype)
+                sn_random_numbers(random_numbers.shape, random_state=random_state, out=random_numbers)
+        with timed('paths'):
+            cholesky = self.cholesky.astype(self.dtype)
+            # correlated across the asset axis step by step, avoiding a temporary of the paths' size
+            for step in range(M - 1):
+                np.matmul(cholesky, random_numbers[:, step], out=paths[:, step + 1])
+            paths[:, 1:] *= diffusion[:, :, np.newaxis].astype(self.dtype)
+            paths[:, 1:] += drift[:, :, np.newaxis].astype(self.dtype)
+            np.cumsum(paths, axis=1, out=paths)
+            np.exp(paths, out=paths)
+            paths *= self.initial_value[:, np.newaxis, np.newaxis].astype(self.dtype)
+        return paths
+
+    def generate_paths(self, fixed_seed=False, day_count=None):
+        if self.simulation_count:
+            increment('resimulations')
+        self.simulation_count += 1
+        self.instrument_values = self.simulate_paths(self.paths, self.get_random_state(fixed_seed),
+                                                     day_count=day_count)
+        self.fixed_seed_paths = fixed_seed
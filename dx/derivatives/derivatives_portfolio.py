@@ -0,0 +1,183 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import PathStatistics
+from derivatives import ValuationEuropeanMonteCarlo
+from derivatives.payoff_kernels import PAYOFF_KERNELS
+
+GREEKS = ('present_value', 'delta', 'gamma', 'vega')
+
+
+def _prefix_sums(values):
+    """ Return the cumulative sums of values with a leading zero."""
+    return np.concatenate(([0.], np.cumsum(values)))
+
+
+class DerivativesPosition:
+    """ Class to hold a position in a single derivative.
+
+    mar_env provides strike, maturity and currency as for ValuationClass and
+    optionally the barrier level of barrier options."""
+
+    def __init__(self, name, quantity, mar_env, payoff_func='call', option_type='European'):
+        self.name = name
+        self.quantity = quantity
+        self.mar_env = mar_env
+        self.payoff_func = payoff_func
+        self.option_type = option_type
+        self.barrier = mar_env.get_constant('barrier', None)
+
+
+class DerivativesPortfolio:
+    """ Class to value a book of derivatives on one GeometricBrownianMotion.
+
+    All maturities are merged into the time grid of the underlying, which is
+    simulated once for the whole book. Vanilla calls and puts are evaluated
+    for all strikes of a maturity at once from the sorted maturity values,
+    all other payoffs share the path functionals of their maturity."""
+
+    def __init__(self, name, underlying, positions=None):
+        self.name = name
+        self.underlying = underlying
+        self.positions = {}
+        self.valuations = {}
+        for position in positions or []:
+            self.add_position(position)
+
+    def add_position(self, position):
+        if position.name in self.positions:
+            raise ValueError(f"Position {position.name} already in portfolio.")
+        self.positions[position.name] = position
+        # the valuation object adds the maturity to the special dates of the underlying
+        self.valuations[position.name] = ValuationEuropeanMonteCarlo(
+            position.name, self.underlying, position.mar_env, position.payoff_func, position.option_type)
+
+    def _is_vanilla(self, name):
+        payoff = self.valuations[name].payoff
+        return payoff.option_type == 'European' and payoff.kernel in (PAYOFF_KERNELS['call'], PAYOFF_KERNELS['put'])
+
+    def align_time_grid(self):
+        """ Generate the time grid of the underlying if missing, maturities are merged on add_position."""
+        if self.underlying.grid is None:
+            self.underlying.generate_time_grid()
+
+    def _vanilla_values(self, stats, names, greeks):
+        """
+        Return per-position sums and sums of squares and per-path book samples of vanilla options
+        :param stats: (PathStatistics) functionals of the paths up to the common maturity
+        :param names: (list) names of the call and put positions of that maturity
+        :param greeks: (bool) also evaluate delta, gamma and vega
+        :return: (tuple) dict of (sums, sums of squares) per greek for names, dict of book samples per greek
+        """
+        underlying = self.underlying
+        initial_value, volatility = underlying.initial_value, underlying.volatility
+        values = np.asarray(stats.maturity_value, dtype=float)
+        # per-path samples of the pathwise estimators, all proportional to the exercise indicator
+        slopes = {'present_value': values}
+        if greeks:
+            drift, diffusion = underlying.get_step_coefficients()
+            time_index = stats.paths.shape[0] - 1
+            variance = np.sum(diffusion[:time_index] ** 2)
+            shocks = np.log(values / initial_value) - np.sum(drift[:time_index])
+            slopes['delta'] = values / initial_value
+            slopes['gamma'] = slopes['delta'] * (shocks / (initial_value * variance) - 1. / initial_value)
+            slopes['vega'] = values * (shocks - variance) / volatility
+        order = np.argsort(values)
+        sorted_values = values[order]
+        prefix = {key: (_prefix_sums(slope[order]), _prefix_sums(slope[order] ** 2)) for key, slope in slopes.items()}
+        strikes = np.array([self.valuations[name].strike for name in names], dtype=float)
+        is_call = np.array([self.valuations[name].payoff.kernel is PAYOFF_KERNELS['call'] for name in names])
+        # calls are exercised on paths above, puts on paths below the strike
+        index = np.where(is_call, np.searchsorted(sorted_values, strikes, side='right'),
+                         np.searchsorted(sorted_values, strikes, side='left'))
+        count = np.where(is_call, values.size - index, index)
+        sign = np.where(is_call, 1., -1.)
+        sums = {}
+        for key, (first, second) in prefix.items():
+            first = np.where(is_call, first[-1] - first[index], first[index])
+            second = np.where(is_call, second[-1] - second[index], second[index])
+            if key == 'present_value':
+                # sum of (S - K) and (S - K) ** 2 over the exercised paths
+                sums[key] = (sign * (first - strikes * count),
+                             second - 2. * strikes * first + strikes ** 2 * count)
+            else:
+                sums[key] = (sign * first, second)
+        # book samples per path, summed over the strikes below (calls) and above (puts) each path
+        quantities = np.array([self.positions[name].quantity for name in names], dtype=float)
+        book = {key: np.zeros(values.size) for key in slopes}
+        for selection, side in ((is_call, 'left'), (~is_call, 'right')):
+            if not np.any(selection):
+                continue
+            strike_order = np.argsort(strikes[selection])
+            sorted_strikes = strikes[selection][strike_order]
+            quantity = _prefix_sums(quantities[selection][strike_order])
+            weighted_strike = _prefix_sums((quantities[selection] * strikes[selection])[strike_order])
+            index = np.searchsorted(sorted_strikes, values, side=side)
+            if side == 'left':
+                exercised, exercised_strike, sign = quantity[index], weighted_strike[index], 1.
+            else:
+                exercised, exercised_strike, sign = quantity[-1] - quantity[index], \
+                                                    weighted_strike[-1] - weighted_strike[index], -1.
+            for key, slope in slopes.items():
+                book[key] += sign * slope * exercised
+            book['present_value'] -= sign * exercised_strike
+        return sums, book
+
+    def get_values(self, fixed_seed=True, greeks=True):
+        """
+        Return the values (and greeks) of all positions and of the whole book from one simulation
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param greeks: (bool) also estimate delta, gamma and vega, pathwise where possible
+        :return: (tuple) dict of {greek: (estimate, standard error)} per position name, including
+            the quantity, and the same dict for the whole book
+        """
+        self.align_time_grid()
+        underlying = self.underlying
+        paths = underlying.get_instrument_values(fixed_seed=fixed_seed)
+        path_number = paths.shape[1]
+        keys = GREEKS if greeks else GREEKS[:1]
+        by_maturity = {}
+        for name, valuation in self.valuations.items():
+            by_maturity.setdefault(valuation.maturity, []).append(name)
+
+        def estimate(first, second):
+            # mean and standard error from the sums of the samples and of their squares
+            variance = np.maximum(second - first ** 2 / path_number, 0.) / (path_number - 1)
+            return first / path_number, np.sqrt(variance / path_number)
+
+        results = {}
+        book = {key: np.zeros(path_number) for key in keys}
+        time_indices = [underlying.grid.get_index(maturity) for maturity in by_maturity]
+        # all maturities discounted in one call
+        discount_factors = underlying.discount_curve.discount_factors(underlying.grid.year_fractions[time_indices])
+        for (maturity, names), time_index, discount_factor in zip(by_maturity.items(), time_indices,
+                                                                 discount_factors):
+            stats = PathStatistics(paths, time_index)
+            vanilla = [name for name in names if self._is_vanilla(name)]
+            if vanilla:
+                sums, samples = self._vanilla_values(stats, vanilla, greeks)
+                for key in keys:
+                    book[key] += discount_factor * samples[key]
+                for number, name in enumerate(vanilla):
+                    scale = discount_factor * self.positions[name].quantity
+                    results[name] = {}
+                    for key in keys:
+                        value, std_error = estimate(sums[key][0][number], sums[key][1][number])
+                        results[name][key] = (scale * value, abs(scale) * std_error)
+            for name in names:
+                if name in results:
+                    continue
+                valuation, position = self.valuations[name], self.positions[name]
+                if greeks:
+                    samples = valuation.greek_samples(stats, position.barrier)
+                else:
+                    samples = {'present_value': np.asarray(
+                        valuation.payoff(stats, valuation.strike, position.barrier), dtype=float)}
+                results[name] = {}
+                for key in keys:
+                    values = discount_factor * position.quantity * samples[key]
+                    book[key] += values
+                    results[name][key] = estimate(np.sum(values), np.sum(values ** 2))
+        # keep the order in which positions were added
+        results = {name: results[name] for name in self.positions}
+        portfolio = {key: estimate(np.sum(book[key]), np.sum(book[key] ** 2)) for key in keys}
+        return results, portfolio
@@ -0,0 +1,109 @@
+# using usr/bin/python3
+import datetime as dt
+import hashlib
+import inspect
+import types
+
+import numpy as np
+
+
+# globals a function reads that are part of its fingerprint, modules and classes are not
+_GLOBAL_TYPES = (bool, int, float, complex, str, np.generic, np.ndarray, tuple, types.FunctionType)
+
+
+def _code_names(code):
+    """ Return the global names read by code and the code objects nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _cell_contents(cell):
+    try:
+        return 'cell', cell.cell_contents
+    except ValueError:
+        # a variable of the enclosing function that is not assigned yet
+        return 'empty cell',
+
+
+def _update_routine(digest, obj, active):
+    """ Feed a function by its name, code, defaults, closure and the plain globals it reads."""
+    digest.update(f"routine:{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)!r};".encode())
+    if inspect.ismethod(obj):
+        # the object may be the one being fed, e.g. Payoff._evaluate, see the cycle check of _update
+        _update(digest, (obj.__func__, obj.__self__), active)
+        return
+    code = getattr(obj, '__code__', None)
+    if code is None:
+        # builtins and ufuncs are fixed by their name
+        return
+    cells = [_cell_contents(cell) for cell in obj.__closure__ or ()]
+    namespace = getattr(obj, '__globals__', {})
+    referenced = {name: namespace[name] for name in _code_names(code)
+                  if name in namespace and isinstance(namespace[name], _GLOBAL_TYPES)}
+    _update(digest, (code, obj.__defaults__, obj.__kwdefaults__, cells, referenced), active)
+
+
+def _update(digest, obj, active=frozenset()):
+    """ Feed a canonical byte representation of obj into digest.
+    active holds the ids of the objects being fed, to stop on reference cycles."""
+    if id(obj) in active:
+        digest.update(b"cycle;")
+        return
+    if obj is None or isinstance(obj, (bool, int, float, str, np.generic)):
+        digest.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, bytes):
+        digest.update(f"bytes:{len(obj)};".encode())
+        digest.update(obj)
+    elif isinstance(obj, (dt.datetime, dt.date)):
+        digest.update(f"datetime:{obj.isoformat()};".encode())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            _update(digest, obj.tolist(), active)
+        else:
+            digest.update(f"ndarray:{obj.dtype.str}:{obj.shape};".encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b"dict{")
+        for key in sorted(obj, key=repr):
+            _update(digest, key, active)
+            _update(digest, obj[key], active)
+        digest.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}[".encode())
+        for item in obj:
+            _update(digest, item, active)
+        digest.update(b"]")
+    elif isinstance(obj, np.random.SeedSequence):
+        _update(digest, ('SeedSequence', obj.entropy, obj.spawn_key, obj.pool_size))
+    elif isinstance(obj, np.dtype):
+        _update(digest, ('dtype', obj.str))
+    elif isinstance(obj, types.CodeType):
+        # bytecode and constants, nested functions included, but not names or line numbers
+        _update(digest, ('code', obj.co_code, obj.co_consts, obj.co_names), active)
+    elif inspect.isroutine(obj) or isinstance(obj, np.ufunc):
+        _update_routine(digest, obj, active | {id(obj)})
+    elif hasattr(obj, '__dict__'):
+        # curves and other plain value objects, by class and public attributes
+        digest.update(f"{type(obj).__module__}.{type(obj).__qualname__}(".encode())
+        _update(digest, {key: value for key, value in vars(obj).items() if not key.startswith('_')},
+                active | {id(obj)})
+        digest.update(b")")
+    else:
+        raise TypeError(f"Can't fingerprint object of type {type(obj).__name__}.")
+
+
+def fingerprint(*objects):
+    """
+    Return a deterministic content hash of the given objects
+    :param objects: numbers, strings, dates, arrays, containers, plain objects such as
+        MarketEnvironment or ConstantShortRate and functions, by their code, defaults,
+        closure and the plain globals they read
+    :return: (str) hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        _update(digest, obj)
+    return digest.hexdigest()
@@ -1,8 +1,11 @@
 # using usr/bin/python3
 import numpy as np
 from derivatives import sn_random_numbers
+from derivatives import BrownianBridge
+from derivatives import sobol_random_numbers
 from derivatives import SimulationClass
-import matplotlib.pyplot as plt
+from derivatives.instrumentation import timed, increment
+from derivatives.payoff_kernels import AccumulatedStatistics
 
 
 class GeometricBrownianMotion(SimulationClass):
@@ -11,6 +14,8 @@ class GeometricBrownianMotion(SimulationClass):
 
     def __init__(self, name, mar_env):
         super(GeometricBrownianMotion, self).__init__(name, mar_env)
+        # floating point precision of the simulated paths ('float64' or 'float32')
+        self.dtype = np.dtype(mar_env.get_constant('dtype', 'float64'))
 
     def update(self, initial_value=None, volatility=None, final_date=None):
         if initial_value is not None:
@@ -19,37 +24,137 @@ class GeometricBrownianMotion(SimulationClass):
             self.volatility = volatility
         if final_date is not None:
             self.final_date = final_date
+            # regenerated up to the new final date on the next simulation
+            self.grid = None
+            self.time_grid = None
+        if self.instrument_values is not None:
+            # paths are resimulated on the next valuation
+            increment('invalidations')
         self.instrument_values = None
+        # inputs changed, cached valuations of the old state no longer match
+        self._fingerprint = None
 
-    def generate_paths(self, fixed_seed=False, day_count=365.):
+    def get_step_coefficients(self, day_count=None):
+        """
+        Return the per-step drift and diffusion of the log process
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :return: (tuple) arrays of length M - 1 with drift and diffusion per step
+        """
+        if self.time_grid is None:
+            self.generate_time_grid()
+        # difference between two dates as year fraction
+        times = self.grid.get_year_fractions(day_count)
+        dt = np.diff(times)
+        # short rate integrated over each step, time-dependent for interpolated curves
+        rates = np.diff(self.discount_curve.integrated_rates(times))
+        drift = rates - 0.5 * self.volatility ** 2 * dt
+        diffusion = self.volatility * np.sqrt(dt)
+        return drift, diffusion
+
+    def simulate_paths(self, path_number, random_state, day_count=None, random_numbers=None, moment_matching=True):
+        """
+        Return simulated paths without storing them on the object
+        :param path_number: (int) number of paths
+        :param random_state: (np.random.Generator) generator to draw from
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :param random_numbers: (np.array) standard normals of shape (M - 1, path_number) used instead of drawing
+        :param moment_matching: (bool) moment match the drawn normals, False keeps antithetic pairs independent
+        :return: (np.array) array of shape (M, path_number)
+        """
         if self.time_grid is None:
             # method from generic simulation class
             self.generate_time_grid()
-        # number of dates for time grid    
+        # number of dates for time grid
         M = len(self.time_grid)
-        # number of paths
-        path_number = self.paths
-        # array initialization for path simulation
-        paths = np.zeros((M, path_number))
-        # initialize first date with initial_value
-        paths[0] = self.initial_value
-        # generate random numbers
-        random_dist = sn_random_numbers((1, M, path_number), fixed_seed=fixed_seed)
-        short_rate = self.discount_curve.short_rate
-        # get short rate for drift of process
-        # TODO : To be vectorized
-        for t in range(1, len(self.time_grid)):
-            # random number set
-            random_dist_step = random_dist[t]
-            dt = (self.time_grid[t] - self.time_grid[t - 1]).days / day_count
-            # difference between two dates as year fraction
-            paths[t] = paths[t - 1] * np.exp((short_rate - 0.5
-                                              * self.volatility ** 2) * dt
-                                             + self.volatility * np.sqrt(dt) * random_dist_step)
-            # generate simulated values for the respective date
-        self.instrument_values = paths
+        drift, diffusion = self.get_step_coefficients(day_count=day_count)
+        paths = np.empty((M, path_number), dtype=self.dtype)
+        increment('simulations')
+        increment('path_bytes', paths.nbytes)
+        paths[0] = 0.
+        with timed('rng'):
+            if random_numbers is None:
+                # random numbers are drawn straight into the preallocated paths buffer
+                sn_random_numbers((1, M - 1, path_number), moment_matching=moment_matching,
+                                  random_state=random_state, out=paths[np.newaxis, 1:])
+            else:
+                paths[1:] = random_numbers
+        with timed('paths'):
+            # log-increments from the standard normal draws
+            paths[1:] *= diffusion[:, np.newaxis].astype(self.dtype)
+            paths[1:] += drift[:, np.newaxis].astype(self.dtype)
+            # cumulative log-returns, exponentiated once for the whole matrix
+            np.cumsum(paths, axis=0, out=paths)
+            np.exp(paths, out=paths)
+            paths *= self.initial_value
+        return paths
+
+    def quasi_random_numbers(self, path_number, random_state=None, day_count=None):
+        """
+        Return scrambled Sobol normals turned into Brownian increments by a Brownian bridge
+        :param path_number: (int) number of paths, best a power of 2
+        :param random_state: (np.random.Generator) generator for the scrambling
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :return: (np.array) standard normal increments of shape (M - 1, path_number)
+        """
+        if self.time_grid is None:
+            self.generate_time_grid()
+        with timed('rng'):
+            bridge = BrownianBridge(self.grid.get_year_fractions(day_count))
+            return bridge.increments(sobol_random_numbers(len(self.time_grid) - 1, path_number, random_state))
+
+    def simulate_statistics(self, path_number, random_state, functionals, time_index=None, day_count=None):
+        """
+        Return path functionals accumulated while stepping through the time grid, never storing the paths
+        Normals are drawn (and moment matched) one date at a time, so the
+        paths differ from those of simulate_paths on the same generator.
+        :param path_number: (int) number of paths
+        :param random_state: (np.random.Generator) generator to draw from
+        :param functionals: (tuple) names of the path functionals to accumulate
+        :param time_index: (int) last date simulated, the end of the time grid if None
+        :param day_count: (float) number of days in year, day-count convention of the time grid if None
+        :return: (AccumulatedStatistics) functionals of the paths up to time_index
+        """
+        if self.time_grid is None:
+            self.generate_time_grid()
+        if time_index is None:
+            time_index = len(self.time_grid) - 1
+        drift, diffusion = self.get_step_coefficients(day_count=day_count)
+        stats = AccumulatedStatistics(functionals, np.full(path_number, self.initial_value, dtype=self.dtype))
+        log_values = np.full(path_number, np.log(self.initial_value), dtype=self.dtype)
+        # buffers of one date, reused on every step
+        random_numbers = np.empty((1, 1, path_number), dtype=self.dtype)
+        values = np.empty(path_number, dtype=self.dtype)
+        increment('simulations')
+        for step in range(time_index):
+            with timed('rng'):
+                sn_random_numbers(random_numbers.shape, random_state=random_state, out=random_numbers)
+            with timed('paths'):
+                random_numbers *= diffusion[step]
+                random_numbers += drift[step]
+                log_values += random_numbers[0, 0]
+                stats.update(np.exp(log_values, out=values), log_values)
+        increment('path_bytes', stats.nbytes)
+        return stats
+
+    def generate_statistics(self, functionals, time_index=None, fixed_seed=False, day_count=None):
+        """ Return the accumulated functionals of self.paths paths, see simulate_statistics."""
+        if self.simulation_count:
+            increment('resimulations')
+        self.simulation_count += 1
+        return self.simulate_statistics(self.paths, self.get_random_state(fixed_seed), functionals, time_index,
+                                        day_count=day_count)
+
+    def generate_paths(self, fixed_seed=False, day_count=None):
+        if self.simulation_count:
+            increment('resimulations')
+        self.simulation_count += 1
+        self.instrument_values = self.simulate_paths(self.paths, self.get_random_state(fixed_seed),
+                                                     day_count=day_count)
+        self.fixed_seed_paths = fixed_seed
 
     def plot(self, path_model):
+        # matplotlib is optional and only loaded for plotting
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(10, 6))
         model1 = plt.plot(self.time_grid, path_model[0][:, :30], label='Low Volatility', color='r',
                           linestyle='--', linewidth=1)
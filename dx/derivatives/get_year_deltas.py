@@ -5,11 +5,10 @@ import numpy as np
 def get_year_deltas(date_list, day_count=365.):
     """
     Return vector of floats with day deltas in years
-    :param date_list: (list) datetime objects
+    :param date_list: (list) datetime objects or datetime64 array
     :param day_count: (float) number of days in year
     :return: (np.array) array with fraction of year
     """
-    start = date_list[0]
-    delta_list = [(date - start).days / day_count
-                  for date in date_list]
-    return np.array(delta_list)
+    dates = np.asarray(date_list, dtype='datetime64[us]')
+    # whole days from the first date, floored as timedelta.days
+    return ((dates - dates[0]) // np.timedelta64(1, 'D')).astype(float) / day_count
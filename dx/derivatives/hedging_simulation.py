@@ -0,0 +1,158 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import BlackScholesChain
+from derivatives import norm_cdf
+from derivatives.black_scholes_chain import option_sign
+
+
+class HedgingResult:
+    """ Class to hold the hedge positions, cash accounts and P&L of a hedging simulation.
+
+    shares and cash are (paths, steps) arrays after rebalancing on each date,
+    pnl is the final profit of the short option position and its hedge."""
+
+    def __init__(self, shares, cash, pnl, trades, costs, premium):
+        self.shares = shares
+        self.cash = cash
+        self.pnl = pnl
+        self.trades = trades
+        self.costs = costs
+        self.premium = premium
+
+    def statistics(self, quantiles=(0.01, 0.05, 0.5, 0.95, 0.99)):
+        """
+        Return summary statistics of the P&L distribution
+        :param quantiles: (tuple) levels of the reported P&L quantiles
+        :return: (dict) mean, std, quantiles, mean number of trades and mean transaction costs
+        """
+        return {'mean': np.mean(self.pnl), 'std': np.std(self.pnl, ddof=1),
+                'quantiles': dict(zip(quantiles, np.quantile(self.pnl, quantiles))),
+                'trades': np.mean(self.trades), 'costs': np.mean(self.costs),
+                # hedge effectiveness relative to the premium received
+                'relative_std': np.std(self.pnl, ddof=1) / np.mean(self.premium)}
+
+    def __repr__(self):
+        return f"HedgingResult(paths={self.pnl.size}, mean={np.mean(self.pnl):.6f}, std={np.std(self.pnl):.6f})"
+
+
+class HedgingSimulation:
+    """ Class to backtest hedging strategies of a short European option on many paths at once.
+
+    paths is a (paths, steps) matrix of prices of the underlying on the dates
+    times (in years from the pricing date). Every strategy loops over the dates
+    only, positions and greeks of all paths are updated together. The cash
+    account accrues at risk_free_factor between dates and pays transaction_cost
+    per unit of traded value. If the last date lies before maturity the option
+    is marked to its Black-Scholes value instead of settled."""
+
+    def __init__(self, paths, times, strike, maturity_time, risk_free_factor, sigma, option_type='eurocall',
+                 quantity=1.):
+        self.paths = np.atleast_2d(np.asarray(paths, dtype=float))
+        self.times = np.asarray(times, dtype=float)
+        # one contiguous row per date, strategies step through the dates
+        self.values = np.ascontiguousarray(self.paths.T)
+        if self.paths.shape[1] != self.times.size:
+            raise ValueError('paths need one column per date in times.')
+        if self.times[-1] > maturity_time:
+            raise ValueError('Dates after maturity can not be hedged.')
+        self.strike = strike
+        self.maturity_time = maturity_time
+        self.risk_free_factor = risk_free_factor
+        self.sigma = sigma
+        self.option_type = option_type
+        self.sign = float(option_sign(option_type))
+        self.quantity = quantity
+
+    def chain(self, step):
+        """ Return the Black-Scholes chain of all paths on date step."""
+        return BlackScholesChain(self.values[step], self.strike, self.maturity_time, self.risk_free_factor,
+                                 self.sigma, self.option_type, self.times[step])
+
+    def delta(self, step):
+        """ Return the Black-Scholes delta of all paths on date step, without the other greeks."""
+        tau = self.maturity_time - self.times[step]
+        d1 = (np.log(self.values[step] / self.strike) + (self.risk_free_factor + 0.5 * self.sigma ** 2) * tau) / \
+            (self.sigma * np.sqrt(tau))
+        return self.sign * norm_cdf(self.sign * d1)
+
+    def _settle(self, shares, cash, trades, costs, premium):
+        """ Return the result after closing the option position on the last date."""
+        final = self.values[-1]
+        if self.times[-1] < self.maturity_time:
+            liability = self.chain(-1).price
+        else:
+            liability = np.maximum(self.sign * (final - self.strike), 0.)
+        pnl = cash[-1] + shares[-1] * final - self.quantity * liability
+        return HedgingResult(shares.T, cash.T, pnl, trades, costs, premium)
+
+    def _trade(self, step, held, target, cash, trades, costs, transaction_cost):
+        """ Move the holdings of all paths to target on date step, paying for the trades from cash."""
+        traded = target - held
+        cost = transaction_cost * np.abs(traded) * self.values[step]
+        cash -= traded * self.values[step] + cost
+        trades += traded != 0.
+        costs += cost
+        return target
+
+    def delta_hedge(self, delta_band=0., transaction_cost=0.):
+        """
+        Delta hedge a short option position
+        :param delta_band: (float) rebalance only when the hedge deviates from the target delta
+            by more than delta_band shares per option
+        :param transaction_cost: (float) proportional cost per unit of traded value
+        :return: (HedgingResult) hedge positions, cash accounts and P&L of all paths
+        """
+        number, steps = self.paths.shape
+        shares = np.zeros((steps, number))
+        cash = np.zeros((steps, number))
+        trades = np.zeros(number)
+        costs = np.zeros(number)
+        premium = self.quantity * self.chain(0).price
+        account = premium.copy()
+        held = np.zeros(number)
+        growth = np.exp(self.risk_free_factor * np.diff(self.times))
+        for step in range(steps):
+            if step > 0:
+                account *= growth[step - 1]
+            if self.times[step] < self.maturity_time and step < steps - 1:
+                target = self.quantity * self.delta(step)
+                rebalance = np.abs(target - held) > delta_band * abs(self.quantity) if step > 0 else \
+                    np.ones(number, dtype=bool)
+                held = self._trade(step, held, np.where(rebalance, target, held), account, trades, costs,
+                                   transaction_cost)
+            shares[step] = held
+            cash[step] = account
+        return self._settle(shares, cash, trades, costs, premium)
+
+    def stop_loss(self, margin=0., transaction_cost=0.):
+        """
+        Stop-loss hedge a short option position: hold the underlying (short it for puts)
+        while the option is in the money and close the hedge once it is out of the money
+        :param margin: (float) safety margin in percent of the strike around the strike
+        :param transaction_cost: (float) proportional cost per unit of traded value
+        :return: (HedgingResult) hedge positions, cash accounts and P&L of all paths
+        """
+        number, steps = self.paths.shape
+        shares = np.zeros((steps, number))
+        cash = np.zeros((steps, number))
+        trades = np.zeros(number)
+        costs = np.zeros(number)
+        premium = self.quantity * self.chain(0).price
+        account = premium.copy()
+        held = np.zeros(number)
+        growth = np.exp(self.risk_free_factor * np.diff(self.times))
+        upper, lower = (1. + margin / 100.) * self.strike, (1. - margin / 100.) * self.strike
+        full = self.sign * self.quantity
+        for step in range(steps):
+            if step > 0:
+                account *= growth[step - 1]
+            if step < steps - 1:
+                price = self.values[step]
+                # calls are covered above the upper level, puts below the lower level
+                enter = (price > upper) if self.sign > 0 else (price < lower)
+                leave = (price < lower) if self.sign > 0 else (price > upper)
+                target = np.where(enter & (held == 0.), full, np.where(leave & (held != 0.), 0., held))
+                held = self._trade(step, held, target, account, trades, costs, transaction_cost)
+            shares[step] = held
+            cash[step] = account
+        return self._settle(shares, cash, trades, costs, premium)
@@ -0,0 +1,116 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import BlackScholesChain
+from derivatives.black_scholes_chain import option_sign
+
+
+def initial_volatility(option_price, asset_price, strike, maturity_time, risk_free_factor, option_type='eurocall',
+                       time=0.):
+    """
+    Return the Corrado-Miller approximation of the implied volatility
+    :param option_price: (array_like) quoted option prices
+    :param asset_price: (array_like) prices of the underlying
+    :param strike: (array_like) strikes
+    :param maturity_time: (array_like) maturities in years
+    :param risk_free_factor: (array_like) continuously compounded short rates
+    :param option_type: (array_like) 'eurocall'/'europut' labels or booleans (True for calls)
+    :param time: (array_like) valuation times in years
+    :return: (np.array) volatility guesses, Brenner-Subrahmanyam where Corrado-Miller is not defined
+    """
+    tau = np.asarray(maturity_time, dtype=float) - time
+    asset_price = np.asarray(asset_price, dtype=float)
+    discounted_strike = strike * np.exp(-np.asarray(risk_free_factor, dtype=float) * tau)
+    # put prices are mapped to call prices by put-call parity
+    call_price = option_price + (option_sign(option_type) < 0) * (asset_price - discounted_strike)
+    moneyness = asset_price - discounted_strike
+    centered = call_price - 0.5 * moneyness
+    discriminant = np.maximum(centered ** 2 - moneyness ** 2 / np.pi, 0.)
+    sigma = np.sqrt(2. * np.pi / tau) / (asset_price + discounted_strike) * (centered + np.sqrt(discriminant))
+    fallback = np.sqrt(2. * np.pi / tau) * call_price / asset_price
+    return np.where(np.isfinite(sigma) & (sigma > 0.), sigma, fallback)
+
+
+def implied_volatility(option_price, asset_price, strike, maturity_time, risk_free_factor, option_type='eurocall',
+                       time=0., initial_guess=None, tol=1e-10, sigma_tol=1e-8, max_iter=50,
+                       sigma_bounds=(1e-6, 10.)):
+    """
+    Return Black-Scholes implied volatilities for whole arrays of quotes
+
+    Starts from the Corrado-Miller approximation and iterates safeguarded
+    Halley steps. Every element keeps a bracket [low, high] around its root,
+    steps leaving the bracket fall back to bisection, and converged elements
+    drop out of the iteration. An element converges once its price error is
+    within tol and its next step (error / vega) within sigma_tol, or once its
+    bracket is narrower than sigma_tol; quotes whose price barely depends on
+    the volatility (deep in or out of the money) may not converge at all.
+    :param option_price: (array_like) quoted option prices
+    :param asset_price: (array_like) prices of the underlying
+    :param strike: (array_like) strikes
+    :param maturity_time: (array_like) maturities in years
+    :param risk_free_factor: (array_like) continuously compounded short rates
+    :param option_type: (array_like) 'eurocall'/'europut' labels or booleans (True for calls)
+    :param time: (array_like) valuation times in years
+    :param initial_guess: (array_like) starting volatilities, Corrado-Miller if None
+    :param tol: (float) absolute tolerance on the price error
+    :param sigma_tol: (float) absolute tolerance on the volatility
+    :param max_iter: (int) maximum number of iterations
+    :param sigma_bounds: (tuple) lowest and highest admissible volatility
+    :return: (tuple) implied volatilities (nan for quotes outside the no-arbitrage bounds)
+        and boolean array flagging the elements that converged
+    """
+    option_price, asset_price, strike, maturity_time, risk_free_factor, time = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in
+          (option_price, asset_price, strike, maturity_time, risk_free_factor, time)])
+    sign = np.broadcast_to(option_sign(option_type), option_price.shape)
+    shape = option_price.shape
+    option_price, asset_price, strike, maturity_time, risk_free_factor, time, sign = \
+        [value.ravel() for value in (option_price, asset_price, strike, maturity_time, risk_free_factor, time, sign)]
+
+    def model(index, sigma):
+        return BlackScholesChain(asset_price[index], strike[index], maturity_time[index], risk_free_factor[index],
+                                 sigma, sign[index] > 0, time[index])
+
+    low = np.full(option_price.shape, sigma_bounds[0])
+    high = np.full(option_price.shape, sigma_bounds[1])
+    all_index = np.arange(option_price.size)
+    # quotes must lie strictly between the prices at the volatility bounds
+    valid = ((maturity_time - time) > 0.) & (option_price > model(all_index, low).price) & \
+            (option_price < model(all_index, high).price)
+    if initial_guess is None:
+        sigma = initial_volatility(option_price, asset_price, strike, maturity_time, risk_free_factor,
+                                   sign > 0, time)
+    else:
+        sigma = np.array(np.broadcast_to(np.asarray(initial_guess, dtype=float), shape), dtype=float).ravel()
+    sigma = np.where(np.isfinite(sigma), np.clip(sigma, low, high), 0.5 * (low + high))
+    converged = np.zeros(option_price.shape, dtype=bool)
+    active = np.flatnonzero(valid)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        chain = model(active, sigma[active])
+        error = chain.price - option_price[active]
+        vega = chain.vega
+        # a small price error alone doesn't pin down the volatility where vega is tiny: the volatility
+        # is only resolved if a change of sigma_tol moves the price beyond its rounding error
+        resolved = sigma_tol * vega > 8. * np.finfo(float).eps * (asset_price[active] + strike[active])
+        small = np.abs(error) <= tol
+        hit = resolved & ((small & (np.abs(error) <= sigma_tol * vega)) | (high[active] - low[active] <= sigma_tol))
+        converged[active[hit]] = True
+        # unresolved quotes within the price tolerance drop out, not converged
+        done = hit | (small & ~resolved)
+        # shrink the brackets around the root
+        above = error > 0.
+        high[active] = np.where(above, sigma[active], high[active])
+        low[active] = np.where(above, low[active], sigma[active])
+        # Halley step, volga = vega * d1 * d2 / sigma
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = error / vega
+            correction = 1. - 0.5 * newton * chain.d1 * chain.d2 / sigma[active]
+            step = np.where(correction > 0.5, newton / correction, newton)
+            candidate = sigma[active] - step
+        inside = np.isfinite(candidate) & (candidate > low[active]) & (candidate < high[active])
+        sigma[active] = np.where(done, sigma[active],
+                                 np.where(inside, candidate, 0.5 * (low[active] + high[active])))
+        active = active[~done]
+    sigma[~valid] = np.nan
+    return sigma.reshape(shape), converged.reshape(shape)
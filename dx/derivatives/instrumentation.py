@@ -0,0 +1,111 @@
+# using usr/bin/python3
+import time
+from collections import defaultdict
+
+# collectors receiving events, instrumentation is off while empty
+_collectors = []
+
+
+class Instrumentation:
+    """ Class to collect per-stage timings and counters of simulations and valuations.
+
+    Stages are 'time_grid', 'rng', 'paths', 'payoff', 'discount' and
+    'regression' (least-squares Monte Carlo); counters
+    are 'simulations', 'resimulations' (simulations of an underlying that
+    simulated before), 'invalidations' (paths discarded by update()),
+    'path_bytes' (bytes allocated for path arrays), 'valuations' and
+    'cache_hits'. callback, if given, is called with (name, value) on every
+    timing and count as it happens."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def add_time(self, stage, seconds):
+        self.timings[stage] += seconds
+        self.calls[stage] += 1
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    def add_count(self, counter, value=1):
+        self.counters[counter] += value
+        if self.callback is not None:
+            self.callback(counter, value)
+
+    def __enter__(self):
+        _collectors.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _collectors.remove(self)
+
+    def report(self):
+        """
+        Return the collected figures
+        :return: (dict) 'timings' (seconds per stage), 'calls' (per stage) and 'counters'
+        """
+        return {'timings': dict(self.timings), 'calls': dict(self.calls), 'counters': dict(self.counters)}
+
+    def __repr__(self):
+        stages = ', '.join(f"{stage}={seconds:.6f}s" for stage, seconds in self.timings.items())
+        counters = ', '.join(f"{counter}={value}" for counter, value in self.counters.items())
+        return f"Instrumentation({stages}; {counters})"
+
+
+def instrument(callback=None):
+    """
+    Return a collector that records all stages and counters while used as a context manager
+
+        with instrument() as stats:
+            valuation.present_value()
+        stats.report()
+
+    :param callback: (callable) called with (name, value) for every event
+    :return: (Instrumentation) collector
+    """
+    return Instrumentation(callback)
+
+
+class _Stage:
+    """ Context manager timing one stage for all active collectors."""
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        for collector in _collectors:
+            collector.add_time(self.stage, seconds)
+
+
+class _NoStage:
+    """ Context manager doing nothing, used while no collector is active."""
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def timed(stage):
+    """ Return a context manager timing stage, a shared no-op while instrumentation is off."""
+    if not _collectors:
+        return _NO_STAGE
+    return _Stage(stage)
+
+
+def increment(counter, value=1):
+    """ Add value to counter of all active collectors."""
+    for collector in _collectors:
+        collector.add_count(counter, value)
@@ -0,0 +1,79 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import get_year_deltas
+
+
+class InterpolatedCurve:
+    """ Base class of discount curves interpolated between knots.
+
+    Knots are year fractions from the pricing date with the integrated short
+    rate (minus the log discount factor) up to each of them, computed once.
+    Between knots the integrated rate is linear, i.e. forward rates are flat
+    and log discount factors linear; beyond the last knot the last forward
+    rate is extended."""
+
+    def __init__(self, name, knot_times, knot_integrals):
+        self.name = name
+        knot_times = np.asarray(knot_times, dtype=float)
+        knot_integrals = np.asarray(knot_integrals, dtype=float)
+        if knot_times.ndim != 1 or knot_times.shape != knot_integrals.shape:
+            raise ValueError('Knot times and values need the same one-dimensional shape.')
+        if np.any(knot_times <= 0.) or np.any(np.diff(knot_times) <= 0.):
+            raise ValueError('Knot times must be positive and increasing.')
+        # the curve starts at the pricing date with discount factor one
+        self.knot_times = np.concatenate(([0.], knot_times))
+        self.knot_integrals = np.concatenate(([0.], knot_integrals))
+        self.forward_rates = np.diff(self.knot_integrals) / np.diff(self.knot_times)
+
+    def integrated_rates(self, times):
+        """
+        Return the short rate integrated from the pricing date
+        :param times: (array_like) year fractions from the pricing date
+        :return: (np.array) -log of the discount factors
+        """
+        times = np.asarray(times, dtype=float)
+        integrals = np.interp(times, self.knot_times, self.knot_integrals)
+        beyond = times > self.knot_times[-1]
+        if np.any(beyond):
+            integrals = np.where(beyond, self.knot_integrals[-1] + self.forward_rates[-1] *
+                                 (times - self.knot_times[-1]), integrals)
+        return integrals
+
+    def discount_factors(self, times):
+        """
+        Return discount factors for whole arrays of cash-flow times in one call
+        :param times: (array_like) year fractions from the pricing date
+        :return: (np.array) float discount factors of the shape of times
+        """
+        return np.exp(-self.integrated_rates(times))
+
+    def get_discount_factors(self, date_list, datetime_objects=True):
+        """ Return (date, factor) pairs discounting from the last date to each date, as ConstantShortRate."""
+        if datetime_objects is True:
+            times = get_year_deltas(date_list)
+        else:
+            times = np.array(date_list)
+        integrals = self.integrated_rates(times)
+        disc_factor_list = np.exp(integrals - integrals[-1])
+        return np.array((date_list, disc_factor_list)).T
+
+
+class FlatForwardCurve(InterpolatedCurve):
+    """ Class to generate a discount curve from piecewise flat forward rates.
+    forward_rates[i] applies up to times[i], from times[i - 1] (or the pricing date)."""
+
+    def __init__(self, name, times, forward_rates):
+        times = np.asarray(times, dtype=float)
+        forward_rates = np.broadcast_to(np.asarray(forward_rates, dtype=float), times.shape)
+        super(FlatForwardCurve, self).__init__(name, times, np.cumsum(forward_rates * np.diff(times, prepend=0.)))
+
+
+class LogLinearCurve(InterpolatedCurve):
+    """ Class to generate a discount curve from discount factors at the knot times,
+    interpolated linearly in their logarithm."""
+
+    def __init__(self, name, times, discount_factors):
+        discount_factors = np.asarray(discount_factors, dtype=float)
+        if np.any(discount_factors <= 0.):
+            raise ValueError('Discount factors must be positive.')
+        super(LogLinearCurve, self).__init__(name, times, -np.log(discount_factors))
@@ -1,5 +1,9 @@
 # using usr/bin/python3
 
+# marks constants without default value
+_REQUIRED = object()
+
+
 class MarketEnvironment:
     def __init__(self, name, pricing_date):
         self.name = name
@@ -11,8 +15,11 @@ class MarketEnvironment:
     def add_constant(self, key, constant):
         self.constants[key] = constant
 
-    def get_constant(self, key):
-        return self.constants[key]
+    def get_constant(self, key, default=_REQUIRED):
+        if default is _REQUIRED:
+            return self.constants[key]
+        # optional constants fall back to the given default
+        return self.constants.get(key, default)
 
     def add_list(self, key, list_object):
         self.lists[key] = list_object
@@ -0,0 +1,79 @@
+# using usr/bin/python3
+import numpy as np
+
+# rational approximations of erf and erfc (Cody / Cephes ndtr coefficients)
+_T = np.array([9.60497373987051638749E0, 9.00260197203842689217E1, 2.23200534594684319226E3,
+               7.00332514112805075473E3, 5.55923013010394962768E4])
+_U = np.array([1.0, 3.35617141647503099647E1, 5.21357949780152679795E2, 4.59432382970980127987E3,
+               2.26290000613890934246E4, 4.92673942608635921086E4])
+_P = np.array([2.46196981473530512524E-10, 5.64189564831068821977E-1, 7.46321056442269912687E0,
+               4.86371970985681366614E1, 1.96520832956077098242E2, 5.26445194995477358631E2,
+               9.34528527171957607540E2, 1.02755188689515710272E3, 5.57535335369399327526E2])
+_Q = np.array([1.0, 1.32281951154744992508E1, 8.67072140885989742329E1, 3.54937778887819891062E2,
+               9.75708501743205489753E2, 1.82390916687909736289E3, 2.24633760818710981792E3,
+               1.65666309194161350182E3, 5.57535340817727675546E2])
+_R = np.array([5.64189583547755073984E-1, 1.27536670759978104416E0, 5.01905042251180477414E0,
+               6.16021097993053585195E0, 7.40974269950448939160E0, 2.97886665372100240670E0])
+_S = np.array([1.0, 2.26052863220117276590E0, 9.39603524938001434673E0, 1.20489539808096656605E1,
+               1.70814450747565897222E1, 9.60896809063285878198E0, 3.36907645100081516050E0])
+
+_SQRT_2 = np.sqrt(2.)
+_SQRT_2PI = np.sqrt(2. * np.pi)
+
+
+def _polyval(coefficients, x):
+    """ Horner evaluation of a polynomial with highest degree first. """
+    result = np.full_like(x, coefficients[0])
+    for c in coefficients[1:]:
+        result *= x
+        result += c
+    return result
+
+
+def erfc(x):
+    """
+    Return the complementary error function, evaluated elementwise
+    :param x: (array_like) arguments
+    :return: (np.array) erfc(x) with relative accuracy close to machine precision
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    result = np.empty_like(z)
+    small = z < 1.
+    if np.any(small):
+        # erfc = 1 - erf for small arguments
+        zs = z[small]
+        z2 = zs * zs
+        result[small] = 1. - zs * _polyval(_T, z2) / _polyval(_U, z2)
+    large = ~small
+    if np.any(large):
+        zl = z[large]
+        gauss = np.exp(-zl * zl)
+        mid = zl < 8.
+        value = np.empty_like(zl)
+        value[mid] = gauss[mid] * _polyval(_P, zl[mid]) / _polyval(_Q, zl[mid])
+        value[~mid] = gauss[~mid] * _polyval(_R, zl[~mid]) / _polyval(_S, zl[~mid])
+        result[large] = value
+    # reflection for negative arguments
+    negative = x < 0.
+    result[negative] = 2. - result[negative]
+    return result
+
+
+def norm_cdf(x):
+    """
+    Return the standard normal cumulative distribution function
+    :param x: (array_like) arguments
+    :return: (np.array) N(x)
+    """
+    return 0.5 * erfc(-np.asarray(x, dtype=float) / _SQRT_2)
+
+
+def norm_pdf(x):
+    """
+    Return the standard normal probability density function
+    :param x: (array_like) arguments
+    :return: (np.array) n(x)
+    """
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
@@ -0,0 +1,94 @@
+# using usr/bin/python3
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+class PathStore:
+    """ Class to keep simulated paths in memory-mapped .npy files.
+
+    Every scenario set lives in a directory named after a content hash of the
+    simulation inputs (model parameters, discount curve, time grid, number of
+    paths, precision and seed), holding instrument_values.npy, time_grid.npy
+    and provenance.json. Files are opened with np.load(mmap_mode='r'), so
+    processes reading the same scenario share the pages of the OS cache
+    instead of holding copies. Only fixed seed simulations are reproducible
+    and therefore stored."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(underlying):
+        """ Return the content hash of the inputs of a simulation object."""
+        return underlying.get_fingerprint()
+
+    def location(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self.location(key), 'provenance.json'))
+
+    def save(self, underlying, key=None):
+        """
+        Write the fixed seed paths of a simulation object to the store
+        :param underlying: (SimulationClass) simulation object
+        :param key: (str) content hash, computed if None
+        :return: (str) key of the stored scenario set
+        """
+        key = self.key(underlying) if key is None else key
+        underlying.generate_paths(fixed_seed=True)
+        instrument_values = underlying.instrument_values
+        seed_sequence = underlying.seed_sequence
+        provenance = {'model': type(underlying).__name__,
+                      'entropy': seed_sequence.entropy,
+                      'spawn_key': list(seed_sequence.spawn_key),
+                      'bit_generator': underlying.bit_generator,
+                      'numpy_version': np.__version__,
+                      'shape': list(instrument_values.shape),
+                      'dtype': instrument_values.dtype.str}
+        # write to a private directory first, publish it with an atomic rename
+        staging = tempfile.mkdtemp(prefix=f".{key}-", dir=self.directory)
+        np.save(os.path.join(staging, 'instrument_values.npy'), instrument_values)
+        np.save(os.path.join(staging, 'time_grid.npy'), underlying.time_grid)
+        with open(os.path.join(staging, 'provenance.json'), 'w') as file:
+            json.dump(provenance, file)
+        try:
+            os.rename(staging, self.location(key))
+        except OSError:
+            # another process stored the same scenario set first
+            shutil.rmtree(staging, ignore_errors=True)
+        return key
+
+    def load(self, key, mmap_mode='r'):
+        """
+        Open a stored scenario set without copying it into memory
+        :param key: (str) content hash
+        :param mmap_mode: (str) memory map mode of np.load
+        :return: (tuple) instrument values (memory map), time grid and provenance dict
+        """
+        location = self.location(key)
+        instrument_values = np.load(os.path.join(location, 'instrument_values.npy'), mmap_mode=mmap_mode)
+        time_grid = np.load(os.path.join(location, 'time_grid.npy'))
+        with open(os.path.join(location, 'provenance.json')) as file:
+            provenance = json.load(file)
+        return instrument_values, time_grid, provenance
+
+    def get_instrument_values(self, underlying):
+        """
+        Return the fixed seed paths of a simulation object, simulated and stored only
+        if no other session stored them before
+        :param underlying: (SimulationClass) simulation object, its instrument_values are
+            set to the memory map
+        :return: (np.memmap) read-only paths
+        """
+        key = self.key(underlying)
+        if key not in self:
+            self.save(underlying, key)
+        underlying.instrument_values, __, __ = self.load(key)
+        underlying.fixed_seed_paths = True
+        return underlying.instrument_values
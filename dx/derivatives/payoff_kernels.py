@@ -0,0 +1,461 @@
+# using usr/bin/python3
+import numpy as np
+
+# path functionals a payoff can read, all evaluated per path up to maturity
+FUNCTIONALS = ('maturity_value', 'mean_value', 'geometric_mean', 'max_value', 'min_value')
+# functionals across the assets of a multi-asset simulation, see MultiAssetStatistics
+MULTI_ASSET_FUNCTIONALS = ('basket_value', 'spread_value', 'worst_performance', 'best_performance')
+
+# registry of built-in vectorized payoff kernels
+PAYOFF_KERNELS = {}
+
+
+class PathStatistics:
+    """ Class to provide per-path functionals of simulated paths.
+    Functionals are computed on first access and cached. Paths of several
+    assets (assets, M, paths) give functionals of shape (assets, paths)."""
+
+    def __init__(self, paths, time_index):
+        # dates up to and including maturity, one column per path
+        self.paths = paths[..., :time_index + 1, :]
+        self._cache = {}
+
+    def _get(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func(self.paths)
+        return self._cache[key]
+
+    @property
+    def maturity_value(self):
+        return self.paths[..., -1, :]
+
+    @property
+    def mean_value(self):
+        return self._get('mean_value', lambda paths: np.mean(paths, axis=-2))
+
+    @property
+    def geometric_mean(self):
+        return self._get('geometric_mean', lambda paths: np.exp(np.mean(np.log(paths), axis=-2)))
+
+    @property
+    def max_value(self):
+        return self._get('max_value', lambda paths: np.amax(paths, axis=-2))
+
+    @property
+    def min_value(self):
+        return self._get('min_value', lambda paths: np.amin(paths, axis=-2))
+
+    def derivative(self, key, dpaths):
+        """
+        Return the derivative of a functional given the derivative of the paths
+        :param key: (str) name of the functional
+        :param dpaths: (np.array) derivative of the paths up to maturity, or of the last date only
+            when key is 'maturity_value'
+        :return: (np.array) derivative of the functional per path
+        """
+        if key == 'maturity_value':
+            return dpaths[-1]
+        if key == 'mean_value':
+            return np.mean(dpaths, axis=0)
+        if key == 'geometric_mean':
+            return self.geometric_mean * np.mean(dpaths / self.paths, axis=0)
+        columns = np.arange(self.paths.shape[1])
+        if key == 'max_value':
+            return dpaths[np.argmax(self.paths, axis=0), columns]
+        if key == 'min_value':
+            return dpaths[np.argmin(self.paths, axis=0), columns]
+        raise KeyError(key)
+
+
+class AccumulatedStatistics:
+    """ Class to accumulate per-path functionals date by date without storing the paths.
+
+    Only the functionals given are kept, each as one value per path, so
+    memory is O(paths) whatever the number of dates. Values equal those of
+    PathStatistics on the same paths."""
+
+    def __init__(self, functionals, initial_values):
+        unknown = set(functionals) - set(FUNCTIONALS)
+        if unknown:
+            raise ValueError(f"Functionals {sorted(unknown)} can not be accumulated.")
+        self.functionals = tuple(functionals)
+        self.count = 1
+        self.maturity_value = initial_values
+        self._sum = initial_values.copy() if 'mean_value' in functionals else None
+        self._log_sum = np.log(initial_values) if 'geometric_mean' in functionals else None
+        self._max = initial_values.copy() if 'max_value' in functionals else None
+        self._min = initial_values.copy() if 'min_value' in functionals else None
+
+    @property
+    def nbytes(self):
+        return sum(value.nbytes for value in (self.maturity_value, self._sum, self._log_sum, self._max, self._min)
+                   if value is not None)
+
+    def update(self, values, log_values=None):
+        """
+        Add the values of the next date
+        :param values: (np.array) values of all paths on the date
+        :param log_values: (np.array) logarithms of values if already known
+        """
+        self.count += 1
+        self.maturity_value = values
+        if self._sum is not None:
+            self._sum += values
+        if self._log_sum is not None:
+            self._log_sum += np.log(values) if log_values is None else log_values
+        if self._max is not None:
+            np.maximum(self._max, values, out=self._max)
+        if self._min is not None:
+            np.minimum(self._min, values, out=self._min)
+
+    def derivative(self, key, dpaths):
+        """ Return the derivative of the maturity value given that of the last date, see PathStatistics."""
+        if key == 'maturity_value':
+            return dpaths[-1]
+        raise KeyError(key)
+
+    def _require(self, value, key):
+        if value is None:
+            raise AttributeError(f"Functional {key} was not accumulated.")
+        return value
+
+    @property
+    def mean_value(self):
+        return self._require(self._sum, 'mean_value') / self.count
+
+    @property
+    def geometric_mean(self):
+        return np.exp(self._require(self._log_sum, 'geometric_mean') / self.count)
+
+    @property
+    def max_value(self):
+        return self._require(self._max, 'max_value')
+
+    @property
+    def min_value(self):
+        return self._require(self._min, 'min_value')
+
+
+class MultiAssetStatistics(PathStatistics):
+    """ Class to provide per-path functionals across the assets of (assets, M, paths) paths.
+
+    The basket is weighted by weights (equal weights if None), the spread is
+    the first asset less the second one and performances are maturity values
+    relative to the initial values of the assets."""
+
+    def __init__(self, paths, time_index, weights=None):
+        super(MultiAssetStatistics, self).__init__(paths, time_index)
+        assets = self.paths.shape[0]
+        self.weights = np.full(assets, 1. / assets) if weights is None else np.asarray(weights, dtype=float)
+        if self.weights.shape != (assets,):
+            raise ValueError('Basket needs one weight per asset.')
+
+    @property
+    def basket_value(self):
+        return self._get('basket_value', lambda paths: self.weights @ paths[:, -1, :])
+
+    @property
+    def spread_value(self):
+        return self._get('spread_value', lambda paths: paths[0, -1] - paths[1, -1])
+
+    @property
+    def performance(self):
+        return self._get('performance', lambda paths: paths[:, -1, :] / paths[:, 0, :])
+
+    @property
+    def worst_performance(self):
+        return self._get('worst_performance', lambda paths: np.amin(self.performance, axis=0))
+
+    @property
+    def best_performance(self):
+        return self._get('best_performance', lambda paths: np.amax(self.performance, axis=0))
+
+
+class _PayoffNamespace:
+    """ Name lookup for payoff expressions, resolving functionals lazily."""
+
+    def __init__(self, stats, strike, barrier):
+        self.stats = stats
+        self.names = {'strike': strike, 'barrier': barrier}
+
+    def __getitem__(self, key):
+        if key in self.names:
+            return self.names[key]
+        if key in FUNCTIONALS or key in MULTI_ASSET_FUNCTIONALS:
+            return getattr(self.stats, key)
+        raise KeyError(key)
+
+
+def register_payoff(name, functionals):
+    """
+    Decorator registering a vectorized payoff kernel
+    :param name: (str) name the kernel is looked up by
+    :param functionals: (tuple) path functionals the kernel reads
+    :return: decorator returning the kernel unchanged
+    """
+    def decorator(func):
+        func.functionals = tuple(functionals)
+        func.pathwise = None
+        PAYOFF_KERNELS[name] = func
+        return func
+    return decorator
+
+
+def register_pathwise(name):
+    """
+    Decorator attaching pathwise derivatives to a registered kernel
+    :param name: (str) name of the kernel
+    :return: decorator returning the derivative function unchanged, which maps
+        (stats, strike, barrier) to a dict of derivatives per functional
+    """
+    def decorator(func):
+        PAYOFF_KERNELS[name].pathwise = func
+        return func
+    return decorator
+
+
+class Payoff:
+    """ Class to turn a payoff specification into a vectorized callable.
+
+    payoff_func is either the name of a registered kernel, a callable with
+    signature f(stats, strike, barrier) or a string expression in terms of
+    np, strike, barrier and the path functionals. Strings are compiled once
+    here, never on valuation. option_type wraps the payoff as in
+    ValuationEuropeanMonteCarlo: 'Binary' ignores payoff_func and pays a
+    digital call, 'KnockoutBarrier' and 'KnockinBarrier' apply up-barrier
+    flags from the running maximum."""
+
+    def __init__(self, payoff_func, option_type='European'):
+        self.payoff_func = payoff_func
+        self.option_type = option_type
+        self._code = None
+        if option_type == 'Binary':
+            self.kernel = PAYOFF_KERNELS['digital_call']
+        elif callable(payoff_func):
+            self.kernel = payoff_func
+        elif not payoff_func:
+            self.kernel = None
+        elif payoff_func in PAYOFF_KERNELS:
+            self.kernel = PAYOFF_KERNELS[payoff_func]
+        else:
+            self._code = compile(payoff_func, '<payoff_func>', 'eval')
+            self.kernel = self._evaluate
+        if option_type not in ('European', 'Binary', 'KnockoutBarrier', 'KnockinBarrier'):
+            raise ValueError(f"Unknown option type {option_type}.")
+
+    def __getstate__(self):
+        # code objects can't be pickled, expressions are recompiled on unpickling
+        state = self.__dict__.copy()
+        if self._code is not None:
+            state['_code'] = None
+            state['kernel'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.kernel is None and self.payoff_func:
+            self.__init__(self.payoff_func, self.option_type)
+
+    @property
+    def functionals(self):
+        if self._code is not None:
+            names = [name for name in FUNCTIONALS + MULTI_ASSET_FUNCTIONALS if name in self._code.co_names]
+        else:
+            names = list(getattr(self.kernel, 'functionals', FUNCTIONALS))
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and 'max_value' not in names:
+            names.append('max_value')
+        return tuple(names)
+
+    def pathwise(self, stats, strike, barrier=None):
+        """
+        Return the derivatives of the payoff per functional
+        :return: (dict) derivatives keyed by functional, None if the payoff has no
+            pathwise derivative (expressions, digitals and barriers)
+        """
+        if self.option_type != 'European' or getattr(self.kernel, 'pathwise', None) is None:
+            return None
+        return self.kernel.pathwise(stats, strike, barrier)
+
+    def _evaluate(self, stats, strike, barrier=None):
+        return eval(self._code, {'np': np}, _PayoffNamespace(stats, strike, barrier))
+
+    def __call__(self, stats, strike, barrier=None):
+        if self.kernel is None:
+            raise ValueError('No payoff function defined.')
+        payoff = self.kernel(stats, strike, barrier)
+        if self.option_type == 'KnockoutBarrier':
+            return np.where(stats.max_value > barrier, 0., payoff)
+        if self.option_type == 'KnockinBarrier':
+            return np.where(stats.max_value > barrier, payoff, 0.)
+        return payoff
+
+
+# # vanilla
+@register_payoff('call', ('maturity_value',))
+def call(stats, strike, barrier=None):
+    return np.maximum(stats.maturity_value - strike, 0.)
+
+
+@register_payoff('put', ('maturity_value',))
+def put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.maturity_value, 0.)
+
+
+@register_pathwise('call')
+def _call_pathwise(stats, strike, barrier=None):
+    return {'maturity_value': (stats.maturity_value > strike).astype(float)}
+
+
+@register_pathwise('put')
+def _put_pathwise(stats, strike, barrier=None):
+    return {'maturity_value': -(stats.maturity_value < strike).astype(float)}
+
+
+# # digital
+@register_payoff('digital_call', ('maturity_value',))
+def digital_call(stats, strike, barrier=None):
+    return (stats.maturity_value >= strike).astype(float)
+
+
+@register_payoff('digital_put', ('maturity_value',))
+def digital_put(stats, strike, barrier=None):
+    return (stats.maturity_value < strike).astype(float)
+
+
+# # asian
+@register_payoff('asian_call', ('mean_value',))
+def asian_call(stats, strike, barrier=None):
+    return np.maximum(stats.mean_value - strike, 0.)
+
+
+@register_payoff('asian_put', ('mean_value',))
+def asian_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.mean_value, 0.)
+
+
+@register_payoff('geometric_asian_call', ('geometric_mean',))
+def geometric_asian_call(stats, strike, barrier=None):
+    return np.maximum(stats.geometric_mean - strike, 0.)
+
+
+@register_payoff('geometric_asian_put', ('geometric_mean',))
+def geometric_asian_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.geometric_mean, 0.)
+
+
+@register_pathwise('asian_call')
+def _asian_call_pathwise(stats, strike, barrier=None):
+    return {'mean_value': (stats.mean_value > strike).astype(float)}
+
+
+@register_pathwise('asian_put')
+def _asian_put_pathwise(stats, strike, barrier=None):
+    return {'mean_value': -(stats.mean_value < strike).astype(float)}
+
+
+@register_pathwise('geometric_asian_call')
+def _geometric_asian_call_pathwise(stats, strike, barrier=None):
+    return {'geometric_mean': (stats.geometric_mean > strike).astype(float)}
+
+
+@register_pathwise('geometric_asian_put')
+def _geometric_asian_put_pathwise(stats, strike, barrier=None):
+    return {'geometric_mean': -(stats.geometric_mean < strike).astype(float)}
+
+
+# # lookback
+@register_payoff('lookback_call', ('max_value',))
+def lookback_call(stats, strike, barrier=None):
+    return np.maximum(stats.max_value - strike, 0.)
+
+
+@register_payoff('lookback_put', ('min_value',))
+def lookback_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.min_value, 0.)
+
+
+@register_payoff('floating_lookback_call', ('maturity_value', 'min_value'))
+def floating_lookback_call(stats, strike=None, barrier=None):
+    return stats.maturity_value - stats.min_value
+
+
+@register_payoff('floating_lookback_put', ('maturity_value', 'max_value'))
+def floating_lookback_put(stats, strike=None, barrier=None):
+    return stats.max_value - stats.maturity_value
+
+
+@register_pathwise('lookback_call')
+def _lookback_call_pathwise(stats, strike, barrier=None):
+    return {'max_value': (stats.max_value > strike).astype(float)}
+
+
+@register_pathwise('lookback_put')
+def _lookback_put_pathwise(stats, strike, barrier=None):
+    return {'min_value': -(stats.min_value < strike).astype(float)}
+
+
+@register_pathwise('floating_lookback_call')
+def _floating_lookback_call_pathwise(stats, strike=None, barrier=None):
+    return {'maturity_value': 1., 'min_value': -1.}
+
+
+@register_pathwise('floating_lookback_put')
+def _floating_lookback_put_pathwise(stats, strike=None, barrier=None):
+    return {'max_value': 1., 'maturity_value': -1.}
+
+
+# # knock-in / knock-out
+@register_payoff('up_and_out_call', ('maturity_value', 'max_value'))
+def up_and_out_call(stats, strike, barrier):
+    return np.where(stats.max_value > barrier, 0., np.maximum(stats.maturity_value - strike, 0.))
+
+
+@register_payoff('up_and_in_call', ('maturity_value', 'max_value'))
+def up_and_in_call(stats, strike, barrier):
+    return np.where(stats.max_value > barrier, np.maximum(stats.maturity_value - strike, 0.), 0.)
+
+
+@register_payoff('down_and_out_put', ('maturity_value', 'min_value'))
+def down_and_out_put(stats, strike, barrier):
+    return np.where(stats.min_value < barrier, 0., np.maximum(strike - stats.maturity_value, 0.))
+
+
+@register_payoff('down_and_in_put', ('maturity_value', 'min_value'))
+def down_and_in_put(stats, strike, barrier):
+    return np.where(stats.min_value < barrier, np.maximum(strike - stats.maturity_value, 0.), 0.)
+
+
+# # multi-asset, strikes of worst-of and best-of options are relative to the initial values
+@register_payoff('basket_call', ('basket_value',))
+def basket_call(stats, strike, barrier=None):
+    return np.maximum(stats.basket_value - strike, 0.)
+
+
+@register_payoff('basket_put', ('basket_value',))
+def basket_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.basket_value, 0.)
+
+
+@register_payoff('spread_call', ('spread_value',))
+def spread_call(stats, strike, barrier=None):
+    return np.maximum(stats.spread_value - strike, 0.)
+
+
+@register_payoff('spread_put', ('spread_value',))
+def spread_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.spread_value, 0.)
+
+
+@register_payoff('worst_of_call', ('worst_performance',))
+def worst_of_call(stats, strike, barrier=None):
+    return np.maximum(stats.worst_performance - strike, 0.)
+
+
+@register_payoff('worst_of_put', ('worst_performance',))
+def worst_of_put(stats, strike, barrier=None):
+    return np.maximum(strike - stats.worst_performance, 0.)
+
+
+@register_payoff('best_of_call', ('best_performance',))
+def best_of_call(stats, strike, barrier=None):
+    return np.maximum(stats.best_performance - strike, 0.)
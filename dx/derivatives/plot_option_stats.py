@@ -1,7 +1,6 @@
-import matplotlib.pyplot as plt
-
-
 def plot_option_stats(s_list, p_list, d_list, v_list):
+    # matplotlib is optional and only loaded for plotting
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(9, 7))
     sub1 = plt.subplot(311)
     plt.plot(s_list, p_list, 'ro', label='present value')
@@ -1,5 +1,13 @@
-import matplotlib.pyplot as plt
 import numpy as np
+from derivatives import PathStatistics
+from derivatives import Payoff
+from derivatives import sn_random_numbers
+from derivatives.payoff_kernels import PAYOFF_KERNELS
+
+# option types of opt_sim and the payoff kernels evaluating them
+OPTION_KERNELS = {'euro_call': 'call', 'euro_put': 'put',
+                  'binary_call': 'digital_call', 'binary_put': 'digital_put',
+                  'asian_call': 'asian_call', 'asian_put': 'asian_put'}
 
 
 class Pricing:
@@ -14,6 +22,8 @@ class Pricing:
         self.asset_price = asset_price
         self.maturity_time = maturity_time
         self.function_payoff = function_payoff
+        # custom payoff compiled once, evaluated on all paths at once
+        self.payoff = Payoff(function_payoff) if function_payoff is not None else None
         self.risk_free_factor = risk_free_factor
 
     def update(self, initial_time, stock_price):
@@ -61,44 +71,57 @@ class Pricing:
             asset_price_vector[i] = self.asset_price * np.exp((self.risk_free_factor - 0.5 * self.sigma * self.sigma) *
                                                               ts[i - 1] + self.sigma * cumulative_step_vector[i])
         if plot:
+            import matplotlib.pyplot as plt
             plt.plot(ts, cumulative_step_vector)
             plt.show()
         return asset_price_vector, ts
 
-    def generate_paths(self, number_steps=100, number_paths=10):
-        seed_list = np.random.random(number_paths)
-        self.path = np.empty((number_paths, number_steps))
-        self.ts = np.linspace(0, self.maturity_time, number_steps)
-        for i in range(number_paths):
-            self.path[i], __ = self.gmb_path(number_steps, seed=seed_list[i])
+    def generate_paths(self, number_steps=100, number_paths=10, seed=None):
+        """
+        Simulate all paths at once on number_steps equidistant dates up to maturity
+        :param number_steps: (int) number of dates including the valuation date
+        :param number_paths: (int) number of paths
+        :param seed: (int) seed of the random numbers, None for fresh ones
+        """
+        self.ts, dt = np.linspace(self.time, self.maturity_time, number_steps, retstep=True)
+        random_numbers = sn_random_numbers((1, number_steps - 1, number_paths),
+                                           random_state=np.random.default_rng(seed))
+        # log increments of all paths, one row per date
+        values = np.empty((number_steps, number_paths))
+        values[0] = 0.
+        values[1:] = (self.risk_free_factor - 0.5 * self.sigma ** 2) * dt + self.sigma * np.sqrt(dt) * random_numbers
+        np.cumsum(values, axis=0, out=values)
+        np.exp(values, out=values)
+        values *= self.asset_price
+        self.path = values.T
 
-    def opt_sim(self, opt='euro_call', number_steps=100, number_paths=10):
+    def opt_sim(self, opt='euro_call', number_steps=100, number_paths=10, strike=None, seed=None):
+        """
+        Price options by Monte Carlo simulation on one set of paths
+        :param opt: (str or list) option types, any of OPTION_KERNELS
+        :param number_steps: (int) number of dates including the valuation date
+        :param number_paths: (int) number of paths
+        :param strike: (float or list) strikes, the strike of the object if None
+        :param seed: (int) seed of the random numbers, None for fresh ones
+        :return: (np.array) prices of shape (options, strikes), of shape (1,) for a single option and strike
+        """
         self.opt = opt
-        self.generate_paths(number_steps, number_paths)
-        self.payoffs = np.empty((number_paths, 1))
-        for i in range(number_paths):
-            # European
-            if self.opt == 'euro_call':
-                self.payoffs[i] = np.max(0, self.path[i][-1] - self.strike)
-            if self.opt == 'euro_put':
-                self.payoffs[i] = np.max(0, -self.path[i][-1] + self.strike)
-            # Binary
-            if self.opt == 'binary_call':
-                if self.path[i][-1] > self.strike:
-                    self.payoffs[i] = 1
-                else:
-                    self.payoffs[i] = 0
-            if self.opt == 'binary_put':
-                if self.path[i][-1] < self.strike:
-                    self.payoffs[i] = 1
-                else:
-                    self.payoffs[i] = 0
-            # Asian
-            if self.opt == 'asian_call':
-                self.payoffs[i] = np.max(0, np.mean(self.path[i]) - self.strike)
-            if self.opt == 'asian_put':
-                self.payoffs[i] = np.max(0, -np.mean(self.path[i]) + self.strike)
-            # Custom
-            if self.function_payoff is not None:
-                self.payoffs[i] = eval(self.function_payoff)
-        return np.exp(-self.risk_free_factor * self.maturity_time) * np.sum(self.payoffs, axis=0) / number_paths
\ No newline at end of file
+        options = [opt] if isinstance(opt, str) else list(opt)
+        strikes = np.atleast_1d(np.asarray(self.strike if strike is None else strike, dtype=float))
+        self.generate_paths(number_steps, number_paths, seed)
+        stats = PathStatistics(self.path.T, number_steps - 1)
+        # strikes along the first axis, all paths are evaluated per strike at once
+        strike_column = strikes[:, np.newaxis]
+        if self.payoff is not None:
+            # custom payoff replaces the option types
+            payoffs = [self.payoff(stats, strike_column)]
+        else:
+            for option in options:
+                if option not in OPTION_KERNELS:
+                    raise ValueError(f"Unknown option type {option}.")
+            payoffs = [PAYOFF_KERNELS[OPTION_KERNELS[option]](stats, strike_column) for option in options]
+        self.payoffs = np.array([np.broadcast_to(payoff, (strikes.size, number_paths)) for payoff in payoffs])
+        prices = np.exp(-self.risk_free_factor * (self.maturity_time - self.time)) * np.mean(self.payoffs, axis=2)
+        if isinstance(opt, str) and np.ndim(strike) == 0:
+            return prices[0]
+        return prices
@@ -0,0 +1,431 @@
+# using usr/bin/python3
+"""
+Asyncio pricing service batching concurrent quote requests
+
+Requests are dicts with a 'type' of 'black_scholes' or 'monte_carlo'.
+Requests arriving within window seconds of each other are priced together:
+Black-Scholes quotes as one BlackScholesChain, Monte Carlo quotes grouped by
+underlying so that each group shares one simulation in a worker process.
+A request that can't be priced raises its error from PricingService.price,
+without failing the other requests of its batch.
+serve() exposes a service over a local TCP socket speaking JSON lines, one
+request (with an optional 'id' echoed in the response) per line.
+
+    python -m derivatives.pricing_service --port 8765
+"""
+import asyncio
+import collections
+import datetime as dt
+import json
+import numbers
+import os
+import time
+
+import numpy as np
+from derivatives import BlackScholesChain
+from derivatives.payoff_kernels import PAYOFF_KERNELS
+from derivatives.running_statistics import antithetic_samples
+
+# fields of the request types, with defaults for the optional ones
+BLACK_SCHOLES_FIELDS = {'asset_price': None, 'strike': None, 'maturity_time': None, 'risk_free_factor': None,
+                        'sigma': None, 'option_type': 'eurocall', 'time': 0., 'greeks': False}
+MONTE_CARLO_FIELDS = {'initial_value': None, 'volatility': None, 'short_rate': None, 'strike': None,
+                      'maturity_time': None, 'payoff_func': 'call', 'option_type': 'European', 'barrier': None,
+                      'paths': 10000, 'steps': 50, 'seed': 1}
+# numeric fields of the requests, rates may be negative
+REAL_FIELDS = ('asset_price', 'strike', 'maturity_time', 'risk_free_factor', 'sigma', 'time', 'initial_value',
+               'volatility', 'short_rate', 'barrier')
+INTEGER_FIELDS = ('paths', 'steps', 'seed')
+POSITIVE_FIELDS = ('asset_price', 'strike', 'sigma', 'maturity_time', 'initial_value', 'volatility', 'paths',
+                   'steps')
+NON_NEGATIVE_FIELDS = ('time', 'barrier', 'seed')
+# option types of the request types, Monte Carlo payoffs are registered kernels (never evaluated expressions)
+OPTION_TYPES = {'black_scholes': ('eurocall', 'europut'),
+                'monte_carlo': ('European', 'Binary', 'KnockoutBarrier', 'KnockinBarrier')}
+# Monte Carlo requests with equal values of these fields share one simulation
+UNDERLYING_FIELDS = ('initial_value', 'volatility', 'short_rate', 'maturity_time', 'paths', 'steps', 'seed')
+# reference date the maturities of Monte Carlo requests are counted from
+_PRICING_DATE = dt.datetime(2000, 1, 1)
+
+
+def _normalize(request):
+    """ Return the request with defaults filled in, ValueError if a field is missing, unknown or invalid."""
+    if not isinstance(request, dict):
+        raise ValueError('Requests must be dicts.')
+    fields = {'black_scholes': BLACK_SCHOLES_FIELDS, 'monte_carlo': MONTE_CARLO_FIELDS}.get(request.get('type'))
+    if fields is None:
+        raise ValueError(f"Unknown request type {request.get('type')}.")
+    unknown = set(request) - set(fields) - {'type', 'id'}
+    if unknown:
+        raise ValueError(f"Unknown request fields {sorted(unknown)}.")
+    normalized = {'type': request['type']}
+    for key, default in fields.items():
+        value = request.get(key, default)
+        if value is None and key != 'barrier':
+            raise ValueError(f"Request field {key} is missing.")
+        if value is not None and key in REAL_FIELDS + INTEGER_FIELDS:
+            kind = numbers.Integral if key in INTEGER_FIELDS else numbers.Real
+            # bools are integers, but never meant as numbers here
+            if isinstance(value, bool) or not isinstance(value, kind) or not np.isfinite(value):
+                raise ValueError(f"Request field {key} must be a finite {kind.__name__.lower()} number.")
+            if key in POSITIVE_FIELDS and value <= 0:
+                raise ValueError(f"Request field {key} must be positive.")
+            if key in NON_NEGATIVE_FIELDS and value < 0:
+                raise ValueError(f"Request field {key} must not be negative.")
+        normalized[key] = value
+    option_types = OPTION_TYPES[request['type']]
+    if normalized['option_type'] not in option_types:
+        raise ValueError(f"Invalid option type, use one of {', '.join(option_types)}.")
+    if request['type'] == 'black_scholes' and not isinstance(normalized['greeks'], bool):
+        raise ValueError('Request field greeks must be true or false.')
+    if request['type'] == 'black_scholes' and normalized['time'] >= normalized['maturity_time']:
+        raise ValueError('Request field time must be before maturity_time.')
+    if request['type'] == 'monte_carlo' and (not isinstance(normalized['payoff_func'], str) or
+                                             normalized['payoff_func'] not in PAYOFF_KERNELS):
+        raise ValueError(f"Unknown payoff {normalized['payoff_func']!r}, use one of {', '.join(PAYOFF_KERNELS)}.")
+    return normalized
+
+
+def price_black_scholes(requests):
+    """
+    Return the quotes of Black-Scholes requests from one vectorized chain
+    :param requests: (list) normalized requests
+    :return: (list) dicts with the price and, if requested, the greeks
+    """
+    columns = {key: [request[key] for request in requests] for key in BLACK_SCHOLES_FIELDS if key != 'greeks'}
+    chain = BlackScholesChain(columns['asset_price'], columns['strike'], columns['maturity_time'],
+                              columns['risk_free_factor'], columns['sigma'], columns['option_type'],
+                              columns['time'])
+    greeks = chain.greeks() if any(request['greeks'] for request in requests) else {'price': chain.price}
+    return [{key: float(values[number]) for key, values in greeks.items() if request['greeks'] or key == 'price'}
+            for number, request in enumerate(requests)]
+
+
+def price_monte_carlo(requests):
+    """
+    Return the quotes of Monte Carlo requests on one underlying from a single simulation
+    :param requests: (list) normalized requests sharing the UNDERLYING_FIELDS
+    :return: (list) dicts with the present value and its standard error, the exception for requests
+        that failed
+    """
+    # imported here, worker processes only load what they price
+    from derivatives import ConstantShortRate
+    from derivatives import GeometricBrownianMotion
+    from derivatives import MarketEnvironment
+    from derivatives import ValuationEuropeanMonteCarlo
+    first = requests[0]
+    # the time grid counts whole days, maturities are rounded to the nearest day
+    days = max(int(round(first['maturity_time'] * 365.)), 1)
+    maturity = _PRICING_DATE + dt.timedelta(days=days)
+    me_gbm = MarketEnvironment('me_gbm', _PRICING_DATE)
+    me_gbm.add_constant('initial_value', first['initial_value'])
+    me_gbm.add_constant('volatility', first['volatility'])
+    me_gbm.add_constant('final_date', maturity)
+    me_gbm.add_constant('currency', 'EUR')
+    me_gbm.add_constant('frequency', 'D')
+    me_gbm.add_constant('paths', first['paths'])
+    me_gbm.add_constant('seed', first['seed'])
+    me_gbm.add_curve('discount_curve', ConstantShortRate('csr', first['short_rate']))
+    me_gbm.add_list('time_grid', [_PRICING_DATE + dt.timedelta(days=int(day))
+                                  for day in np.unique(np.round(np.linspace(0., days, first['steps'] + 1)))])
+    underlying = GeometricBrownianMotion('gbm', me_gbm)
+    results = []
+    for request in requests:
+        me_option = MarketEnvironment('me_option', _PRICING_DATE)
+        me_option.add_constant('strike', request['strike'])
+        me_option.add_constant('maturity', maturity)
+        me_option.add_constant('currency', 'EUR')
+        me_option.add_constant('valuation_cache', None)
+        try:
+            valuation = ValuationEuropeanMonteCarlo('quote', underlying, me_option, request['payoff_func'],
+                                                    request['option_type'])
+            # all requests reuse the fixed seed paths of the first one
+            value, cash_flows = valuation.present_value(fixed_seed=True, full=True, barrier=request['barrier'])
+            # antithetic paths are not independent, their pair means are
+            samples = antithetic_samples(cash_flows)
+            results.append({'present_value': float(value),
+                            'std_error': float(np.std(samples, ddof=1) / np.sqrt(samples.size))})
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+class PricingService:
+    """ Class to price concurrent requests in micro-batches on an asyncio event loop.
+
+    The batcher waits window seconds after the first queued request (or until
+    max_batch requests are queued) and prices the batch. Black-Scholes quotes
+    are cheap and priced on the loop, Monte Carlo groups go to a process pool
+    of workers processes (a thread of the loop if workers is 0). metrics()
+    reports queue depth, batch sizes and request latencies."""
+
+    def __init__(self, window=0.002, max_batch=4096, workers=None, latency_samples=10000):
+        self.window = window
+        self.max_batch = max_batch
+        self.workers = os.cpu_count() if workers is None else workers
+        self.queue = None
+        self.pool = None
+        self._batcher = None
+        self._tasks = set()
+        self.requests = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.latencies = collections.deque(maxlen=latency_samples)
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        if self.workers:
+            # multiprocessing is only loaded for a running service
+            from concurrent.futures import ProcessPoolExecutor
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._batcher = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def price(self, request):
+        """
+        Queue a request and wait for its quote
+        :param request: (dict) request with 'type' 'black_scholes' or 'monte_carlo' and its fields
+        :return: (dict) quote, the error is raised if the request can't be priced
+        """
+        request = _normalize(request)
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((request, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0.:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                self._dispatch(batch)
+            except Exception as error:
+                # only this batch fails, the batcher keeps serving
+                self._fail(batch, error)
+
+    def _dispatch(self, batch):
+        """ Price the Black-Scholes part of a batch now and hand the Monte Carlo groups to the pool."""
+        black_scholes = [item for item in batch if item[0]['type'] == 'black_scholes']
+        if black_scholes:
+            try:
+                self._resolve(black_scholes, price_black_scholes([item[0] for item in black_scholes]))
+            except Exception:
+                # one bad quote fails the chain, the quotes are priced one by one to isolate it
+                for item in black_scholes:
+                    try:
+                        self._resolve([item], price_black_scholes([item[0]]))
+                    except Exception as error:
+                        self._fail([item], error)
+        groups = {}
+        for item in batch:
+            if item[0]['type'] == 'monte_carlo':
+                groups.setdefault(tuple(item[0][key] for key in UNDERLYING_FIELDS), []).append(item)
+        loop = asyncio.get_running_loop()
+        for items in groups.values():
+            task = loop.create_task(self._price_group(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _price_group(self, items):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, price_monte_carlo, [item[0] for item in items])
+        except Exception as error:
+            self._fail(items, error)
+        else:
+            self._resolve(items, results)
+
+    def _resolve(self, items, results):
+        now = time.perf_counter()
+        for (request, future, start), result in zip(items, results):
+            self.latencies.append(now - start)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            elif not all(np.isfinite(value) for value in result.values()):
+                future.set_exception(ValueError('Quote is not finite, the inputs are out of range of the model.'))
+            else:
+                future.set_result(result)
+
+    def _fail(self, items, error):
+        now = time.perf_counter()
+        for request, future, start in items:
+            self.latencies.append(now - start)
+            if not future.done():
+                future.set_exception(error)
+
+    def metrics(self):
+        """
+        Return the service metrics
+        :return: (dict) requests, batches, mean batch size, current and maximum queue depth,
+            Monte Carlo groups in flight and mean, p50 and p99 latency in seconds of recent requests
+        """
+        latencies = np.array(self.latencies)
+        return {'requests': self.requests, 'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.,
+                'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+                'max_queue_depth': self.max_queue_depth, 'in_flight': len(self._tasks),
+                'latency': {'mean': float(np.mean(latencies)) if latencies.size else 0.,
+                            'p50': float(np.quantile(latencies, 0.5)) if latencies.size else 0.,
+                            'p99': float(np.quantile(latencies, 0.99)) if latencies.size else 0.}}
+
+
+async def _handle_request(service, line, writer):
+    """ Price one JSON line and write the response, errors are reported to the client."""
+    response = {}
+    try:
+        request = json.loads(line)
+        response['id'] = request.pop('id', None)
+        if request.get('type') == 'metrics':
+            response.update(service.metrics())
+        else:
+            response.update(await service.price(request))
+        # NaN and infinity are not JSON, a quote containing them is an error
+        message = json.dumps(response, allow_nan=False)
+    except Exception as error:
+        message = json.dumps({'id': response.get('id'), 'error': str(error)})
+    writer.write(message.encode() + b'\n')
+    await writer.drain()
+
+
+async def serve(service, host='127.0.0.1', port=0):
+    """
+    Start a JSON-lines TCP server in front of a started service
+    Requests of one connection are priced concurrently, so pipelined requests
+    share batches and responses may come back out of order (match them by id).
+    :param service: (PricingService) started service
+    :param host: (str) interface to listen on
+    :param port: (int) port, any free port if 0
+    :return: (asyncio.Server) server, its port is server.sockets[0].getsockname()[1]
+    """
+    async def handle(reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.get_running_loop().create_task(_handle_request(service, line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class PricingClient:
+    """ Class to send pipelined requests to a JSON-lines pricing server."""
+
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self._pending = {}
+        self._next_id = 0
+        self._receiver = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self._receiver = asyncio.get_running_loop().create_task(self._receive())
+        return self
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        if self._receiver is not None:
+            self._receiver.cancel()
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._pending.pop(response.pop('id', None), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+    async def price(self, request):
+        """
+        Send a request and wait for its response
+        :param request: (dict) request as for PricingService.price, or {'type': 'metrics'}
+        :return: (dict) response, with the key 'error' if the request failed
+        """
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self.writer.write(json.dumps(dict(request, id=self._next_id)).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the JSON-lines pricing server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window', type=float, default=0.002, help='batching window in seconds')
+    parser.add_argument('--workers', type=int, default=None, help='Monte Carlo processes, 0 for a thread')
+    args = parser.parse_args(argv)
+
+    async def run():
+        async with PricingService(window=args.window, workers=args.workers) as service:
+            server = await serve(service, args.host, args.port)
+            async with server:
+                await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
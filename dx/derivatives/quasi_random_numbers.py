@@ -0,0 +1,81 @@
+# using usr/bin/python3
+import numpy as np
+
+
+class BrownianBridge:
+    """ Class to build Brownian motions on a time grid from standard normal
+    numbers in Brownian bridge order: the terminal value first, then the
+    midpoints of the remaining intervals. The leading numbers, where
+    low-discrepancy sequences are best distributed, drive most of the
+    variance of the path."""
+
+    def __init__(self, times):
+        # year fractions of the grid, starting with 0
+        self.times = np.asarray(times, dtype=float)
+        steps = len(self.times) - 1
+        self.bridge_index = np.zeros(steps, dtype=int)
+        self.left_index = np.zeros(steps, dtype=int)
+        self.right_index = np.zeros(steps, dtype=int)
+        self.left_weight = np.zeros(steps)
+        self.right_weight = np.zeros(steps)
+        self.std_dev = np.zeros(steps)
+        # terminal value from the origin
+        self.bridge_index[0] = steps
+        self.std_dev[0] = np.sqrt(self.times[steps] - self.times[0])
+        intervals = [(0, steps)]
+        k = 1
+        while intervals:
+            left, right = intervals.pop(0)
+            if right - left < 2:
+                continue
+            middle = (left + right) // 2
+            t_left, t_middle, t_right = self.times[[left, middle, right]]
+            self.bridge_index[k] = middle
+            self.left_index[k] = left
+            self.right_index[k] = right
+            self.left_weight[k] = (t_right - t_middle) / (t_right - t_left)
+            self.right_weight[k] = (t_middle - t_left) / (t_right - t_left)
+            self.std_dev[k] = np.sqrt((t_middle - t_left) * (t_right - t_middle) / (t_right - t_left))
+            intervals.extend([(left, middle), (middle, right)])
+            k += 1
+
+    def build(self, random_numbers):
+        """
+        Return the Brownian motion on the grid
+        :param random_numbers: (np.array) standard normals of shape (steps, paths), in bridge order
+        :return: (np.array) Brownian motion of shape (steps + 1, paths), zero at the first date
+        """
+        brownian = np.zeros((len(self.times), random_numbers.shape[1]))
+        brownian[self.bridge_index[0]] = self.std_dev[0] * random_numbers[0]
+        for k in range(1, len(self.bridge_index)):
+            brownian[self.bridge_index[k]] = (self.left_weight[k] * brownian[self.left_index[k]] +
+                                              self.right_weight[k] * brownian[self.right_index[k]] +
+                                              self.std_dev[k] * random_numbers[k])
+        return brownian
+
+    def increments(self, random_numbers):
+        """
+        Return standard normal increments of the Brownian motion, one per step
+        :param random_numbers: (np.array) standard normals of shape (steps, paths), in bridge order
+        :return: (np.array) increments divided by the square root of their step size
+        """
+        increments = np.diff(self.build(random_numbers), axis=0)
+        increments /= np.sqrt(np.diff(self.times))[:, np.newaxis]
+        return increments
+
+
+def sobol_random_numbers(dimension, path_number, random_state=None):
+    """
+    Return standard normal numbers from a scrambled Sobol sequence
+    :param dimension: (int) number of dimensions, one per time step
+    :param path_number: (int) number of points, best a power of 2
+    :param random_state: (np.random.Generator) generator for the scrambling
+    :return: (np.array) array of shape (dimension, path_number)
+    """
+    # optional dependency, only needed for quasi-Monte Carlo
+    from scipy.stats import qmc
+    from scipy.special import ndtri
+    points = qmc.Sobol(dimension, scramble=True, seed=random_state).random(path_number)
+    # keep the inverse normal finite
+    np.clip(points, 1e-16, 1. - 1e-16, out=points)
+    return ndtri(points).T
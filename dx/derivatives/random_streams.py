@@ -0,0 +1,55 @@
+# using usr/bin/python3
+import numpy as np
+
+BIT_GENERATORS = {'PCG64': np.random.PCG64, 'Philox': np.random.Philox}
+
+# seed of fixed seed simulations whose market environment sets none
+DEFAULT_SEED = 42
+
+
+def make_generator(seed=None, bit_generator='PCG64'):
+    """
+    Return a random number generator independent of the global numpy state
+    :param seed: (int, SeedSequence or None) seed, fresh OS entropy if None
+    :param bit_generator: (str) 'PCG64' or 'Philox'
+    :return: (np.random.Generator) generator
+    """
+    return np.random.Generator(BIT_GENERATORS[bit_generator](seed))
+
+
+def spawn_generators(seed, number, bit_generator='PCG64'):
+    """
+    Return statistically independent generators spawned from one seed
+    :param seed: (int, SeedSequence or None) root seed
+    :param number: (int) number of streams
+    :param bit_generator: (str) 'PCG64' or 'Philox'
+    :return: (list) generators, the i-th one only depends on seed and i
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [make_generator(child, bit_generator) for child in seed.spawn(number)]
+
+
+def block_generator(seed_sequence, block, bit_generator='PCG64'):
+    """
+    Return the generator of one block of a partitioned simulation
+    :param seed_sequence: (SeedSequence) seed of the simulation
+    :param block: (int) index of the block
+    :param bit_generator: (str) 'PCG64' or 'Philox'
+    :return: (np.random.Generator) generator that only depends on the seed and the block index
+    """
+    # spawn key of its own, so block streams never collide with spawned children
+    child = np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (2 ** 32, block))
+    return make_generator(child, bit_generator)
+
+
+def jumped_generators(seed, number, bit_generator='PCG64'):
+    """
+    Return generators on non-overlapping blocks of a single stream
+    :param seed: (int, SeedSequence or None) seed of the stream
+    :param number: (int) number of streams
+    :param bit_generator: (str) 'PCG64' or 'Philox'
+    :return: (list) generators, the i-th one jumped ahead i times
+    """
+    root = BIT_GENERATORS[bit_generator](seed)
+    return [np.random.Generator(root.jumped(i)) for i in range(number)]
@@ -0,0 +1,79 @@
+# using usr/bin/python3
+from statistics import NormalDist
+
+import numpy as np
+
+
+class RunningMoments:
+    """ Class to keep count, mean and variance of a stream of samples
+    with Welford's update, merging whole chunks at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def update(self, samples):
+        samples = np.asarray(samples, dtype=float).ravel()
+        if samples.size == 0:
+            return
+        chunk_mean = np.mean(samples)
+        chunk_m2 = np.sum((samples - chunk_mean) ** 2)
+        self.merge(samples.size, chunk_mean, chunk_m2)
+
+    def merge(self, count, mean, m2):
+        # pairwise combination of two sets of moments (Chan et al.)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return np.nan
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std_error(self):
+        return np.sqrt(self.variance / self.count)
+
+
+def antithetic_samples(values):
+    """
+    Return the independent samples of values drawn by antithetic pairs along the last axis
+    Path j is paired with path half + j as in sn_random_numbers, each pair gives
+    its mean as one sample; the unpaired path of an odd number of paths is a sample
+    of its own.
+    :param values: (np.array) per-path values, e.g. payoffs
+    :return: (np.array) samples whose standard error is the one of the mean of values
+    """
+    values = np.asarray(values, dtype=float)
+    path_number = values.shape[-1]
+    half = (path_number + 1) // 2
+    pairs = 0.5 * (values[..., :path_number - half] + values[..., half:])
+    return np.concatenate((pairs, values[..., path_number - half:half]), axis=-1)
+
+
+class MonteCarloEstimate:
+    """ Class to report a Monte Carlo value with its standard error."""
+
+    def __init__(self, value, std_error, paths, confidence=0.95, converged=True, variance_reduction=1.):
+        self.value = value
+        self.std_error = std_error
+        self.paths = paths
+        self.confidence = confidence
+        # False if a target accuracy was set and not reached
+        self.converged = converged
+        # variance of the plain estimator over the variance of the reported one
+        self.variance_reduction = variance_reduction
+
+    @property
+    def conf_interval(self):
+        z = NormalDist().inv_cdf(0.5 + 0.5 * self.confidence)
+        return self.value - z * self.std_error, self.value + z * self.std_error
+
+    def __repr__(self):
+        return (f"MonteCarloEstimate(value={self.value}, std_error={self.std_error}, "
+                f"paths={self.paths}, converged={self.converged}, variance_reduction={self.variance_reduction})")
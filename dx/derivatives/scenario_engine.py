@@ -0,0 +1,170 @@
+# using usr/bin/python3
+import itertools
+
+import numpy as np
+from derivatives import PathStatistics
+from derivatives.instrumentation import timed, increment
+from derivatives.running_statistics import antithetic_samples
+from derivatives.time_grid import day_count_basis
+
+# axes of a scenario grid, in the order of ScenarioResult.values
+SCENARIO_AXES = ('spot', 'vol', 'rate', 'time')
+
+
+class _SpotScaledStatistics:
+    """ Functionals of unit-spot paths scaled to several initial values at once.
+    All path functionals are homogeneous of degree one in the initial value."""
+
+    def __init__(self, stats, spots):
+        self.stats = stats
+        self.spots = spots
+
+    def __getattr__(self, key):
+        # functionals of shape (scenarios, paths) become (spots, scenarios, paths)
+        return self.spots.reshape((-1,) + (1,) * np.ndim(getattr(self.stats, key))) * getattr(self.stats, key)
+
+
+class ScenarioResult:
+    """ Class to hold present values of a grid of spot, vol, rate and time shocks.
+
+    values and std_errors have one axis per entry of SCENARIO_AXES, labeled
+    by the shocks in coords. base_value is the present value without shocks
+    on the same paths, so pnl holds the revaluation P&L of every scenario."""
+
+    def __init__(self, values, std_errors, coords, base_value):
+        self.values = values
+        self.std_errors = std_errors
+        self.coords = coords
+        self.base_value = base_value
+
+    @property
+    def pnl(self):
+        return self.values - self.base_value
+
+    def _index(self, labels):
+        index = []
+        for axis in SCENARIO_AXES:
+            if axis not in labels:
+                index.append(slice(None))
+                continue
+            position = np.flatnonzero(np.isclose(self.coords[axis], labels.pop(axis)))
+            if position.size == 0:
+                raise KeyError(f"Shock not in the {axis} axis of the scenario grid.")
+            index.append(position[0])
+        if labels:
+            raise KeyError(f"Unknown scenario axes {sorted(labels)}.")
+        return tuple(index)
+
+    def sel(self, **labels):
+        """
+        Return the present values of the scenarios with the given shocks
+        :param labels: shocks keyed by axis, e.g. spot=-0.1, vol=0.05
+        :return: (np.array) present values over the axes not selected, a float if all are selected
+        """
+        return self.values[self._index(labels)]
+
+    def worst(self):
+        """ Return the shocks and P&L of the scenario with the largest loss."""
+        index = np.unravel_index(np.argmin(self.values), self.values.shape)
+        return {axis: self.coords[axis][position] for axis, position in zip(SCENARIO_AXES, index)}, \
+            self.values[index] - self.base_value
+
+    def to_frame(self):
+        """ Return the scenarios as a pandas DataFrame with one row per scenario."""
+        # pandas is optional and only loaded here
+        import pandas as pd
+        index = pd.MultiIndex.from_product([self.coords[axis] for axis in SCENARIO_AXES], names=SCENARIO_AXES)
+        return pd.DataFrame({'present_value': self.values.ravel(), 'std_error': self.std_errors.ravel(),
+                             'pnl': self.pnl.ravel()}, index=index)
+
+    def __repr__(self):
+        shape = ', '.join(f"{axis}={len(self.coords[axis])}" for axis in SCENARIO_AXES)
+        return f"ScenarioResult({shape}, base_value={self.base_value:.6f})"
+
+
+class ScenarioEngine:
+    """ Class to revalue a ValuationEuropeanMonteCarlo on a grid of market shocks from one set of paths.
+
+    The random numbers behind the base paths of the GeometricBrownianMotion are
+    reused for every scenario (common random numbers), no path is simulated
+    again. Spot shocks scale the paths, vol and rate shocks rescale the
+    Brownian part and the drift of the log paths, both exactly as a
+    resimulation with the same numbers would. Time shocks age the option by a
+    number of days with the curve and vol unchanged relative to the valuation
+    date: the dates up to maturity are compressed and the Brownian part is
+    scaled by the square root of the remaining fraction (Brownian scaling),
+    which is exact in law for payoffs of the maturity value and keeps the
+    number of monitoring dates of path-dependent payoffs."""
+
+    def __init__(self, valuation, max_elements=2 ** 22):
+        self.valuation = valuation
+        # bound on the array elements evaluated at once, scenarios are processed in chunks below it
+        self.max_elements = max_elements
+
+    def run(self, spot=(0.,), vol=(0.,), rate=(0.,), time=(0,), fixed_seed=True, barrier=None):
+        """
+        Revalue the option on all combinations of the shocks
+        :param spot: (list) relative shocks of the initial value, e.g. -0.1 for a 10% drop
+        :param vol: (list) absolute shocks of the volatility
+        :param rate: (list) parallel shifts of the short rate
+        :param time: (list) days the valuation date is moved forward
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param barrier: (float) barrier level for barrier options
+        :return: (ScenarioResult) present values labeled by the shocks
+        """
+        valuation = self.valuation
+        underlying = valuation.underlying
+        if not getattr(underlying, 'store_paths', True) or np.ndim(underlying.initial_value) != 0:
+            raise ValueError('Scenario grids need the stored paths of a single-asset simulation.')
+        if valuation.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        coords = {axis: np.asarray(shocks, dtype=float).ravel()
+                  for axis, shocks in zip(SCENARIO_AXES, (spot, vol, rate, time))}
+        paths = underlying.get_instrument_values(fixed_seed=fixed_seed)
+        time_index = valuation.maturity_index()
+        times = underlying.grid.get_year_fractions()[:time_index + 1]
+        maturity_time = times[-1]
+        initial_value, volatility = underlying.initial_value, underlying.volatility
+        curve = underlying.discount_curve
+        # payoffs of the maturity value only need the first and the last date
+        rows = [0, time_index] if valuation.payoff.functionals == ('maturity_value',) else slice(None)
+        times = times[rows]
+        # volatility-scaled Brownian part of the log paths
+        brownian = np.log(paths[:time_index + 1][rows] / initial_value) - \
+            (curve.integrated_rates(times) - 0.5 * volatility ** 2 * times)[:, np.newaxis]
+        shocks = np.array(list(itertools.product(coords['vol'], coords['rate'], coords['time'])), dtype=float)
+        sigma = volatility + shocks[:, 0]
+        fraction = 1. - shocks[:, 2] / day_count_basis(underlying.day_count) / maturity_time
+        if np.any(sigma <= 0.) or np.any(fraction <= 0.):
+            raise ValueError('Shocks must leave a positive volatility and time to maturity.')
+        spots = initial_value * (1. + coords['spot'])
+        increment('valuations')
+        path_number = paths.shape[1]
+        chunk = max(1, self.max_elements // (brownian.size + spots.size * path_number))
+        values = np.empty((spots.size, len(shocks)))
+        std_errors = np.empty_like(values)
+        for start in range(0, len(shocks), chunk):
+            part = slice(start, start + chunk)
+            scaled_times = fraction[part, np.newaxis] * times
+            drift = curve.integrated_rates(scaled_times) + shocks[part, 1:2] * scaled_times - \
+                0.5 * sigma[part, np.newaxis] ** 2 * scaled_times
+            with timed('paths'):
+                unit_paths = np.exp(drift[:, :, np.newaxis] + (sigma[part] / volatility * np.sqrt(fraction[part]))
+                                    [:, np.newaxis, np.newaxis] * brownian)
+            with timed('payoff'):
+                payoff = np.asarray(valuation.payoff(_SpotScaledStatistics(
+                    PathStatistics(unit_paths, unit_paths.shape[1] - 1), spots), valuation.strike, barrier),
+                    dtype=float)
+                payoff = np.broadcast_to(payoff, (spots.size, unit_paths.shape[0], path_number))
+            with timed('discount'):
+                maturity = fraction[part] * maturity_time
+                discount_factors = curve.discount_factors(maturity) * np.exp(-shocks[part, 1] * maturity)
+            values[:, part] = discount_factors * np.mean(payoff, axis=-1)
+            # antithetic paths are not independent, their pair means are
+            pairs = antithetic_samples(payoff)
+            std_errors[:, part] = discount_factors * np.std(pairs, axis=-1, ddof=1) / np.sqrt(pairs.shape[-1])
+        shape = tuple(len(coords[axis]) for axis in SCENARIO_AXES)
+        base = np.asarray(valuation.payoff(PathStatistics(paths, time_index), valuation.strike, barrier),
+                          dtype=float)
+        return ScenarioResult(values.reshape(shape), std_errors.reshape(shape), coords,
+                              valuation.discount_factor() * np.mean(base))
@@ -1,5 +1,10 @@
 import numpy as np
-import pandas as pd
+from derivatives import fingerprint
+from derivatives import make_generator
+from derivatives import TimeGrid
+from derivatives.instrumentation import timed
+from derivatives.random_streams import DEFAULT_SEED
+from derivatives.time_grid import date_range, to_datetime64
 
 
 class SimulationClass:
@@ -16,41 +21,98 @@ class SimulationClass:
             self.frequency = mar_env.get_constant('frequency')
             self.paths = mar_env.get_constant('paths')
             self.discount_curve = mar_env.get_curve('discount_curve')
-            self.time_grid = mar_env.get_list('time_grid')
+            # day-count convention of the year fractions of the time grid
+            self.day_count = mar_env.get_constant('day_count', 365.)
+            self.grid = None
+            self.time_grid = None
+            self._base_grid = None
+            if mar_env.get_list('time_grid') is not None:
+                self._set_grid(TimeGrid(mar_env.get_list('time_grid'), self.day_count))
             self.special_dates = mar_env.get_list('special_dates')
             if self.special_dates is None:
                 self.special_dates = []
             self.instrument_values = None
+            # number of path simulations of this object
+            self.simulation_count = 0
+            self._fingerprint = None
+            # True if instrument_values come from the fixed seed
+            self.fixed_seed_paths = False
+            # random numbers of this simulation, reproducible from seed_sequence in every process
+            seed = mar_env.get_constant('seed', None)
+            self.seed_sequence = np.random.SeedSequence(DEFAULT_SEED if seed is None else seed)
+            self.bit_generator = mar_env.get_constant('bit_generator', 'PCG64')
+            # stream advanced by every simulation without fixed seed, fresh OS entropy unless seeded
+            self.random_state = make_generator(None if seed is None else self.seed_sequence.spawn(1)[0],
+                                               self.bit_generator)
+            # False keeps only the path functionals valuations ask for, see generate_statistics
+            self.store_paths = mar_env.get_constant('store_paths', True)
+            # optional PathStore sharing fixed seed paths across processes
+            self.path_store = mar_env.get_constant('path_store', None)
         except Exception as error:
             print(f"Error parsing market environment.{error}")
 
+    def _set_grid(self, grid):
+        self.grid = grid
+        self.time_grid = grid.dates
+        self._fingerprint = None
+
     def generate_time_grid(self):
         start = self.pricing_date
         end = self.final_date
-        # pandas date_range function
-        time_grid = pd.date_range(start=start, end=end, freq=self.frequency).to_pydatetime()
-        time_grid = list(time_grid)
-        # enhance time_grid by start, end, and special_dates
-        if start not in time_grid:
-            time_grid.insert(0, start)
-            # insert start date if not in list
-        if end not in time_grid:
-            time_grid.append(end)
-            # insert end date if not in list
-        if len(self.special_dates) > 0:
-            # add all special dates
-            time_grid.extend(self.special_dates)
-            # delete duplicates
-            time_grid = list(set(time_grid))
-            # sort list
-            time_grid.sort()
-        self.time_grid = np.array(time_grid)
+        with timed('time_grid'):
+            if self._base_grid is None or self._base_grid[0] != (start, end, self.frequency):
+                # date_range function, only called once per start, end and frequency
+                dates = date_range(start, end, self.frequency)
+                # enhance time_grid by start and end
+                self._base_grid = ((start, end, self.frequency),
+                                   TimeGrid(np.concatenate((dates, to_datetime64([start, end]))), self.day_count))
+            # add all special dates, duplicates are dropped and the dates sorted
+            grid = self._base_grid[1].merge(self.special_dates) if self.special_dates else self._base_grid[1]
+        self._set_grid(grid)
+
+    def add_special_dates(self, *dates):
+        """
+        Add dates the simulation has to hit, merging them into an existing time grid
+        :param dates: (datetime) dates such as maturities
+        :return: (bool) True if the time grid changed, which discards the simulated paths
+        """
+        self.special_dates.extend(dates)
+        if self.grid is None:
+            return False
+        with timed('time_grid'):
+            grid = self.grid.merge(dates)
+        if grid is self.grid:
+            return False
+        self._set_grid(grid)
+        self.instrument_values = None
+        return True
+
+    def get_fingerprint(self):
+        """ Return a content hash of the simulation inputs, recomputed after update()."""
+        if self._fingerprint is None:
+            if self.time_grid is None:
+                self.generate_time_grid()
+            self._fingerprint = fingerprint(type(self).__name__, self.pricing_date, self.initial_value,
+                                            self.volatility, self.final_date, self.frequency, self.paths,
+                                            self.discount_curve, self.time_grid, self.day_count, self.seed_sequence,
+                                            self.bit_generator, getattr(self, 'dtype', None), self.store_paths)
+        return self._fingerprint
+
+    def get_random_state(self, fixed_seed=False):
+        """ Return a fresh generator on the seed of the simulation if fixed_seed,
+        the running stream of the simulation otherwise."""
+        if fixed_seed:
+            return make_generator(self.seed_sequence, self.bit_generator)
+        return self.random_state
 
     def get_instrument_values(self, fixed_seed=True):
+        if self.instrument_values is None and fixed_seed and self.path_store is not None:
+            # fixed seed paths are read from (or written to) the shared store
+            return self.path_store.get_instrument_values(self)
         if self.instrument_values is None:
             # only initiate simulation if there are no instrument values
-            self.generate_paths(fixed_seed=fixed_seed, day_count=365.)
+            self.generate_paths(fixed_seed=fixed_seed)
         elif fixed_seed is False:
             # also initiate re-simulation when fixed_seed is False
-            self.generate_paths(fixed_seed=fixed_seed, day_count=365.)
+            self.generate_paths(fixed_seed=fixed_seed)
         return self.instrument_values
@@ -1,21 +1,41 @@
 import numpy as np
+from derivatives.random_streams import DEFAULT_SEED
+
+# generator used when no random state is given, never touches the global numpy state
+_default_generator = np.random.default_rng()
 
 
 def sn_random_numbers(shape, antithetic=True, moment_matching=True,
-                      fixed_seed=False):
+                      fixed_seed=False, random_state=None, out=None):
     """ Returns an array of shape shape with (pseudo) random numbers
-    that are standard normally distributed. """
-    if fixed_seed:
-        np.random.seed(42)
+    that are standard normally distributed.
+    :param shape: (tuple) (n, M, paths), the first axis is dropped if n == 1
+    :param antithetic: (bool) pair every draw with its negative along the paths axis,
+        an odd number of paths leaves the last column unpaired
+    :param moment_matching: (bool) correct the draws to zero mean and unit standard deviation
+    :param fixed_seed: (bool) draw from a fresh generator seeded with DEFAULT_SEED if random_state is None
+    :param random_state: (np.random.Generator) generator to draw from
+    :param out: (np.array) C-contiguous buffer of shape shape, filled in place
+    :return: (np.array) random numbers, a view of out if given
+    """
+    if random_state is None:
+        random_state = np.random.default_rng(DEFAULT_SEED) if fixed_seed else _default_generator
+    if out is None:
+        out = np.empty(shape)
+    path_number = shape[-1]
     if antithetic:
-        random_dist = np.random.standard_normal((shape[0], shape[1], int(shape[2] / 2)))
-        random_dist = np.concatenate((random_dist, -random_dist), axis=2)
+        half = (path_number + 1) // 2
+        # each row is filled in place, the second half negates the first one
+        for row in out.reshape(-1, path_number):
+            random_state.standard_normal(out=row[:half], dtype=out.dtype)
+            np.negative(row[:path_number - half], out=row[half:])
     else:
-        random_dist = np.random.standard_normal(shape)
+        random_state.standard_normal(out=out, dtype=out.dtype)
     if moment_matching:
-        random_dist = random_dist - np.mean(random_dist)
-        random_dist = random_dist / np.std(random_dist)
+        out -= np.mean(out)
+        # standard deviation from the dot product, avoiding a temporary copy
+        out /= np.sqrt(np.vdot(out, out).real / out.size)
     if shape[0] == 1:
-        return random_dist[0]
+        return out[0]
     else:
-        return random_dist
+        return out
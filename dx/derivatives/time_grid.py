@@ -0,0 +1,88 @@
+# using usr/bin/python3
+import numpy as np
+
+# days per year of the supported day-count conventions
+DAY_COUNTS = {'ACT/365': 365., 'ACT/365F': 365., 'ACT/360': 360., 'ACT/365.25': 365.25}
+
+
+def to_datetime64(dates):
+    """ Return dates (datetime objects, strings or datetime64) as a datetime64[us] array."""
+    return np.asarray(dates, dtype='datetime64[us]')
+
+
+def day_count_basis(day_count):
+    """ Return the days per year of a day-count convention name or number."""
+    if isinstance(day_count, str):
+        try:
+            return DAY_COUNTS[day_count.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown day-count convention {day_count}.") from None
+    return float(day_count)
+
+
+def date_range(start, end, frequency):
+    """
+    Return the dates of a frequency from start to end, as pd.date_range
+    :param start: (datetime) first date
+    :param end: (datetime) last date
+    :param frequency: (str) pandas frequency, daily ('D'), month end ('M', 'ME') and year end
+        ('A', 'Y', 'YE') are built with NumPy, all others with pandas
+    :return: (np.array) datetime64[us] dates
+    """
+    start, end = np.datetime64(start, 'us'), np.datetime64(end, 'us')
+    first_day, last_day = start.astype('datetime64[D]'), end.astype('datetime64[D]')
+    # dates with a time of day are left to pandas
+    midnight = first_day == start and last_day == end
+    if midnight and frequency == 'D':
+        dates = np.arange(first_day, last_day + 1)
+    elif midnight and frequency in ('M', 'ME'):
+        months = np.arange(first_day.astype('datetime64[M]'), last_day.astype('datetime64[M]') + 1)
+        dates = (months + 1).astype('datetime64[D]') - 1
+    elif midnight and frequency in ('A', 'Y', 'YE', 'A-DEC', 'Y-DEC', 'YE-DEC'):
+        years = np.arange(first_day.astype('datetime64[Y]'), last_day.astype('datetime64[Y]') + 1)
+        dates = (years + 1).astype('datetime64[D]') - 1
+    else:
+        # pandas is optional and only loaded for other frequencies
+        import pandas as pd
+        return pd.date_range(start=start, end=end, freq=frequency).to_numpy(dtype='datetime64[us]')
+    dates = dates.astype('datetime64[us]')
+    return dates[(dates >= start) & (dates <= end)]
+
+
+class TimeGrid:
+    """ Class to hold the sorted, unique dates of a simulation as datetime64.
+
+    Year fractions from the first date are computed once per day-count
+    convention and index maps every date to its position, so looking up
+    a maturity doesn't scan the grid."""
+
+    def __init__(self, dates, day_count=365.):
+        self.dates = np.unique(to_datetime64(dates))
+        self.day_count = day_count_basis(day_count)
+        # whole days from the first date, as (date - start).days
+        self.days = ((self.dates - self.dates[0]) // np.timedelta64(1, 'D')).astype(float)
+        self.year_fractions = self.days / self.day_count
+        self.index = {date: position for position, date in enumerate(self.dates.tolist())}
+
+    def __len__(self):
+        return self.dates.size
+
+    def __contains__(self, date):
+        return np.datetime64(date, 'us').item() in self.index
+
+    def get_index(self, date):
+        """ Return the position of date in the grid, KeyError if it is not on the grid."""
+        return self.index[np.datetime64(date, 'us').item()]
+
+    def get_year_fractions(self, day_count=None):
+        """ Return the year fractions of the dates for another day-count convention."""
+        if day_count is None or day_count_basis(day_count) == self.day_count:
+            return self.year_fractions
+        return self.days / day_count_basis(day_count)
+
+    def merge(self, dates):
+        """ Return a grid with the additional dates, this grid if it has them all."""
+        dates = np.atleast_1d(to_datetime64(dates))
+        if all(date in self.index for date in dates.tolist()):
+            return self
+        return TimeGrid(np.concatenate((self.dates, dates)), self.day_count)
@@ -0,0 +1,67 @@
+# using usr/bin/python3
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ValuationCache:
+    """ Class to memoize valuation results under fingerprint keys.
+
+    Entries are evicted least recently used first once either the number of
+    entries or the bytes held by array results exceed their bounds. hits and
+    misses count the lookups."""
+
+    def __init__(self, maxsize=4096, max_bytes=2 ** 28):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _size(value):
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (tuple, list)):
+            return sum(ValuationCache._size(item) for item in value)
+        return 0
+
+    def get(self, key):
+        """ Return the cached value of key, None on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if isinstance(value, tuple):
+            # cached arrays are shared between callers, keep them read-only
+            for item in value:
+                if isinstance(item, np.ndarray):
+                    item.setflags(write=False)
+        if key in self._entries:
+            self.nbytes -= self._size(self._entries.pop(key))
+        self._entries[key] = value
+        self.nbytes += self._size(value)
+        while self._entries and (len(self._entries) > self.maxsize or self.nbytes > self.max_bytes):
+            __, evicted = self._entries.popitem(last=False)
+            self.nbytes -= self._size(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.nbytes}
+
+
+# cache shared by all valuations that don't bring their own
+valuation_cache = ValuationCache()
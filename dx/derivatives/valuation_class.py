@@ -1,8 +1,20 @@
 # using usr/bin/python3
+import numpy as np
+from derivatives import fingerprint
+from derivatives import get_year_deltas
+from derivatives import PathStatistics
+from derivatives import Payoff
+from derivatives import valuation_cache
+from derivatives.instrumentation import timed
+from derivatives.running_statistics import antithetic_samples
+from derivatives.time_grid import day_count_basis
+
+
 class ValuationClass:
     """Basic class for single-factor valuation."""
     def __init__(self, name, underlying, mar_env, payoff_func='', option_type='European'):
         self.option_type = option_type
+        self._fingerprint = None
         try:
             self.name = name
             self.pricing_date = mar_env.pricing_date
@@ -14,15 +26,19 @@ class ValuationClass:
             self.paths = underlying.paths
             self.discount_curve = underlying.discount_curve
             self.payoff_func = payoff_func
+            # compiled once, valuations only call the vectorized kernel
+            self.payoff = Payoff(payoff_func, option_type)
             self.underlying = underlying
+            # memoized results, None disables caching
+            self.cache = mar_env.get_constant('valuation_cache', valuation_cache)
             # provide pricing_date and maturity to underlying
-            self.underlying.special_dates.extend([self.pricing_date,
-                                                  self.maturity])
+            self.underlying.add_special_dates(self.pricing_date, self.maturity)
         except Exception as error:
             print(f"Error parsing market environment. {error}")
 
     def update(self, initial_value=None, volatility=None,
                strike=None, maturity=None):
+        self._fingerprint = None
         if initial_value is not None:
             self.underlying.update(initial_value=initial_value)
         if volatility is not None:
@@ -31,10 +47,62 @@ class ValuationClass:
             self.strike = strike
         if maturity is not None:
             self.maturity = maturity
-            # add new maturity date if not in time_grid
-            if not (maturity in self.underlying.time_grid):
-                self.underlying.special_dates.append(maturity)
-                self.underlying.instrument_values = None
+            # add new maturity date if not in time_grid, merged into an existing grid
+            self.underlying.add_special_dates(maturity)
+
+    def get_fingerprint(self):
+        """ Return a content hash of the valuation and its underlying, recomputed after update()."""
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(type(self).__name__, self.pricing_date, self.strike, self.maturity,
+                                            self.payoff, self.discount_curve)
+        return fingerprint(self._fingerprint, self.underlying.get_fingerprint())
+
+    def cache_key(self, method, fixed_seed, *args):
+        """
+        Return the cache key of a valuation call, None if its result is not reproducible
+        or depends on objects that can't be fingerprinted
+        :param method: (str) name of the valuation method
+        :param fixed_seed: (bool) only fixed seed valuations are deterministic
+        :param args: further arguments the result depends on
+        :return: (str) key or None
+        """
+        underlying = self.underlying
+        if self.cache is None or not fixed_seed or \
+                (underlying.instrument_values is not None and not underlying.fixed_seed_paths):
+            return None
+        try:
+            return fingerprint(method, self.get_fingerprint(), *args)
+        except TypeError:
+            return None
+
+    def path_statistics(self, time_index, fixed_seed=False, functionals=()):
+        """
+        Return the path functionals the payoff reads up to time_index
+        :param time_index: (int) position of the last date in the time grid of the underlying
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param functionals: (tuple) functionals needed besides those of the payoff
+        :return: (PathStatistics) of the stored paths, or (AccumulatedStatistics) if the
+            underlying doesn't store paths
+        """
+        if getattr(self.underlying, 'store_paths', True):
+            # per-path functionals (maturity value, mean, max, min) are evaluated lazily by the kernel
+            return PathStatistics(self.underlying.get_instrument_values(fixed_seed=fixed_seed), time_index)
+        # only the functionals asked for are accumulated, in O(paths) memory
+        functionals = tuple(dict.fromkeys(self.payoff.functionals + tuple(functionals)))
+        return self.underlying.generate_statistics(functionals, time_index, fixed_seed=fixed_seed)
+
+    def discount_factor(self):
+        """ Return the discount factor from maturity to the pricing date."""
+        with timed('discount'):
+            maturity_time = get_year_deltas((self.pricing_date, self.maturity),
+                                            day_count_basis(self.underlying.day_count))[-1]
+            return float(self.discount_curve.discount_factors(maturity_time))
+
+    def maturity_index(self):
+        """ Return the position of the maturity date in the time grid of the underlying."""
+        if self.underlying.time_grid is None:
+            self.underlying.generate_time_grid()
+        return self.underlying.grid.get_index(self.maturity)
 
     def delta(self, interval=None, accuracy=4):
         if interval is None:
@@ -43,12 +111,12 @@ class ValuationClass:
         # calculate left value for numerical Delta
         value_left = self.present_value(fixed_seed=True)
         # numerical underlying value for right value
-        initial_del = self.underlying.initial_value + interval
-        self.underlying.update(initial_value=initial_del)
+        initial_value = self.underlying.initial_value
+        self.underlying.update(initial_value=initial_value + interval)
         # calculate right value for numerical delta
         value_right = self.present_value(fixed_seed=True)
-        # reset the initial_value of the simulation object
-        self.underlying.update(initial_value=initial_del - interval)
+        # reset the initial_value of the simulation object exactly, keeping cache keys stable
+        self.underlying.update(initial_value=initial_value)
         delta = (value_right - value_left) / interval
         # correct for potential numerical errors
         if delta < -1.0:
@@ -65,12 +133,98 @@ class ValuationClass:
         # calculate the left value for numerical Vega
         value_left = self.present_value(fixed_seed=True)
         # numerical volatility value for right value
-        vol_del = self.underlying.volatility + interval
+        volatility = self.underlying.volatility
         # update the simulation object
-        self.underlying.update(volatility=vol_del)
+        self.underlying.update(volatility=volatility + interval)
         # calculate the right value for numerical Vega
         value_right = self.present_value(fixed_seed=True)
-        # reset volatility value of simulation object
-        self.underlying.update(volatility=vol_del - interval)
+        # reset volatility value of simulation object exactly, keeping cache keys stable
+        self.underlying.update(volatility=volatility)
         vega = (value_right - value_left) / interval
         return round(vega, accuracy)
+
+    def greeks(self, fixed_seed=True, barrier=None):
+        """
+        Return present value, delta, gamma and vega from a single simulation
+        Payoffs whose kernel provides pathwise derivatives (Lipschitz payoffs) use pathwise
+        delta and vega and the mixed pathwise/likelihood ratio gamma. All other payoffs
+        (digitals, barriers, expressions) use likelihood ratio weights of the geometric
+        Brownian motion. Underlyings that don't store paths only support payoffs of the
+        maturity value.
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param barrier: (float) barrier level for barrier options
+        :return: (dict) (estimate, standard error) keyed by 'present_value', 'delta', 'gamma' and 'vega'
+        """
+        if not getattr(self.underlying, 'store_paths', True) and self.payoff.functionals != ('maturity_value',):
+            raise ValueError('Greeks of path-dependent payoffs need the stored paths of the underlying.')
+        time_index = self.maturity_index()
+        samples = self.greek_samples(self.path_statistics(time_index, fixed_seed=fixed_seed), barrier, time_index)
+        discount_factor = self.discount_factor()
+        results = {}
+        for key, values in samples.items():
+            values = discount_factor * values
+            # antithetic paths are not independent, their pair means are
+            pairs = antithetic_samples(values)
+            results[key] = (np.mean(values), np.std(pairs, ddof=1) / np.sqrt(pairs.size))
+        return results
+
+    def greek_samples(self, stats, barrier=None, time_index=None):
+        """
+        Return the undiscounted per-path samples of payoff, delta, gamma and vega
+        :param stats: (PathStatistics) functionals of the paths up to maturity, or
+            (AccumulatedStatistics) for payoffs of the maturity value
+        :param barrier: (float) barrier level for barrier options
+        :param time_index: (int) position of maturity in the time grid, the last date of stats.paths if None
+        :return: (dict) arrays keyed by 'present_value', 'delta', 'gamma' and 'vega'
+        """
+        if time_index is None:
+            time_index = stats.paths.shape[0] - 1
+        payoff = np.asarray(self.payoff(stats, self.strike, barrier), dtype=float)
+        initial_value = self.underlying.initial_value
+        volatility = self.underlying.volatility
+        drift, diffusion = self.underlying.get_step_coefficients()
+        drift, diffusion = drift[:time_index], diffusion[:time_index]
+        terminal = self.payoff.functionals == ('maturity_value',)
+        # volatility-scaled Brownian increments (shocks) recovered from the paths
+        if terminal:
+            # a terminal payoff only depends on the total shock up to maturity
+            shocks = (np.log(stats.maturity_value / initial_value) - np.sum(drift))[np.newaxis]
+            variances = np.array([np.sum(diffusion ** 2)])
+        else:
+            shocks = np.diff(np.log(stats.paths), axis=0) - drift[:, np.newaxis]
+            variances = diffusion ** 2
+        # likelihood ratio weights, delta and gamma only see the first increment
+        first_shock, first_variance = shocks[0], variances[0]
+        delta_weight = first_shock / (initial_value * first_variance)
+        gamma_weight = (first_shock ** 2 / first_variance - first_shock - 1.) / (initial_value ** 2 * first_variance)
+        vega_weight = np.sum(shocks ** 2 / variances[:, np.newaxis] - 1. - shocks, axis=0) / volatility
+        derivatives = self.payoff.pathwise(stats, self.strike, barrier)
+        if derivatives is None:
+            delta = payoff * delta_weight
+            gamma = payoff * gamma_weight
+            vega = payoff * vega_weight
+            if not terminal:
+                # path functionals also read the initial value on the pricing date,
+                # its explicit effect is added by central differences on the first date
+                interval = initial_value * 1e-4
+                payoff_up, payoff_down = [np.asarray(self.payoff(PathStatistics(np.concatenate(
+                    (stats.paths[:1] + shift, stats.paths[1:])), time_index), self.strike, barrier), dtype=float)
+                    for shift in (interval, -interval)]
+                explicit_delta = (payoff_up - payoff_down) / (2. * interval)
+                explicit_gamma = (payoff_up - 2. * payoff + payoff_down) / interval ** 2
+                delta = delta + explicit_delta
+                gamma = gamma + 2. * explicit_delta * delta_weight + explicit_gamma
+        else:
+            # all path functionals are homogeneous of degree one in the initial value
+            delta = sum(derivative * getattr(stats, key) for key, derivative in derivatives.items()) / initial_value
+            gamma = delta * (delta_weight - 1. / initial_value)
+            # dS_t / dsigma = S_t (W_t - sigma t)
+            if terminal:
+                dpaths = stats.maturity_value * (shocks[0] - variances[0]) / volatility
+                dpaths = dpaths[np.newaxis]
+            else:
+                cumulated = np.concatenate(([0.], np.cumsum(drift + diffusion ** 2)))
+                dpaths = stats.paths * (np.log(stats.paths / initial_value) - cumulated[:, np.newaxis]) / volatility
+            vega = sum(derivative * stats.derivative(key, dpaths) for key, derivative in derivatives.items())
+        return {key: np.broadcast_to(np.asarray(value, dtype=float), payoff.shape)
+                for key, value in (('present_value', payoff), ('delta', delta), ('gamma', gamma), ('vega', vega))}
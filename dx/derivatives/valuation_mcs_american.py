@@ -0,0 +1,180 @@
+# using usr/bin/python3
+import numpy as np
+from numpy.polynomial import hermite_e, laguerre, legendre, polynomial
+
+from derivatives import ValuationClass
+from derivatives.instrumentation import timed, increment
+
+
+def _weighted_laguerre(x, degree):
+    # Laguerre polynomials weighted by exp(-x / 2) as in Longstaff and Schwartz (2001)
+    return np.exp(-0.5 * x)[:, np.newaxis] * laguerre.lagvander(x, degree)
+
+
+# regression bases, each maps (x, degree) to a design matrix of shape (len(x), degree + 1)
+BASIS_FUNCTIONS = {'polynomial': polynomial.polyvander,
+                   'laguerre': _weighted_laguerre,
+                   'hermite': hermite_e.hermevander,
+                   'legendre': legendre.legvander}
+
+
+class _ExerciseStatistics:
+    """ Functionals seen on an exercise date, only the current value of the underlying is known."""
+
+    def __init__(self, values):
+        self.maturity_value = values
+
+
+class ValuationAmericanMonteCarlo(ValuationClass):
+    """ Class to value American and Bermudan options by least-squares Monte Carlo (Longstaff-Schwartz).
+
+    payoff_func is a payoff of the current value of the underlying: a registered
+    kernel such as 'put' or 'call', a callable or an expression in maturity_value
+    and strike. option_type 'American' may exercise on every date of the time
+    grid of the underlying up to maturity (so the grid frequency sets how finely
+    early exercise is resolved), 'Bermudan' only on the list 'exercise_dates' of
+    mar_env. Continuation values are regressed on the basis functions of the
+    underlying value relative to the strike, using the in-the-money paths only."""
+
+    def __init__(self, name, underlying, mar_env, payoff_func='put', option_type='American',
+                 basis='polynomial', degree=5):
+        # the payoff itself is a plain function of the current value
+        super(ValuationAmericanMonteCarlo, self).__init__(name, underlying, mar_env, payoff_func)
+        if option_type not in ('American', 'Bermudan'):
+            raise ValueError(f"Unknown option type {option_type}.")
+        if self.payoff.functionals != ('maturity_value',):
+            raise ValueError('Early exercise needs a payoff of the current value (maturity_value) only.')
+        if not callable(basis) and basis not in BASIS_FUNCTIONS:
+            raise ValueError(f"Unknown basis functions {basis}.")
+        self.option_type = option_type
+        self.basis = basis
+        self.degree = degree
+        self.exercise_dates = mar_env.get_list('exercise_dates')
+        if option_type == 'Bermudan':
+            if not self.exercise_dates:
+                raise ValueError('Bermudan options need a list of exercise_dates.')
+            if min(self.exercise_dates) < self.pricing_date or max(self.exercise_dates) > self.maturity:
+                raise ValueError('Exercise dates must lie between pricing date and maturity.')
+            self.underlying.add_special_dates(*self.exercise_dates)
+
+    def exercise_indices(self):
+        """ Return the positions of the exercise dates in the time grid of the underlying, in ascending order."""
+        time_index = self.maturity_index()
+        if self.option_type == 'American':
+            start = self.underlying.grid.get_index(self.pricing_date)
+            return np.arange(start, time_index + 1)
+        # the option can always be exercised at maturity
+        return np.unique([self.underlying.grid.get_index(date) for date in self.exercise_dates] + [time_index])
+
+    def basis_matrix(self, values):
+        """
+        Return the regression design matrix of underlying values
+        :param values: (np.array) values of the underlying on one date
+        :return: (np.array) basis functions of values / strike, one row per value
+        """
+        x = np.asarray(values, dtype=float) / (self.strike if self.strike else self.underlying.initial_value)
+        basis = self.basis if callable(self.basis) else BASIS_FUNCTIONS[self.basis]
+        return basis(x, self.degree)
+
+    def continuation_value(self, values, cash_flows):
+        """
+        Return the continuation values fitted by least squares
+        :param values: (np.array) values of the underlying on the in-the-money paths
+        :param cash_flows: (np.array) future cash flows of these paths discounted to the date
+        :return: (np.array) fitted continuation values
+        """
+        with timed('regression'):
+            design = self.basis_matrix(values)
+            coefficients = np.linalg.lstsq(design, cash_flows, rcond=None)[0]
+            return design @ coefficients
+
+    def generate_cash_flows(self, fixed_seed=False, low_memory=True):
+        """
+        Return the optimally exercised cash flows of all paths by backward induction
+        low_memory keeps only the cash flows of the current and the next exercise
+        date, one vector per path; otherwise the exercise values of all dates are
+        evaluated in one call and the full (exercise dates, paths) cash flow
+        matrix is built. Both give the same values.
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param low_memory: (bool) keep two time slices of cash flows instead of the matrix
+        :return: (tuple) cash flows discounted to the pricing date and the exercise date
+            index per path, into exercise_indices() without the pricing date if it is an
+            exercise date (exercise on the pricing date is left to present_value)
+        """
+        paths = self.underlying.get_instrument_values(fixed_seed=fixed_seed)
+        indices = self.exercise_indices()
+        # the pricing date is handled by present_value, paths only decide on later dates
+        if indices[0] == self.underlying.grid.get_index(self.pricing_date):
+            indices = indices[1:]
+        with timed('discount'):
+            discount_factors = self.discount_curve.discount_factors(self.underlying.grid.year_fractions[indices])
+            # discount factors from each exercise date back to the previous one
+            step_factors = discount_factors[1:] / discount_factors[:-1]
+        last = len(indices) - 1
+        exercise_date = np.full(paths.shape[1], last)
+        if low_memory:
+            with timed('payoff'):
+                # copied, the cash flows are updated in place
+                cash_flows = np.array(self.payoff(_ExerciseStatistics(paths[indices[-1]]), self.strike), dtype=float)
+            for number in range(last - 1, -1, -1):
+                # cash flows of the next date seen from the current one
+                cash_flows *= step_factors[number]
+                values = paths[indices[number]]
+                with timed('payoff'):
+                    exercise_value = np.asarray(self.payoff(_ExerciseStatistics(values), self.strike), dtype=float)
+                itm = np.flatnonzero(exercise_value > 0.)
+                if itm.size == 0:
+                    continue
+                exercise = itm[exercise_value[itm] > self.continuation_value(values[itm], cash_flows[itm])]
+                cash_flows[exercise] = exercise_value[exercise]
+                exercise_date[exercise] = number
+            return discount_factors[0] * cash_flows, exercise_date
+        with timed('payoff'):
+            exercise_values = np.asarray(self.payoff(_ExerciseStatistics(paths[indices]), self.strike), dtype=float)
+        cash_flow_matrix = np.zeros_like(exercise_values)
+        cash_flow_matrix[-1] = exercise_values[-1]
+        columns = np.arange(paths.shape[1])
+        for number in range(last - 1, -1, -1):
+            itm = np.flatnonzero(exercise_values[number] > 0.)
+            if itm.size == 0:
+                continue
+            # each path has at most one cash flow, on its current exercise date
+            future = cash_flow_matrix[exercise_date[itm], itm] * \
+                discount_factors[exercise_date[itm]] / discount_factors[number]
+            continuation = self.continuation_value(paths[indices[number], itm], future)
+            exercise = itm[exercise_values[number, itm] > continuation]
+            cash_flow_matrix[exercise_date[exercise], exercise] = 0.
+            cash_flow_matrix[number, exercise] = exercise_values[number, exercise]
+            exercise_date[exercise] = number
+        return cash_flow_matrix[exercise_date, columns] * discount_factors[exercise_date], exercise_date
+
+    def present_value(self, accuracy=6, fixed_seed=False, full=False, low_memory=True):
+        """
+        Return the present value of the option under optimal early exercise
+        :param accuracy: (int) number of decimals
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param full: (bool) also return the discounted cash flows per path
+        :param low_memory: (bool) keep two time slices of cash flows instead of the matrix
+        :return: (float) present value, or (present value, cash flows) if full
+        """
+        increment('valuations')
+        key = self.cache_key('present_value', fixed_seed, accuracy, full, low_memory, self.option_type,
+                             self.exercise_dates, self.basis, self.degree)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                increment('cache_hits')
+                return cached
+        cash_flows, __ = self.generate_cash_flows(fixed_seed=fixed_seed, low_memory=low_memory)
+        result = np.sum(cash_flows) / len(cash_flows)
+        if self.exercise_indices()[0] == self.underlying.grid.get_index(self.pricing_date):
+            # immediate exercise on the pricing date
+            result = max(result, float(self.payoff(_ExerciseStatistics(self.underlying.initial_value),
+                                                   self.strike)))
+        if full:
+            result = round(result, accuracy), cash_flows
+        else:
+            result = round(result, accuracy)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
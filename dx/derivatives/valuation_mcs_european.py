@@ -1,14 +1,48 @@
+import copy
+import os
+import time
+
 import numpy as np
 
+from derivatives import block_generator
+from derivatives import BlackScholesChain
+from derivatives import norm_cdf
+from derivatives import MonteCarloEstimate
+from derivatives import PathStatistics
+from derivatives import RunningMoments
 from derivatives import ValuationClass
 from derivatives import plot_option_stats
+from derivatives.instrumentation import timed, increment
+from derivatives.running_statistics import antithetic_samples
+
+
+# valuation object of a worker process, set once by the pool initializer
+_worker_valuation = None
+
+
+def _init_worker(valuation):
+    global _worker_valuation
+    _worker_valuation = valuation
+
+
+def _block_payoff(valuation, block, path_number, time_index, barrier):
+    """ Return the payoffs of one block of paths drawn from the block stream of the underlying.
+    Draws are antithetic but not moment matched, so antithetic pairs are independent."""
+    underlying = valuation.underlying
+    random_state = block_generator(underlying.seed_sequence, block, underlying.bit_generator)
+    paths = underlying.simulate_paths(path_number, random_state, moment_matching=False)
+    with timed('payoff'):
+        return np.asarray(valuation.payoff(PathStatistics(paths, time_index), valuation.strike, barrier),
+                          dtype=float)
 
 
-def binary_classifier(value, strike):
-    if value >= strike:
-        return 1.0
-    else:
-        return 0.0
+def _value_block(block, path_number, time_index, barrier, valuation=None):
+    """ Return sample count, mean and sum of squared deviations of the antithetic samples of one block of paths."""
+    if valuation is None:
+        valuation = _worker_valuation
+    moments = RunningMoments()
+    moments.update(antithetic_samples(_block_payoff(valuation, block, path_number, time_index, barrier)))
+    return moments.count, moments.mean, moments.m2
 
 
 class ValuationEuropeanMonteCarlo(ValuationClass):
@@ -16,70 +50,223 @@ class ValuationEuropeanMonteCarlo(ValuationClass):
     by single-factor Monte Carlo simulation ( Just only for PUT and CALLS )."""
 
     def generate_payoff(self, barrier=None, fixed_seed=False):
-        strike = self.strike
-        option_type = self.option_type
         time_index = None
-        paths = self.underlying.get_instrument_values(fixed_seed=fixed_seed)
-        time_grid = self.underlying.time_grid
         try:
-            time_index = np.where(time_grid == self.maturity)[0]
-            time_index = int(time_index)
+            time_index = self.maturity_index()
         except Exception as error:
             print(f"Maturity date not in time grid of underlying. {error}")
-        # used on the payoff method
-        maturity_value = paths[time_index]
-        # average value over whole path
-        mean_value = np.mean(paths[:time_index], axis=1)
-        # maximum value over whole path
-        max_value = np.amax(paths[:time_index], axis=1)[-1]
-        # minimum value over whole path
-        min_value = np.amin(paths[:time_index], axis=1)[-1]
-        if option_type == 'European':
-            try:
-                payoff = eval(self.payoff_func)
-                return payoff
-            except Exception as error:
-                print(f"Maturity date not in time grid of underlying. {error}")
-        elif option_type == 'Binary':
-            try:
-                payoff = np.array([binary_classifier(value, strike) for value in maturity_value])
-                return payoff
-            except Exception as error:
-                print(f"Maturity date not in time grid of underlying. {error}")
-        elif option_type == 'KnockoutBarrier':
-            try:
-                flags = np.empty(np.shape(paths)[1])
-                for i in range(np.shape(paths)[1]):
-                    if np.amax(paths[:, i]) > barrier:
-                        flags[i] = 0
-                    else:
-                        flags[i] = 1
-                payoff = (eval(self.payoff_func) @ flags) / np.shape(paths)[0]
-                return payoff
-            except Exception as error:
-                print(f"Maturity date not in time grid of underlying. {error}")
-        elif option_type == 'KnockinBarrier':
-            try:
-                flags = np.empty(np.shape(paths)[1])
-                for i in range(np.shape(paths)[1]):
-                    if np.amax(paths[:, i]) > barrier:
-                        flags[i] = 1
-                    else:
-                        flags[i] = 0
-                payoff = (eval(self.payoff_func) @ flags) / np.shape(paths)[0]
-                return payoff
-            except Exception as error:
-                print(f"Maturity date not in time grid of underlying. {error}")
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        stats = self.path_statistics(time_index, fixed_seed=fixed_seed)
+        with timed('payoff'):
+            return self.payoff(stats, self.strike, barrier)
 
     def present_value(self, accuracy=6, fixed_seed=False, full=False, barrier=None):
+        increment('valuations')
+        key = self.cache_key('present_value', fixed_seed, accuracy, full, barrier)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                increment('cache_hits')
+                return cached
         cash_flow = self.generate_payoff(fixed_seed=fixed_seed, barrier=barrier)
-        discount_factor = self.discount_curve.get_discount_factors(
-            (self.pricing_date, self.maturity))[0, 1]
+        discount_factor = self.discount_factor()
         result = discount_factor * np.sum(cash_flow) / len(cash_flow)
         if full:
-            return round(result, accuracy), discount_factor * cash_flow
+            result = round(result, accuracy), discount_factor * cash_flow
         else:
-            return round(result, accuracy)
+            result = round(result, accuracy)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def present_value_parallel(self, accuracy=6, barrier=None, workers=None, block_size=2 ** 16, full=False):
+        """
+        Return the present value with paths simulated in blocks across a process pool
+        Blocks have a fixed size and each one draws from its own stream spawned from the
+        seed of the underlying. Block moments are merged in block order, so the result
+        is identical for any number of workers.
+        :param accuracy: (int) number of decimals
+        :param barrier: (float) barrier level for barrier options
+        :param workers: (int) number of processes, os.cpu_count() if None, in-process if 1
+        :param block_size: (int) number of paths per block
+        :param full: (bool) also return the standard error
+        :return: (float) present value, (tuple) with the standard error if full
+        """
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        if self.underlying.time_grid is None:
+            self.underlying.generate_time_grid()
+        time_index = self.maturity_index()
+        blocks = [min(block_size, self.paths - start) for start in range(0, self.paths, block_size)]
+        workers = os.cpu_count() if workers is None else workers
+        if workers == 1 or len(blocks) == 1:
+            partial = [_value_block(block, path_number, time_index, barrier, valuation=self)
+                       for block, path_number in enumerate(blocks)]
+        else:
+            # ship the valuation once per worker, without simulated paths
+            valuation = copy.copy(self)
+            valuation.underlying = copy.copy(self.underlying)
+            valuation.underlying.instrument_values = None
+            # nor the result cache
+            valuation.cache = None
+            # multiprocessing is only loaded for parallel valuations
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(workers, len(blocks)), initializer=_init_worker,
+                                     initargs=(valuation,)) as pool:
+                partial = list(pool.map(_value_block, range(len(blocks)), blocks,
+                                        [time_index] * len(blocks), [barrier] * len(blocks)))
+        moments = RunningMoments()
+        for count, mean, m2 in partial:
+            moments.merge(count, mean, m2)
+        discount_factor = self.discount_factor()
+        result = round(discount_factor * moments.mean, accuracy)
+        if full:
+            return result, discount_factor * moments.std_error
+        return result
+
+    def present_value_streaming(self, chunk_size=2 ** 16, max_paths=None, target_std_error=None, time_budget=None,
+                                confidence=0.95, barrier=None):
+        """
+        Return the present value simulated and priced chunk by chunk
+        Only one chunk of paths is held in memory. Mean and variance of the
+        antithetic pair means of the payoffs (independent samples, see
+        antithetic_samples) are updated after each chunk, and the simulation stops
+        early once the target standard error or the time budget is reached.
+        Chunk i draws from the same stream as block i of present_value_parallel.
+        :param chunk_size: (int) number of paths per chunk
+        :param max_paths: (int) maximum number of paths, paths of the underlying if None
+        :param target_std_error: (float) stop once the standard error of the present value is below
+        :param time_budget: (float) stop after this many seconds
+        :param confidence: (float) level of the confidence interval
+        :param barrier: (float) barrier level for barrier options
+        :return: (MonteCarloEstimate) present value, standard error and confidence interval
+        """
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        if self.underlying.time_grid is None:
+            self.underlying.generate_time_grid()
+        max_paths = self.paths if max_paths is None else max_paths
+        time_index = self.maturity_index()
+        discount_factor = self.discount_factor()
+        moments = RunningMoments()
+        start = time.perf_counter()
+        block = 0
+        paths = 0
+        while paths < max_paths:
+            path_number = min(chunk_size, max_paths - paths)
+            moments.update(antithetic_samples(_block_payoff(self, block, path_number, time_index, barrier)))
+            paths += path_number
+            block += 1
+            if target_std_error is not None and moments.count > 1 and \
+                    discount_factor * moments.std_error <= target_std_error:
+                break
+            if time_budget is not None and time.perf_counter() - start >= time_budget:
+                break
+        converged = target_std_error is None or discount_factor * moments.std_error <= target_std_error
+        return MonteCarloEstimate(discount_factor * moments.mean, discount_factor * moments.std_error,
+                                  paths, confidence=confidence, converged=converged)
+
+    def present_value_qmc(self, replications=16, path_number=None, confidence=0.95, barrier=None):
+        """
+        Return the present value from randomized quasi-Monte Carlo
+        Each replication prices independently scrambled Sobol paths built with a
+        Brownian bridge over the time grid of the underlying. The spread of the
+        replication values gives the standard error.
+        :param replications: (int) number of independent scramblings
+        :param path_number: (int) paths per replication, the largest power of 2 up to
+            paths / replications if None
+        :param confidence: (float) level of the confidence interval
+        :param barrier: (float) barrier level for barrier options
+        :return: (MonteCarloEstimate) present value, standard error and confidence interval
+        """
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        if path_number is None:
+            path_number = 2 ** int(np.log2(max(self.paths // replications, 2)))
+        underlying = self.underlying
+        if underlying.time_grid is None:
+            underlying.generate_time_grid()
+        time_index = self.maturity_index()
+        discount_factor = self.discount_factor()
+        values = np.empty(replications)
+        for replication in range(replications):
+            random_state = block_generator(underlying.seed_sequence, replication, underlying.bit_generator)
+            random_numbers = underlying.quasi_random_numbers(path_number, random_state)
+            paths = underlying.simulate_paths(path_number, None, random_numbers=random_numbers)
+            values[replication] = np.mean(self.payoff(PathStatistics(paths, time_index), self.strike, barrier))
+        values *= discount_factor
+        return MonteCarloEstimate(np.mean(values), np.std(values, ddof=1) / np.sqrt(replications),
+                                  replications * path_number, confidence=confidence)
+
+    def geometric_asian_value(self):
+        """ Return the undiscounted expected payoff of a call on the discrete geometric
+        average of the underlying over the time grid up to maturity."""
+        time_index = self.maturity_index()
+        drift, diffusion = self.underlying.get_step_coefficients()
+        # mean and variance of the log-average, the log-paths are Gaussian
+        mean_drift = np.concatenate(([0.], np.cumsum(drift[:time_index])))
+        variances = np.concatenate(([0.], np.cumsum(diffusion[:time_index] ** 2)))
+        dates = time_index + 1
+        # covariance of two dates is the variance of the earlier one
+        pairs = 2 * (dates - np.arange(dates)) - 1
+        mean = np.log(self.underlying.initial_value) + np.mean(mean_drift)
+        variance = np.sum(pairs * variances) / dates ** 2
+        d1 = (mean - np.log(self.strike) + variance) / np.sqrt(variance)
+        return np.exp(mean + 0.5 * variance) * norm_cdf(d1) - self.strike * norm_cdf(d1 - np.sqrt(variance))
+
+    def present_value_cv(self, controls=('underlying', 'vanilla'), fixed_seed=False, confidence=0.95, barrier=None):
+        """
+        Return the present value with control variates on the same paths
+        Controls are the discounted underlying at maturity (mean: initial value),
+        the discounted vanilla call on the strike (mean: Black-Scholes price) and the
+        discounted geometric average call over the time grid (mean: closed form for
+        the discrete geometric average). The coefficients are the least squares
+        regression of the payoffs on the controls.
+        :param controls: (tuple) any of 'underlying', 'vanilla' and 'geometric_asian'
+        :param fixed_seed: (bool) use the fixed seed paths of the underlying
+        :param confidence: (float) level of the confidence interval
+        :param barrier: (float) barrier level for barrier options
+        :return: (MonteCarloEstimate) present value, standard error and variance reduction factor
+        """
+        if self.option_type in ('KnockoutBarrier', 'KnockinBarrier') and barrier is None:
+            raise ValueError('Barrier options need a barrier level.')
+        # the controls read the maturity value and geometric average of the same paths
+        functionals = ('maturity_value', 'geometric_mean') if 'geometric_asian' in controls else ('maturity_value',)
+        time_index = self.maturity_index()
+        stats = self.path_statistics(time_index, fixed_seed=fixed_seed, functionals=functionals)
+        with timed('payoff'):
+            cash_flow = self.payoff(stats, self.strike, barrier)
+        discount_factor = self.discount_factor()
+        samples = discount_factor * np.asarray(cash_flow, dtype=float)
+        maturity_value = stats.maturity_value
+        initial_value = self.underlying.initial_value
+        # time to maturity of the simulated paths, in the day-count convention of the underlying
+        maturity_time = self.underlying.grid.get_year_fractions()[time_index]
+        columns, means = [], []
+        for control in controls:
+            if control == 'underlying':
+                columns.append(discount_factor * maturity_value)
+                means.append(initial_value)
+            elif control == 'vanilla':
+                columns.append(discount_factor * np.maximum(maturity_value - self.strike, 0.))
+                # rate implied by the discount factor to maturity
+                means.append(BlackScholesChain(initial_value, self.strike, maturity_time,
+                                               -np.log(discount_factor) / maturity_time,
+                                               self.underlying.volatility).price)
+            elif control == 'geometric_asian':
+                columns.append(discount_factor * np.maximum(stats.geometric_mean - self.strike, 0.))
+                means.append(discount_factor * self.geometric_asian_value())
+            else:
+                raise ValueError(f"Unknown control variate {control}.")
+        centered = np.column_stack(columns) - np.array(means, dtype=float)
+        # optimal coefficients, regression of the samples on the centered controls
+        coefficients = np.linalg.lstsq(centered - centered.mean(axis=0), samples - samples.mean(), rcond=None)[0]
+        adjusted = samples - centered @ coefficients
+        degrees = samples.size - len(controls) - 1
+        variance = np.sum((adjusted - adjusted.mean()) ** 2) / degrees
+        return MonteCarloEstimate(np.mean(adjusted), np.sqrt(variance / samples.size), samples.size,
+                                  confidence=confidence, variance_reduction=np.var(samples, ddof=1) / variance)
 
     def generate_plot(self, initial_value, final_value, increase):
         s_list = np.arange(initial_value, final_value, increase)
@@ -0,0 +1,59 @@
+# using usr/bin/python3
+import numpy as np
+from derivatives import MultiAssetStatistics
+from derivatives import ValuationClass
+from derivatives.instrumentation import timed, increment
+
+
+class ValuationMultiAssetMonteCarlo(ValuationClass):
+    """ Class to value European options on several assets of a CorrelatedGeometricBrownianMotion.
+
+    payoff_func is a registered multi-asset kernel ('basket_call', 'basket_put',
+    'spread_call', 'spread_put', 'worst_of_call', 'worst_of_put',
+    'best_of_call'), a callable of MultiAssetStatistics or an expression in
+    the functionals of MultiAssetStatistics. mar_env may provide the constant
+    'basket_weights', equal weights otherwise."""
+
+    def __init__(self, name, underlying, mar_env, payoff_func='basket_call', option_type='European'):
+        if option_type != 'European':
+            raise ValueError('Multi-asset options are European only.')
+        super(ValuationMultiAssetMonteCarlo, self).__init__(name, underlying, mar_env, payoff_func, option_type)
+        self.weights = mar_env.get_constant('basket_weights', None)
+
+    def generate_payoff(self, fixed_seed=False):
+        paths = self.underlying.get_instrument_values(fixed_seed=fixed_seed)
+        stats = MultiAssetStatistics(paths, self.maturity_index(), self.weights)
+        # all assets and paths in one vectorized evaluation
+        with timed('payoff'):
+            return np.asarray(self.payoff(stats, self.strike), dtype=float)
+
+    def present_value(self, accuracy=6, fixed_seed=False, full=False):
+        increment('valuations')
+        key = self.cache_key('present_value', fixed_seed, accuracy, full, self.weights)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                increment('cache_hits')
+                return cached
+        cash_flow = self.generate_payoff(fixed_seed=fixed_seed)
+        discount_factor = self.discount_factor()
+        result = discount_factor * np.sum(cash_flow) / len(cash_flow)
+        if full:
+            result = round(result, accuracy), discount_factor * cash_flow
+        else:
+            result = round(result, accuracy)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def delta(self, interval=None, accuracy=4):
+        raise NotImplementedError('Delta of multi-asset options is per asset, bump one initial value of the '
+                                  'underlying with update() and revalue.')
+
+    def vega(self, interval=0.01, accuracy=4):
+        raise NotImplementedError('Vega of multi-asset options is per asset, bump one volatility of the '
+                                  'underlying with update() and revalue.')
+
+    def greeks(self, fixed_seed=True, barrier=None):
+        raise NotImplementedError('Likelihood ratio and pathwise greeks are single-asset only, bump the '
+                                  'initial values or volatilities of the underlying with update() and revalue.')
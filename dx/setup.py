@@ -8,4 +8,7 @@ setup(name='derivatives',
       author_email='vinirsz@hotmail.com',
       license='MIT',
       packages=['derivatives'],
+      # the numerical core only needs numpy
+      install_requires=['numpy'],
+      extras_require={'plot': ['matplotlib'], 'qmc': ['scipy'], 'pandas': ['pandas']},
       zip_safe=False)
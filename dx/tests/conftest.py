@@ -0,0 +1,48 @@
+# using usr/bin/python3
+import datetime as dt
+import os
+import sys
+
+import pytest
+
+# the package is imported as derivatives from the dx directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from derivatives import ConstantShortRate, MarketEnvironment  # noqa: E402
+
+PRICING_DATE = dt.datetime(2020, 1, 1)
+MATURITY = dt.datetime(2020, 12, 31)
+
+
+def gbm_environment(initial_value=36., volatility=0.2, rate=0.06, paths=10000, frequency='M', **constants):
+    """ Return the market environment of a geometric Brownian motion over 2020."""
+    mar_env = MarketEnvironment('me_gbm', PRICING_DATE)
+    mar_env.add_constant('initial_value', initial_value)
+    mar_env.add_constant('volatility', volatility)
+    mar_env.add_constant('final_date', MATURITY)
+    mar_env.add_constant('currency', 'EUR')
+    mar_env.add_constant('frequency', frequency)
+    mar_env.add_constant('paths', paths)
+    for key, value in constants.items():
+        mar_env.add_constant(key, value)
+    mar_env.add_curve('discount_curve', ConstantShortRate('csr', rate))
+    return mar_env
+
+
+def option_environment(strike=40., maturity=MATURITY):
+    """ Return the market environment of an option maturing at the end of 2020."""
+    mar_env = MarketEnvironment('me_option', PRICING_DATE)
+    mar_env.add_constant('strike', strike)
+    mar_env.add_constant('maturity', maturity)
+    mar_env.add_constant('currency', 'EUR')
+    return mar_env
+
+
+@pytest.fixture
+def gbm_env():
+    return gbm_environment
+
+
+@pytest.fixture
+def option_env():
+    return option_environment
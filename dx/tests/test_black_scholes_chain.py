@@ -0,0 +1,42 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import BlackScholesChain
+
+ASSET_PRICE = np.array([80., 100., 120., 100.])
+STRIKE = np.array([100., 100., 90., 110.])
+MATURITY_TIME = np.array([0.5, 1., 2., 0.25])
+RATE = np.array([0.01, 0.05, 0.03, -0.01])
+SIGMA = np.array([0.3, 0.2, 0.25, 0.4])
+OPTION_TYPE = np.array(['eurocall', 'europut', 'eurocall', 'europut'])
+
+
+def _price(asset_price=ASSET_PRICE, maturity_time=MATURITY_TIME, rate=RATE, sigma=SIGMA):
+    return BlackScholesChain(asset_price, STRIKE, maturity_time, rate, sigma, OPTION_TYPE).price
+
+
+def test_call_and_put_reference_prices():
+    chain = BlackScholesChain(100., 100., 1., 0.05, 0.2, ['eurocall', 'europut'])
+    np.testing.assert_allclose(chain.price, [10.450584, 5.573526], atol=1e-6)
+
+
+def test_greeks_match_finite_differences():
+    greeks = BlackScholesChain(ASSET_PRICE, STRIKE, MATURITY_TIME, RATE, SIGMA, OPTION_TYPE).greeks()
+    h = 1e-4
+    np.testing.assert_allclose(greeks['price'], _price())
+    np.testing.assert_allclose(greeks['delta'], (_price(ASSET_PRICE + h) - _price(ASSET_PRICE - h)) / (2 * h),
+                               rtol=1e-6)
+    np.testing.assert_allclose(greeks['gamma'], (_price(ASSET_PRICE + 1e-2) - 2 * _price()
+                                                 + _price(ASSET_PRICE - 1e-2)) / 1e-4, rtol=1e-4)
+    np.testing.assert_allclose(greeks['vega'], (_price(sigma=SIGMA + h) - _price(sigma=SIGMA - h)) / (2 * h),
+                               rtol=1e-6)
+    np.testing.assert_allclose(greeks['rho'], (_price(rate=RATE + h) - _price(rate=RATE - h)) / (2 * h), rtol=1e-6)
+    # theta is the derivative in calendar time, a shorter time to maturity
+    np.testing.assert_allclose(greeks['theta'], -(_price(maturity_time=MATURITY_TIME + h)
+                                                  - _price(maturity_time=MATURITY_TIME - h)) / (2 * h), rtol=1e-6)
+
+
+def test_unknown_option_type_is_rejected():
+    with pytest.raises(ValueError):
+        BlackScholesChain(100., 100., 1., 0.05, 0.2, 'american')
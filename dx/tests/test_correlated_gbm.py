@@ -0,0 +1,41 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import CorrelatedGeometricBrownianMotion, ValuationMultiAssetMonteCarlo
+
+from conftest import gbm_environment, option_environment
+
+CORRELATION = np.array([[1., 0.6, -0.3], [0.6, 1., 0.2], [-0.3, 0.2, 1.]])
+
+
+def correlated_environment(paths=20000):
+    mar_env = gbm_environment(initial_value=np.array([36., 40., 44.]), volatility=np.array([0.2, 0.3, 0.25]),
+                              paths=paths, correlation_matrix=CORRELATION)
+    mar_env.add_list('asset_names', ['a', 'b', 'c'])
+    return mar_env
+
+
+def test_sample_correlation_of_log_increments_matches_input():
+    gbm = CorrelatedGeometricBrownianMotion('cgbm', correlated_environment())
+    paths = gbm.get_instrument_values(fixed_seed=True)
+    assert paths.shape == (3, len(gbm.time_grid), 20000)
+    increments = np.diff(np.log(paths), axis=1)
+    for step in range(increments.shape[1]):
+        np.testing.assert_allclose(np.corrcoef(increments[:, step]), CORRELATION, atol=0.03)
+
+
+def test_invalid_correlation_matrix_is_rejected():
+    mar_env = correlated_environment()
+    mar_env.add_constant('correlation_matrix', np.array([[1., 0.9, 0.9], [0.9, 1., -0.9], [0.9, -0.9, 1.]]))
+    with pytest.raises(ValueError):
+        CorrelatedGeometricBrownianMotion('cgbm', mar_env)
+
+
+@pytest.mark.parametrize('greek', ['delta', 'vega', 'greeks'])
+def test_single_asset_greeks_are_not_implemented(greek):
+    gbm = CorrelatedGeometricBrownianMotion('cgbm', correlated_environment(paths=1000))
+    valuation = ValuationMultiAssetMonteCarlo('basket', gbm, option_environment(), 'basket_call')
+    assert valuation.present_value(fixed_seed=True) > 0.
+    with pytest.raises(NotImplementedError):
+        getattr(valuation, greek)()
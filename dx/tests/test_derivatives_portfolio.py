@@ -0,0 +1,26 @@
+# using usr/bin/python3
+import datetime as dt
+
+import pytest
+
+from derivatives import DerivativesPortfolio, DerivativesPosition, GeometricBrownianMotion
+
+POSITIONS = [('long_call', 2., 40., 'call', None), ('short_put', -1., 36., 'put', None),
+             ('short_call', -1., 34., 'call', dt.datetime(2020, 6, 30)),
+             ('asian', 3., 36., 'asian_call', dt.datetime(2020, 6, 30))]
+
+
+def test_book_greeks_are_the_sums_of_the_position_greeks(gbm_env, option_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=5000))
+    portfolio = DerivativesPortfolio('book', gbm)
+    for name, quantity, strike, payoff_func, maturity in POSITIONS:
+        mar_env = option_env(strike=strike) if maturity is None else option_env(strike=strike, maturity=maturity)
+        portfolio.add_position(DerivativesPosition(name, quantity, mar_env, payoff_func))
+    positions, book = portfolio.get_values()
+    for key, (value, __) in book.items():
+        assert value == pytest.approx(sum(position[key][0] for position in positions.values()), abs=1e-9)
+    # each position agrees with its own valuation on the same paths, scaled by the quantity
+    for name, quantity, *__ in POSITIONS:
+        greeks = portfolio.valuations[name].greeks()
+        for key, (value, __) in positions[name].items():
+            assert value == pytest.approx(quantity * greeks[key][0], rel=1e-9, abs=1e-12)
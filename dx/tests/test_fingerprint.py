@@ -0,0 +1,41 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import GeometricBrownianMotion, Payoff, ValuationEuropeanMonteCarlo, fingerprint
+
+
+def _call_payoff(strike):
+    def payoff(stats, __, barrier=None):
+        return np.maximum(stats.maturity_value - strike, 0.)
+    return payoff
+
+
+def test_functions_differ_by_code_defaults_and_closure():
+    assert fingerprint(lambda x: x + 1) != fingerprint(lambda x: x + 2)
+    assert fingerprint(lambda x, y=1: x + y) != fingerprint(lambda x, y=2: x + y)
+    assert fingerprint(_call_payoff(80.)) != fingerprint(_call_payoff(120.))
+    assert fingerprint(_call_payoff(80.)) == fingerprint(_call_payoff(80.))
+
+
+def test_expression_payoffs_differ():
+    assert fingerprint(Payoff('maturity_value * 2')) != fingerprint(Payoff('maturity_value * 3'))
+    assert fingerprint(Payoff('maturity_value * 2')) == fingerprint(Payoff('maturity_value * 2'))
+
+
+def test_closure_payoffs_do_not_share_cached_values(gbm_env, option_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(initial_value=100., paths=5000))
+    values = []
+    for strike in (80., 120.):
+        valuation = ValuationEuropeanMonteCarlo('call', gbm, option_env(), _call_payoff(strike))
+        values.append(valuation.present_value(fixed_seed=True))
+        valuation.cache = None
+        assert valuation.present_value(fixed_seed=True) == values[-1]
+    assert values[0] > values[1]
+
+
+def test_unfingerprintable_arguments_are_not_cached(gbm_env, option_env):
+    valuation = ValuationEuropeanMonteCarlo('call', GeometricBrownianMotion('gbm', gbm_env()), option_env(), 'call')
+    with pytest.raises(TypeError):
+        fingerprint(object.__new__(type('Slotted', (), {'__slots__': ()})))
+    assert valuation.cache_key('present_value', True, object.__new__(type('Slotted', (), {'__slots__': ()}))) is None
@@ -0,0 +1,25 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import GeometricBrownianMotion
+
+
+def test_paths_follow_the_lognormal_law(gbm_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=50000, frequency='M'))
+    paths = gbm.get_instrument_values(fixed_seed=True)
+    times = gbm.grid.get_year_fractions()
+    assert paths.shape == (len(gbm.time_grid), 50000)
+    assert np.all(paths[0] == 36.)
+    log_returns = np.log(paths[-1] / paths[0])
+    # drift and diffusion of a geometric Brownian motion with r = 6% and sigma = 20%
+    assert np.mean(log_returns) == pytest.approx((0.06 - 0.5 * 0.2 ** 2) * times[-1], abs=1e-3)
+    assert np.std(log_returns) == pytest.approx(0.2 * np.sqrt(times[-1]), rel=1e-2)
+    assert np.mean(paths[-1]) * np.exp(-0.06 * times[-1]) == pytest.approx(36., rel=2e-3)
+
+
+def test_fixed_seed_paths_are_reused_and_running_paths_are_not(gbm_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=1000, seed=5))
+    fixed = gbm.get_instrument_values(fixed_seed=True)
+    assert gbm.get_instrument_values(fixed_seed=True) is fixed
+    assert not np.array_equal(gbm.get_instrument_values(fixed_seed=False), fixed)
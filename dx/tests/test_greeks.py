@@ -0,0 +1,26 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import BlackScholesChain, GeometricBrownianMotion, ValuationEuropeanMonteCarlo
+
+
+def test_put_greeks_match_black_scholes(gbm_env, option_env):
+    valuation = ValuationEuropeanMonteCarlo('put', GeometricBrownianMotion('gbm', gbm_env(paths=50000)),
+                                            option_env(), 'put')
+    greeks = valuation.greeks()
+    maturity_time = valuation.underlying.grid.get_year_fractions()[valuation.maturity_index()]
+    # the monthly grid gives the exact law of the maturity value
+    expected = BlackScholesChain(36., 40., maturity_time, 0.06, 0.2, 'europut')
+    for key, value in (('present_value', expected.price), ('delta', expected.delta), ('gamma', expected.gamma),
+                       ('vega', expected.vega)):
+        assert greeks[key][0] == pytest.approx(value, abs=4 * greeks[key][1])
+
+
+@pytest.mark.parametrize('payoff_func', ['put', 'digital_call'])
+def test_std_errors_match_spread_across_seeds(gbm_env, option_env, payoff_func):
+    estimates = [ValuationEuropeanMonteCarlo('option', GeometricBrownianMotion('gbm', gbm_env(paths=4000, seed=seed)),
+                                             option_env(), payoff_func).greeks() for seed in range(30)]
+    for key in ('present_value', 'vega'):
+        spread = np.std([greeks[key][0] for greeks in estimates], ddof=1)
+        assert 0.6 < spread / np.mean([greeks[key][1] for greeks in estimates]) < 1.6
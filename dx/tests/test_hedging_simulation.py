@@ -0,0 +1,32 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import BlackScholesChain, GeometricBrownianMotion, HedgingSimulation
+
+
+def _simulation(gbm_env, frequency):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=4000, frequency=frequency))
+    paths = gbm.get_instrument_values(fixed_seed=True)
+    times = gbm.grid.get_year_fractions()
+    return HedgingSimulation(paths.T, times, 40., times[-1], 0.06, 0.2, 'eurocall')
+
+
+def test_costless_delta_hedge_replicates_the_option_value(gbm_env):
+    daily = _simulation(gbm_env, 'D')
+    result = daily.delta_hedge()
+    premium = BlackScholesChain(36., 40., daily.maturity_time, 0.06, 0.2).price
+    assert np.allclose(result.premium, premium)
+    statistics = result.statistics()
+    assert abs(statistics['mean']) < 0.05 * premium
+    assert statistics['relative_std'] < 0.2
+    assert statistics['costs'] == 0.
+    # the hedging error shrinks with the rebalancing frequency
+    assert statistics['std'] < _simulation(gbm_env, 'W').delta_hedge().statistics()['std']
+
+
+def test_transaction_costs_lower_the_pnl(gbm_env):
+    simulation = _simulation(gbm_env, 'W')
+    costless, costly = simulation.delta_hedge(), simulation.delta_hedge(transaction_cost=0.01)
+    assert np.mean(costly.costs) > 0.
+    assert np.mean(costly.pnl) == pytest.approx(np.mean(costless.pnl) - np.mean(costly.costs), abs=0.05)
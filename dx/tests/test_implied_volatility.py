@@ -0,0 +1,24 @@
+# using usr/bin/python3
+import numpy as np
+
+from derivatives import BlackScholesChain, implied_volatility
+
+
+def test_converged_volatilities_are_accurate_on_a_random_chain():
+    rng = np.random.default_rng(0)
+    size = 20000
+    strike = rng.uniform(40., 200., size)
+    maturity_time = rng.uniform(0.01, 3., size)
+    rate = rng.uniform(-0.01, 0.08, size)
+    sigma = rng.uniform(0.05, 1.2, size)
+    is_call = rng.random(size) < 0.5
+    price = BlackScholesChain(100., strike, maturity_time, rate, sigma, is_call).price
+    volatility, converged = implied_volatility(price, 100., strike, maturity_time, rate, is_call, sigma_tol=1e-8)
+    assert converged.mean() > 0.95
+    assert np.max(np.abs(volatility - sigma)[converged]) < 1e-7
+
+
+def test_quotes_outside_the_no_arbitrage_bounds_are_nan():
+    volatility, converged = implied_volatility([0., 10.450584, 200.], 100., 100., 1., 0.05)
+    assert np.isnan(volatility[[0, 2]]).all() and not converged[[0, 2]].any()
+    assert converged[1] and abs(volatility[1] - 0.2) < 1e-6
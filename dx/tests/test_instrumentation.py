@@ -0,0 +1,34 @@
+# using usr/bin/python3
+from derivatives import GeometricBrownianMotion, ValuationEuropeanMonteCarlo, instrument
+from derivatives import instrumentation
+from derivatives.instrumentation import timed
+
+
+def test_disabled_instrumentation_is_a_no_op(gbm_env, option_env):
+    assert not instrumentation._collectors
+    assert timed('paths') is timed('payoff') is instrumentation._NO_STAGE
+    events = []
+    stats = instrument(lambda *event: events.append(event))
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=500))
+    valuation = ValuationEuropeanMonteCarlo('put', gbm, option_env(), 'put')
+    valuation.present_value()
+    assert events == []
+    assert stats.report() == {'timings': {}, 'calls': {}, 'counters': {}}
+
+
+def test_enabled_instrumentation_records_stages_and_counters(gbm_env, option_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=500))
+    valuation = ValuationEuropeanMonteCarlo('put', gbm, option_env(), 'put')
+    valuation.cache = None
+    with instrument() as stats:
+        assert isinstance(timed('paths'), instrumentation._Stage)
+        valuation.present_value()
+    assert not instrumentation._collectors
+    report = stats.report()
+    assert report['counters']['simulations'] == 1
+    assert report['counters']['path_bytes'] == gbm.instrument_values.nbytes
+    assert report['calls']['paths'] >= 1
+    assert all(seconds >= 0. for seconds in report['timings'].values())
+    # events after the block are not recorded
+    valuation.present_value(fixed_seed=False)
+    assert stats.report() == report
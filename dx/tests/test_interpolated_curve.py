@@ -0,0 +1,33 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import ConstantShortRate, FlatForwardCurve, LogLinearCurve
+
+TIMES = np.array([0.5, 1., 2., 5.])
+DISCOUNT_FACTORS = np.array([0.99, 0.975, 0.94, 0.84])
+
+
+def test_log_linear_curve_reproduces_its_nodes():
+    curve = LogLinearCurve('curve', TIMES, DISCOUNT_FACTORS)
+    np.testing.assert_allclose(curve.discount_factors(TIMES), DISCOUNT_FACTORS)
+    assert curve.discount_factors(0.) == 1.
+    # log-linear between nodes, the last forward rate beyond the last one
+    np.testing.assert_allclose(curve.discount_factors(1.5), np.sqrt(0.975 * 0.94))
+    np.testing.assert_allclose(curve.discount_factors(6.), 0.84 * (0.84 / 0.94) ** (1. / 3.))
+    assert curve.discount_factors(np.ones((2, 3))).shape == (2, 3)
+
+
+def test_flat_forward_curve_of_one_rate_is_a_constant_short_rate():
+    curve = FlatForwardCurve('curve', TIMES, 0.05)
+    times = np.linspace(0., 7., 15)
+    np.testing.assert_allclose(curve.discount_factors(times), ConstantShortRate('csr', 0.05).discount_factors(times))
+    np.testing.assert_allclose(FlatForwardCurve('curve', TIMES, [0.01, 0.02, 0.03, 0.04]).discount_factors(TIMES),
+                               np.exp(-np.cumsum([0.005, 0.01, 0.03, 0.12])))
+
+
+@pytest.mark.parametrize('times, discount_factors', [([1., 0.5], [0.99, 0.98]), ([0., 1.], [1., 0.98]),
+                                                     ([0.5, 1.], [0.99, 0.])])
+def test_invalid_nodes_are_rejected(times, discount_factors):
+    with pytest.raises(ValueError):
+        LogLinearCurve('curve', times, discount_factors)
@@ -0,0 +1,35 @@
+# using usr/bin/python3
+import pytest
+
+from derivatives import GeometricBrownianMotion, ValuationEuropeanMonteCarlo
+
+
+def _valuations(gbm_env, option_env, payoff_func):
+    return [ValuationEuropeanMonteCarlo('option', GeometricBrownianMotion('gbm', gbm_env(paths=20000, store_paths=mode)),
+                                        option_env(), payoff_func) for mode in (True, False)]
+
+
+@pytest.mark.parametrize('payoff_func, controls', [('put', ('underlying', 'vanilla')),
+                                                   ('asian_call', ('underlying', 'geometric_asian'))])
+def test_control_variates_without_stored_paths(gbm_env, option_env, payoff_func, controls):
+    stored, streamed = _valuations(gbm_env, option_env, payoff_func)
+    expected = stored.present_value_cv(controls=controls, fixed_seed=True)
+    estimate = streamed.present_value_cv(controls=controls, fixed_seed=True)
+    assert streamed.underlying.instrument_values is None
+    assert estimate.paths == expected.paths
+    assert estimate.value == pytest.approx(expected.value, abs=4 * (estimate.std_error + expected.std_error))
+
+
+def test_greeks_without_stored_paths(gbm_env, option_env):
+    stored, streamed = _valuations(gbm_env, option_env, 'put')
+    expected = stored.greeks()
+    greeks = streamed.greeks()
+    assert streamed.underlying.instrument_values is None
+    for key, (value, std_error) in greeks.items():
+        assert value == pytest.approx(expected[key][0], abs=4 * (std_error + expected[key][1]))
+
+
+def test_greeks_of_path_dependent_payoffs_need_stored_paths(gbm_env, option_env):
+    __, streamed = _valuations(gbm_env, option_env, 'asian_call')
+    with pytest.raises(ValueError):
+        streamed.greeks()
@@ -0,0 +1,29 @@
+# using usr/bin/python3
+import numpy as np
+
+from derivatives import GeometricBrownianMotion, PathStore, ValuationEuropeanMonteCarlo
+
+
+def test_round_trip_returns_the_simulated_paths(tmp_path, gbm_env):
+    store = PathStore(str(tmp_path))
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=500))
+    key = store.save(gbm)
+    assert key in store
+    instrument_values, time_grid, provenance = store.load(key)
+    assert isinstance(instrument_values, np.memmap)
+    np.testing.assert_array_equal(instrument_values, gbm.instrument_values)
+    np.testing.assert_array_equal(time_grid, gbm.time_grid)
+    assert provenance['shape'] == [len(gbm.time_grid), 500]
+
+
+def test_sessions_share_stored_paths(tmp_path, gbm_env, option_env):
+    store = PathStore(str(tmp_path))
+    values = []
+    for __ in range(2):
+        gbm = GeometricBrownianMotion('gbm', gbm_env(paths=500, path_store=store))
+        valuation = ValuationEuropeanMonteCarlo('put', gbm, option_env(), 'put')
+        valuation.cache = None
+        values.append(valuation.present_value(fixed_seed=True))
+        assert isinstance(gbm.instrument_values, np.memmap)
+    assert values[0] == values[1]
+    assert len([name for name in tmp_path.iterdir() if not name.name.startswith('.')]) == 1
@@ -0,0 +1,38 @@
+# using usr/bin/python3
+import pickle
+
+import numpy as np
+import pytest
+
+from derivatives import GeometricBrownianMotion, PathStatistics, Payoff
+
+EXPRESSIONS = {'call': 'np.maximum(maturity_value - strike, 0)',
+               'put': 'np.maximum(strike - maturity_value, 0)',
+               'asian_call': 'np.maximum(mean_value - strike, 0)',
+               'geometric_asian_put': 'np.maximum(strike - geometric_mean, 0)',
+               'lookback_call': 'np.maximum(max_value - strike, 0)',
+               'floating_lookback_put': 'max_value - maturity_value'}
+
+
+@pytest.fixture
+def stats(gbm_env):
+    paths = GeometricBrownianMotion('gbm', gbm_env(paths=1000)).get_instrument_values(fixed_seed=True)
+    return PathStatistics(paths, paths.shape[0] - 2)
+
+
+@pytest.mark.parametrize('name', sorted(EXPRESSIONS))
+def test_kernels_match_their_expressions(stats, name):
+    kernel, expression = Payoff(name), Payoff(EXPRESSIONS[name])
+    np.testing.assert_allclose(kernel(stats, 36.), expression(stats, 36.))
+    assert set(kernel.functionals) == set(expression.functionals)
+
+
+def test_barrier_options_wrap_the_kernel(stats):
+    knock_out, knock_in = Payoff('call', 'KnockoutBarrier'), Payoff('call', 'KnockinBarrier')
+    np.testing.assert_allclose(knock_out(stats, 36., 45.) + knock_in(stats, 36., 45.), Payoff('call')(stats, 36.))
+    assert 'max_value' in knock_out.functionals
+
+
+def test_expression_payoffs_survive_pickling(stats):
+    payoff = pickle.loads(pickle.dumps(Payoff(EXPRESSIONS['asian_call'])))
+    np.testing.assert_allclose(payoff(stats, 36.), Payoff('asian_call')(stats, 36.))
@@ -0,0 +1,35 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import BlackScholesChain, Pricing
+
+
+def test_single_option_keeps_its_shape():
+    pricing = Pricing(100., 100., 1., 0.05, 0.2)
+    price = pricing.opt_sim('euro_call', number_steps=50, number_paths=20000, seed=1)
+    assert price.shape == (1,)
+    assert price[0] == pytest.approx(BlackScholesChain(100., 100., 1., 0.05, 0.2).price, rel=0.03)
+    assert pricing.payoffs.shape == (1, 1, 20000)
+
+
+def test_several_options_and_strikes_share_one_simulation():
+    pricing = Pricing(100., 100., 1., 0.05, 0.2)
+    prices = pricing.opt_sim(['euro_call', 'euro_put'], number_steps=50, number_paths=20000, strike=[90., 110.],
+                             seed=1)
+    assert prices.shape == (2, 2)
+    expected = BlackScholesChain(100., np.array([[90., 110.]]), 1., 0.05, 0.2,
+                                 np.array([['eurocall'], ['europut']])).price
+    np.testing.assert_allclose(prices, expected, rtol=0.05)
+    # the call on a single strike is the same number on the same seed
+    single = Pricing(100., 100., 1., 0.05, 0.2).opt_sim('euro_call', number_steps=50, number_paths=20000,
+                                                        strike=90., seed=1)
+    assert single[0] == prices[0, 0]
+
+
+def test_custom_payoff_and_unknown_option_type():
+    pricing = Pricing(100., 100., 1., 0.05, 0.2, function_payoff='np.maximum(maturity_value - strike, 0)')
+    assert pricing.opt_sim(number_steps=50, number_paths=2000, seed=3) == \
+        Pricing(100., 100., 1., 0.05, 0.2).opt_sim('euro_call', number_steps=50, number_paths=2000, seed=3)
+    with pytest.raises(ValueError):
+        Pricing(100., 100., 1., 0.05, 0.2).opt_sim('american_call', number_paths=10)
@@ -0,0 +1,123 @@
+# using usr/bin/python3
+import asyncio
+import json
+import time
+
+import pytest
+
+from derivatives import PricingService
+from derivatives.pricing_service import _handle_request, _normalize
+
+BLACK_SCHOLES = {'type': 'black_scholes', 'asset_price': 100., 'strike': 100., 'maturity_time': 1.,
+                 'risk_free_factor': 0.05, 'sigma': 0.2}
+MONTE_CARLO = {'type': 'monte_carlo', 'initial_value': 100., 'volatility': 0.2, 'short_rate': 0.05, 'strike': 100.,
+               'maturity_time': 1., 'paths': 2000, 'steps': 12}
+
+
+def _run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+@pytest.mark.parametrize('field, value', [('initial_value', [100]), ('volatility', 'abc'), ('paths', 10.5),
+                                          ('strike', True), ('maturity_time', float('nan')),
+                                          ('payoff_func', 'np.maximum(maturity_value - strike, 0)')])
+def test_invalid_requests_are_rejected_and_the_batcher_survives(field, value):
+    async def run():
+        async with PricingService(workers=0) as service:
+            with pytest.raises(ValueError):
+                await service.price(dict(MONTE_CARLO, **{field: value}))
+            assert (await service.price(BLACK_SCHOLES))['price'] == pytest.approx(10.450584, abs=1e-6)
+            assert not service._batcher.done()
+    _run(run())
+
+
+def test_a_failing_batch_does_not_stop_the_batcher():
+    async def run():
+        async with PricingService(workers=0) as service:
+            # bypasses validation, the unhashable underlying fails the grouping of its batch
+            future = asyncio.get_running_loop().create_future()
+            service.queue.put_nowait((dict(_normalize(MONTE_CARLO), initial_value=[100.]), future,
+                                      time.perf_counter()))
+            with pytest.raises(TypeError):
+                await future
+            assert (await service.price(MONTE_CARLO))['present_value'] > 0.
+    _run(run())
+
+
+def test_a_bad_black_scholes_quote_only_fails_itself():
+    async def run():
+        async with PricingService(window=0.05, workers=0) as service:
+            loop = asyncio.get_running_loop()
+            futures = [loop.create_future() for __ in range(3)]
+            # bypasses validation, a string volatility fails the chain of its batch
+            good = _normalize(BLACK_SCHOLES)
+            for request, future in zip((good, dict(good, sigma='abc'), good), futures):
+                service.queue.put_nowait((request, future, time.perf_counter()))
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            assert service.batches == 1
+            assert results[0] == results[2] and results[0]['price'] == pytest.approx(10.450584, abs=1e-6)
+            assert isinstance(results[1], Exception)
+    _run(run())
+
+
+def test_monte_carlo_errors_are_raised_like_black_scholes_errors():
+    async def run():
+        async with PricingService(workers=0) as service:
+            # knock-out options need a barrier level, which only the valuation checks
+            quotes = await asyncio.gather(service.price(MONTE_CARLO),
+                                          service.price(dict(MONTE_CARLO, option_type='KnockoutBarrier')),
+                                          return_exceptions=True)
+            assert quotes[0]['std_error'] > 0.
+            assert isinstance(quotes[1], ValueError)
+    _run(run())
+
+
+@pytest.mark.parametrize('request_', [dict(BLACK_SCHOLES, time=1.), dict(BLACK_SCHOLES, time=2.),
+                                      dict(BLACK_SCHOLES, strike=0.), dict(MONTE_CARLO, strike=0.)])
+def test_requests_without_a_finite_quote_are_rejected(request_):
+    with pytest.raises(ValueError):
+        _normalize(request_)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_non_finite_quotes_are_errors():
+    async def run():
+        async with PricingService(workers=0) as service:
+            # bypasses validation, an expired option has no finite greeks
+            future = asyncio.get_running_loop().create_future()
+            service.queue.put_nowait((dict(_normalize(BLACK_SCHOLES), time=1., greeks=True), future,
+                                      time.perf_counter()))
+            with pytest.raises(ValueError):
+                await future
+    _run(run())
+
+
+class _Service:
+    """ Service quoting a fixed result."""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def price(self, request):
+        return self.result
+
+
+class _Writer:
+    """ Stream writer collecting the written lines."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.append(data)
+
+    async def drain(self):
+        pass
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf')])
+def test_non_finite_responses_are_reported_as_errors(value):
+    writer = _Writer()
+    _run(_handle_request(_Service({'price': value}), json.dumps(dict(BLACK_SCHOLES, id=3)), writer))
+    response = json.loads(writer.lines[0], parse_constant=pytest.fail)
+    assert response['id'] == 3 and 'error' in response and 'price' not in response
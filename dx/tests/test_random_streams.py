@@ -0,0 +1,39 @@
+# using usr/bin/python3
+import os
+import subprocess
+import sys
+
+from derivatives import GeometricBrownianMotion, ValuationEuropeanMonteCarlo
+
+DX = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import sys
+sys.path[:0] = [{dx!r}, {tests!r}]
+from conftest import gbm_environment, option_environment
+from derivatives import GeometricBrownianMotion, ValuationEuropeanMonteCarlo
+gbm = GeometricBrownianMotion('gbm', gbm_environment(paths=2000))
+print(repr(ValuationEuropeanMonteCarlo('put', gbm, option_environment(), 'put').present_value(fixed_seed=True)))
+"""
+
+
+def _fixed_seed_value_in_new_process():
+    script = SCRIPT.format(dx=DX, tests=os.path.join(DX, 'tests'))
+    return subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+
+
+def test_fixed_seed_without_seed_is_reproducible_across_processes():
+    assert _fixed_seed_value_in_new_process() == _fixed_seed_value_in_new_process()
+
+
+def test_fixed_seed_without_seed_matches_in_process(gbm_env, option_env):
+    values = [ValuationEuropeanMonteCarlo('put', GeometricBrownianMotion('gbm', gbm_env(paths=2000)), option_env(),
+                                          'put').present_value(fixed_seed=True) for __ in range(2)]
+    assert values[0] == values[1]
+    assert repr(values[0]) == _fixed_seed_value_in_new_process().strip()
+
+
+def test_running_stream_without_seed_is_fresh(gbm_env):
+    first, second = (GeometricBrownianMotion('gbm', gbm_env(paths=100)).get_instrument_values(fixed_seed=False)
+                     for __ in range(2))
+    assert not (first == second).all()
@@ -0,0 +1,24 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import RunningMoments
+from derivatives.running_statistics import antithetic_samples
+
+
+def test_merged_moments_match_numpy():
+    samples = np.random.default_rng(1).normal(1e9, 2., 1001)
+    moments = RunningMoments()
+    for chunk in np.array_split(samples, 7):
+        moments.update(chunk)
+    assert moments.count == samples.size
+    assert moments.mean == pytest.approx(np.mean(samples), rel=1e-15)
+    assert moments.variance == pytest.approx(np.var(samples, ddof=1), rel=1e-6)
+
+
+@pytest.mark.parametrize('path_number', [6, 7])
+def test_antithetic_samples_pair_paths_like_sn_random_numbers(path_number):
+    values = np.arange(path_number, dtype=float)
+    half = (path_number + 1) // 2
+    expected = [0.5 * (j + half + j) for j in range(path_number - half)] + list(range(path_number - half, half))
+    np.testing.assert_allclose(antithetic_samples(values), expected)
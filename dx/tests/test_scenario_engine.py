@@ -0,0 +1,30 @@
+# using usr/bin/python3
+import pytest
+
+from derivatives import GeometricBrownianMotion, ScenarioEngine, ValuationEuropeanMonteCarlo
+
+
+def _valuation(gbm_env, option_env, payoff_func, initial_value=36., volatility=0.2, rate=0.06):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(initial_value=initial_value, volatility=volatility, rate=rate,
+                                                 paths=5000, seed=7))
+    return ValuationEuropeanMonteCarlo('option', gbm, option_env(), payoff_func)
+
+
+@pytest.mark.parametrize('payoff_func', ['call', 'asian_put'])
+def test_scenarios_match_resimulation_on_the_same_seed(gbm_env, option_env, payoff_func):
+    result = ScenarioEngine(_valuation(gbm_env, option_env, payoff_func)).run(
+        spot=(-0.1, 0., 0.1), vol=(0., 0.05), rate=(0., 0.01))
+    for spot, vol, rate in [(0., 0., 0.), (-0.1, 0., 0.), (0., 0.05, 0.), (0., 0., 0.01), (0.1, 0.05, 0.01)]:
+        resimulated = _valuation(gbm_env, option_env, payoff_func, 36. * (1. + spot), 0.2 + vol, 0.06 + rate)
+        assert result.sel(spot=spot, vol=vol, rate=rate, time=0) == \
+            pytest.approx(resimulated.present_value(fixed_seed=True), abs=2e-6)
+    assert result.base_value == pytest.approx(result.sel(spot=0., vol=0., rate=0., time=0))
+
+
+def test_standard_errors_account_for_antithetic_paths(gbm_env, option_env):
+    valuation = _valuation(gbm_env, option_env, 'put')
+    result = ScenarioEngine(valuation).run(spot=(0.,), vol=(0.,), rate=(0.,))
+    value, std_error = valuation.greeks(fixed_seed=True)['present_value']
+    assert result.sel(spot=0., vol=0., rate=0., time=0) == pytest.approx(value)
+    index = result._index({'spot': 0., 'vol': 0., 'rate': 0., 'time': 0})
+    assert result.std_errors[index] == pytest.approx(std_error)
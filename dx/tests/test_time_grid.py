@@ -0,0 +1,37 @@
+# using usr/bin/python3
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from derivatives import TimeGrid
+from derivatives.time_grid import date_range
+
+PERIODS = [(dt.datetime(2020, 1, 1), dt.datetime(2020, 12, 31)), (dt.datetime(2019, 11, 15), dt.datetime(2023, 2, 28)),
+           (dt.datetime(2020, 2, 29), dt.datetime(2020, 3, 31))]
+
+
+@pytest.mark.parametrize('start, end', PERIODS)
+@pytest.mark.parametrize('frequency, pandas_frequencies', [('D', ('D',)), ('M', ('ME', 'M')), ('Y', ('YE', 'A'))])
+def test_date_range_matches_pandas(start, end, frequency, pandas_frequencies):
+    pd = pytest.importorskip('pandas')
+    for pandas_frequency in pandas_frequencies:
+        try:
+            expected = pd.date_range(start=start, end=end, freq=pandas_frequency)
+            break
+        except ValueError:
+            continue
+    np.testing.assert_array_equal(date_range(start, end, frequency), expected.to_numpy(dtype='datetime64[us]'))
+
+
+def test_grid_indexes_dates_and_year_fractions():
+    dates = [dt.datetime(2020, 12, 31), dt.datetime(2020, 1, 1), dt.datetime(2020, 7, 1), dt.datetime(2020, 1, 1)]
+    grid = TimeGrid(dates, 'ACT/360')
+    assert len(grid) == 3
+    assert grid.get_index(dt.datetime(2020, 7, 1)) == 1 and dt.datetime(2020, 12, 31) in grid
+    with pytest.raises(KeyError):
+        grid.get_index(dt.datetime(2020, 7, 2))
+    np.testing.assert_allclose(grid.get_year_fractions(), [0., 182. / 360., 365. / 360.])
+    np.testing.assert_allclose(grid.get_year_fractions(365.), [0., 182. / 365., 1.])
+    assert grid.merge([dt.datetime(2020, 7, 1)]) is grid
+    assert grid.merge([dt.datetime(2020, 3, 1)]).get_index(dt.datetime(2020, 7, 1)) == 2
@@ -0,0 +1,25 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import GeometricBrownianMotion, ValuationAmericanMonteCarlo
+
+
+def test_longstaff_schwartz_reference_put(gbm_env, option_env):
+    # S = 36, K = 40, r = 6%, sigma = 20%, T = 1 year: 4.478 in Longstaff and Schwartz (2001), table 1
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=20000, frequency='W'))
+    american = ValuationAmericanMonteCarlo('put', gbm, option_env(), 'put', basis='laguerre', degree=3)
+    assert american.present_value(fixed_seed=True) == pytest.approx(4.47, abs=0.05)
+    assert american.present_value(fixed_seed=True, low_memory=False) == \
+        american.present_value(fixed_seed=True, low_memory=True)
+
+
+def test_callable_bases_do_not_share_cached_values(gbm_env, option_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=5000, frequency='W'))
+    values = []
+    for basis in (lambda x, degree: np.vander(x, 2), lambda x, degree: np.vander(x, 6)):
+        american = ValuationAmericanMonteCarlo('put', gbm, option_env(), 'put', basis=basis)
+        values.append(american.present_value(fixed_seed=True))
+        american.cache = None
+        assert american.present_value(fixed_seed=True) == values[-1]
+    assert values[0] != values[1]
@@ -0,0 +1,55 @@
+# using usr/bin/python3
+import numpy as np
+import pytest
+
+from derivatives import BlackScholesChain, GeometricBrownianMotion, ValuationEuropeanMonteCarlo
+
+
+def test_parallel_std_error_is_shift_invariant(gbm_env, option_env):
+    gbm = GeometricBrownianMotion('gbm', gbm_env(paths=4000))
+    put = ValuationEuropeanMonteCarlo('put', gbm, option_env(), 'np.maximum(strike - maturity_value, 0)')
+    shifted = ValuationEuropeanMonteCarlo('shifted', gbm, option_env(),
+                                          'np.maximum(strike - maturity_value, 0) + 1e9')
+    __, std_error = put.present_value_parallel(workers=1, block_size=1000, full=True)
+    __, shifted_std_error = shifted.present_value_parallel(workers=1, block_size=1000, full=True)
+    assert shifted_std_error == pytest.approx(std_error, rel=1e-6)
+
+
+def test_parallel_is_independent_of_workers(gbm_env, option_env):
+    valuation = ValuationEuropeanMonteCarlo('put', GeometricBrownianMotion('gbm', gbm_env(paths=3000)),
+                                            option_env(), 'put')
+    in_process = valuation.present_value_parallel(workers=1, block_size=1000, full=True)
+    assert valuation.present_value_parallel(workers=2, block_size=1000, full=True) == in_process
+
+
+def test_streaming_std_error_matches_spread_across_seeds(gbm_env, option_env):
+    # a deep in-the-money call is nearly linear, antithetic pairs cancel most of its variance
+    estimates = [ValuationEuropeanMonteCarlo('call', GeometricBrownianMotion('gbm', gbm_env(paths=4000, seed=seed)),
+                                             option_env(strike=20.), 'call').present_value_streaming(chunk_size=1000)
+                 for seed in range(40)]
+    spread = np.std([estimate.value for estimate in estimates], ddof=1)
+    assert all(estimate.paths == 4000 for estimate in estimates)
+    assert 0.6 < spread / np.mean([estimate.std_error for estimate in estimates]) < 1.6
+
+
+def test_qmc_estimate_within_its_error_of_black_scholes(gbm_env, option_env):
+    valuation = ValuationEuropeanMonteCarlo('call', GeometricBrownianMotion('gbm', gbm_env(paths=2 ** 14)),
+                                            option_env(), 'call')
+    estimate = valuation.present_value_qmc(replications=16)
+    maturity_time = valuation.underlying.grid.get_year_fractions()[valuation.maturity_index()]
+    expected = BlackScholesChain(36., 40., maturity_time, 0.06, 0.2).price
+    assert estimate.paths == 2 ** 14
+    assert estimate.value == pytest.approx(expected, abs=4 * estimate.std_error)
+    # randomized QMC beats plain Monte Carlo on the same number of paths
+    __, std_error = valuation.present_value_parallel(workers=1, full=True)
+    assert estimate.std_error < std_error
+
+
+@pytest.mark.parametrize('day_count', [365., 360.])
+def test_vanilla_control_mean_uses_the_day_count_of_the_paths(gbm_env, option_env, day_count):
+    valuation = ValuationEuropeanMonteCarlo('call', GeometricBrownianMotion('gbm', gbm_env(day_count=day_count)),
+                                            option_env(), 'call')
+    estimate = valuation.present_value_cv(controls=('vanilla',), fixed_seed=True)
+    maturity_time = valuation.underlying.grid.get_year_fractions()[valuation.maturity_index()]
+    # the payoff is its own control, the estimate is the closed form on the simulated maturity
+    assert estimate.value == pytest.approx(BlackScholesChain(36., 40., maturity_time, 0.06, 0.2).price, rel=1e-9)